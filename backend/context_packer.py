@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Token-Budgeted Context Packer for the world-aware DM
+Scores lore chunks by relevance, ai_priority and recency, then fills a token budget
+"""
+
+import re
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+from world_loader import WorldContentLoader, ByteBudgetLRU
+from token_counter import content_hash
+
+# metadata.ai_priority -> score multiplier
+PRIORITY_WEIGHTS = {'critical': 2.0, 'high': 1.5, 'medium': 1.0, 'low': 0.6}
+
+# How useful each section is to the DM, before priority and recency
+SECTION_RELEVANCE = {
+    'overview': 0.9,
+    'bio': 1.0,
+    'description': 1.0,
+    'secrets': 0.8,
+    'dialogue': 0.7,
+    'inhabitants': 0.6,
+    'history': 0.5,
+    'stats': 0.4,
+}
+
+SECTION_LABELS = {
+    'bio': 'Bio',
+    'description': 'Description',
+    'secrets': '[DM SECRETS]',
+    'dialogue': 'Speech Style',
+    'history': 'History',
+    'stats': 'Stats',
+    'inhabitants': 'Inhabitants',
+}
+
+# Entity tag used when rendering each entity type
+ENTITY_TAGS = {'characters': 'character', 'locations': 'location', 'items': 'item'}
+# Encloses every entity block, once per rendered context that has any
+ENTITIES_OPENING, ENTITIES_CLOSING = "\n<current_entities>\n", "</current_entities>\n"
+
+# Score multiplier per turn since the entity was last mentioned
+RECENCY_DECAY = 0.6
+
+# Score multiplier per hop for entities pulled in through the world graph
+GRAPH_DECAY = 0.5
+
+# Score multiplier for each later part of a section (parts are split on "## " headings)
+PART_DECAY = 0.85
+
+DEFAULT_BUDGET = 2000
+
+# Cap on the text held by cached entity chunks (the overview is always kept)
+DEFAULT_CHUNK_CACHE_BYTES = 32 * 1024 * 1024
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate used when no tokenizer is supplied"""
+    return (len(text) + 3) // 4
+
+
+def label_part(label: str, text: str) -> str:
+    """Prefix a section part with its label, folding a "## Heading" into the label"""
+    match = re.match(r'##\s+([^\n]+)\n+', text)
+    if match:
+        return f"{label} ({match.group(1).strip()}): {text[match.end():]}\n"
+    return f"{label}: {text}\n"
+
+
+def split_markdown(text: str) -> List[str]:
+    """Split markdown into parts at "## " headings, dropping the "# Title" line"""
+    text = re.sub(r'\A#\s[^\n]*\n+', '', text.strip() + '\n')
+    parts = re.split(r'\n(?=## )', text)
+    return [part.strip() for part in parts if part.strip()]
+
+
+class ContextChunk:
+    """One packable piece of lore, pre-rendered, with its static score, token cost and content hash"""
+
+    __slots__ = ('entity_type', 'entity_id', 'section', 'part', 'text', 'tokens', 'base_score', 'content_hash')
+
+    def __init__(self, entity_type: str, entity_id: str, section: str, part: int,
+                 text: str, tokens: int, base_score: float, content_hash: str = ''):
+        self.entity_type = entity_type
+        self.entity_id = entity_id
+        self.section = section
+        self.part = part
+        self.text = text
+        self.tokens = tokens
+        self.base_score = base_score
+        self.content_hash = content_hash
+
+    @property
+    def key(self) -> Tuple[str, str, str, int]:
+        return (self.entity_type, self.entity_id, self.section, self.part)
+
+    def __repr__(self):
+        return f"ContextChunk({self.entity_type}/{self.entity_id}:{self.section}[{self.part}], {self.tokens} tokens)"
+
+
+class PackedContext:
+    """Result of a packing run - the selected chunks and their rendered text"""
+
+    def __init__(self, chunks: List[ContextChunk], wrappers: Dict[Tuple[str, str], Tuple[str, str]],
+                 tokens: int, budget: int):
+        self.chunks = chunks
+        self.wrappers = wrappers
+        self.tokens = tokens
+        self.budget = budget
+
+    def render(self) -> str:
+        """Render selected chunks grouped by entity, in stable section order"""
+        grouped: Dict[Tuple[str, str], List[ContextChunk]] = {}
+        for chunk in sorted(self.chunks, key=lambda c: c.key):
+            grouped.setdefault((chunk.entity_type, chunk.entity_id), []).append(chunk)
+
+        world = ''
+        entities = ''
+        for entity_key, chunks in grouped.items():
+            opening, closing = self.wrappers[entity_key]
+            block = opening + ''.join(chunk.text for chunk in chunks) + closing
+            if entity_key[0] == 'world':
+                world += block
+            else:
+                entities += block
+
+        rendered = world
+        if entities:
+            rendered += ENTITIES_OPENING + entities + ENTITIES_CLOSING
+        return rendered
+
+
+class ContextPacker:
+    """Selects the most useful lore chunks that fit an exact token budget"""
+
+    def __init__(self, loader: WorldContentLoader, count_tokens: Callable[[str], int] = estimate_tokens,
+                 chunk_cache_bytes: int = DEFAULT_CHUNK_CACHE_BYTES, graph=None, graph_hops: int = 1):
+        self.loader = loader
+        self.count_tokens = count_tokens
+        # Anything with neighborhood(type, id, hops) - a WorldGraph or LiveWorldGraph
+        self.graph = graph
+        self.graph_hops = graph_hops
+        self._world_chunks: Optional[List[ContextChunk]] = None
+        self._chunk_cache = ByteBudgetLRU(chunk_cache_bytes)
+        self._wrapper_cache: Dict[Tuple[str, str], Tuple[str, str, int]] = {}
+        self._entities_wrapper_tokens: Optional[int] = None
+
+    def invalidate(self, entity_type: str, entity_id: str):
+        """Drop precomputed chunks for an entity whose files changed"""
+        self._chunk_cache.discard((entity_type, entity_id))
+        self._wrapper_cache.pop((entity_type, entity_id), None)
+
+    def invalidate_world(self):
+        """Drop precomputed overview chunks after WORLD_CONCEPT.md changes"""
+        self._world_chunks = None
+
+    def _make_chunk(self, entity_type: str, entity_id: str, section: str, part: int,
+                    text: str, priority: float) -> ContextChunk:
+        score = SECTION_RELEVANCE.get(section, 0.5) * priority * (PART_DECAY ** part)
+        return ContextChunk(entity_type, entity_id, section, part, text, self.count_tokens(text), score,
+                            content_hash(text))
+
+    def world_chunks(self) -> List[ContextChunk]:
+        """Chunks for the campaign overview (computed once)"""
+        if self._world_chunks is None:
+            priority = PRIORITY_WEIGHTS['high']
+            self._world_chunks = [
+                self._make_chunk('world', self.loader.campaign, 'overview', index, f"{text}\n", priority)
+                for index, text in enumerate(split_markdown(self.loader.get_world_overview()))
+            ]
+        return self._world_chunks
+
+    def entity_chunks(self, entity_type: str, entity_id: str) -> List[ContextChunk]:
+        """Chunks for one entity's sections (computed once per entity)"""
+        cache_key = (entity_type, entity_id)
+        cached = self._chunk_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        content = self.loader.load_content(entity_type, entity_id)
+        if content is None:
+            return []
+
+        model = self.loader.load_model(entity_type, entity_id)
+        priority = PRIORITY_WEIGHTS.get(model.ai_priority if model else 'medium', 1.0)
+        chunks = []
+
+        for section in ('bio', 'description', 'secrets', 'dialogue', 'history'):
+            for part, text in enumerate(split_markdown(content.get(section, ''))):
+                text = label_part(SECTION_LABELS[section], text)
+                chunks.append(self._make_chunk(entity_type, entity_id, section, part, text, priority))
+
+        stats = content.get('stats_data')
+        if isinstance(stats, dict):
+            summary = ', '.join(f"{key}: {value}" for key, value in stats.items()
+                                if isinstance(value, (str, int, float)))
+            properties = stats.get('properties')
+            if isinstance(properties, list) and properties:
+                summary += ('; ' if summary else '') + 'properties: ' + ', '.join(map(str, properties))
+            if summary:
+                chunks.append(self._make_chunk(entity_type, entity_id, 'stats', 0,
+                                               f"Stats: {summary}\n", priority))
+
+        inhabitants = content.get('inhabitants_data')
+        if isinstance(inhabitants, dict):
+            names = [name for group in ('characters', 'creatures', 'factions')
+                     for name in inhabitants.get(group, [])]
+            if names:
+                chunks.append(self._make_chunk(entity_type, entity_id, 'inhabitants', 0,
+                                               f"Inhabitants: {', '.join(names)}\n", priority))
+
+        self._chunk_cache.put(cache_key, chunks, sum(len(chunk.text) for chunk in chunks))
+        return chunks
+
+    def warm(self) -> int:
+        """Precompute chunks (and their token counts) for the whole campaign"""
+        total = len(self.world_chunks())
+        for entity in self.loader.load_all():
+            total += len(self.entity_chunks(entity['type'], entity['id']))
+        return total
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Memory and hit-rate metrics for the loader's text LRU and the chunk LRU"""
+        stats = {'text_cache': self.loader.text_cache.stats(), 'chunk_cache': self._chunk_cache.stats()}
+        if self.graph:
+            stats['graph'] = self.graph.stats()
+        return stats
+
+    def _wrapper(self, entity_type: str, entity_id: str) -> Tuple[str, str, int]:
+        """Opening tag, closing tag and their combined token cost for an entity"""
+        cache_key = (entity_type, entity_id)
+        if cache_key not in self._wrapper_cache:
+            if entity_type == 'world':
+                opening, closing = "\n<world_context>\n", "</world_context>\n"
+            else:
+                entity = self.loader.load_entity(entity_type, entity_id) or {'master': {}}
+                tag = ENTITY_TAGS.get(entity_type, 'entity')
+                name = entity['master'].get('name', entity_id)
+                opening, closing = f'\n<{tag} name="{name}" id="{entity_id}">\n', f"</{tag}>\n"
+            self._wrapper_cache[cache_key] = (opening, closing, self.count_tokens(opening + closing))
+        return self._wrapper_cache[cache_key]
+
+    def expand(self, mentions: Dict[Tuple[str, str], int]) -> Dict[Tuple[str, str], float]:
+        """Score multiplier for every mentioned entity and, through the graph, its neighbors"""
+        weights = {entity_key: RECENCY_DECAY ** turns_ago for entity_key, turns_ago in mentions.items()}
+        if self.graph and self.graph_hops > 0:
+            for entity_key, turns_ago in mentions.items():
+                recency = RECENCY_DECAY ** turns_ago
+                for neighbor, hops in self.graph.neighborhood(*entity_key, hops=self.graph_hops):
+                    if neighbor not in mentions:
+                        weights[neighbor] = max(weights.get(neighbor, 0.0), recency * GRAPH_DECAY ** hops)
+        return weights
+
+    def candidates(self, mentions: Dict[Tuple[str, str], int]) -> List[Tuple[float, ContextChunk]]:
+        """Score every candidate chunk for this turn"""
+        scored = [(chunk.base_score, chunk) for chunk in self.world_chunks()]
+        for (entity_type, entity_id), weight in sorted(self.expand(mentions).items()):
+            for chunk in self.entity_chunks(entity_type, entity_id):
+                scored.append((chunk.base_score * weight, chunk))
+        return scored
+
+    def pack(self, scored: List[Tuple[float, ContextChunk]], budget: int = DEFAULT_BUDGET) -> PackedContext:
+        """Greedy fill by score density, never exceeding the budget
+
+        Ties are broken by score and then chunk key, so the same inputs always
+        produce the same selection. Entity wrapper tags are charged to the
+        first chunk selected from that entity, and the <current_entities>
+        wrapper to the first entity chunk selected at all.
+        """
+        ordered = sorted(scored, key=lambda item: (-item[0] / max(item[1].tokens, 1), -item[0], item[1].key))
+        if self._entities_wrapper_tokens is None:
+            self._entities_wrapper_tokens = self.count_tokens(ENTITIES_OPENING + ENTITIES_CLOSING)
+
+        selected = []
+        wrappers = {}
+        has_entities = False
+        used = 0
+        for score, chunk in ordered:
+            if score <= 0:
+                continue
+            entity_key = (chunk.entity_type, chunk.entity_id)
+            cost = chunk.tokens
+            if entity_key not in wrappers:
+                opening, closing, wrapper_tokens = self._wrapper(*entity_key)
+                cost += wrapper_tokens
+                if entity_key[0] != 'world' and not has_entities:
+                    cost += self._entities_wrapper_tokens
+            if used + cost > budget:
+                continue
+            if entity_key not in wrappers:
+                wrappers[entity_key] = (opening, closing)
+                has_entities = has_entities or entity_key[0] != 'world'
+            selected.append(chunk)
+            used += cost
+
+        return PackedContext(selected, wrappers, used, budget)
+
+    def build_context(self, user_input: str, conversation_history: Optional[List[Dict[str, Any]]] = None,
+                      budget: int = DEFAULT_BUDGET) -> PackedContext:
+        """Detect mentioned entities and pack the best lore for this turn"""
+        mentions = self.loader.find_mentions(user_input, conversation_history)
+        return self.pack(self.candidates(mentions), budget)
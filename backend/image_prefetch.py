@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Scene Image Prefetch - warm the images a player is likely to see next
+From the scene a turn is set in, the graph's inhabitants and neighbours are the likely
+next scenes: their artwork gets hashed ahead of time, and anything without artwork is
+generated with spare image-queue capacity, up to a per-campaign budget
+"""
+
+import threading
+from queue import Full, Queue
+from typing import Any, Dict, List, Optional, Tuple
+
+from image_queue import ImageJobQueue, PENDING, PREFETCH, RUNNING
+from scene_images import SceneImageResolver
+from world_graph import LiveWorldGraph
+
+# DALL-E calls prefetch may spend on one campaign per server run
+DEFAULT_PREFETCH_BUDGET = 20
+# Graph distance counted as "likely next": inhabitants at 1, places they also frequent at 2
+DEFAULT_PREFETCH_HOPS = 2
+# Queue session that prefetch jobs are filed under
+PREFETCH_SESSION = 'prefetch'
+# Turns waiting for the prefetch thread; past this the oldest scenes are stale anyway and new ones are dropped
+MAX_PENDING_TURNS = 64
+
+
+class ScenePrefetcher:
+    """Warms likely next scenes after each turn and tracks how often the next turn was ready"""
+
+    def __init__(self, resolver: SceneImageResolver, graph: LiveWorldGraph, queue: Optional[ImageJobQueue] = None,
+                 budget: int = DEFAULT_PREFETCH_BUDGET, hops: int = DEFAULT_PREFETCH_HOPS):
+        self.resolver = resolver
+        self.graph = graph
+        self.queue = queue
+        self.budget = budget
+        self.hops = hops
+        # subject -> prompt it was generated from, or None for artwork whose URL is warm
+        self.warmed: Dict[Tuple[str, str], Optional[str]] = {}
+        # subject -> id of the prefetch job generating it, until its image is known to have landed
+        self.jobs: Dict[Tuple[str, str], str] = {}
+        self.spent = 0
+        self.over_budget = 0
+        self.scenes = 0
+        self.hits = 0
+        self.dropped = 0
+        self.turns: 'Queue[Tuple[str, str]]' = Queue(MAX_PENDING_TURNS)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def likely_scenes(self, entity_type: str, entity_id: str) -> List[Tuple[str, str]]:
+        """Subjects a player at this scene is likely to meet next, nearest first"""
+        likely = [entity for entity, _ in self.graph.neighborhood(entity_type, entity_id, self.hops)]
+        places = [(entity_type, entity_id)] + [entity for entity in likely if entity[0] == 'locations']
+        _, homes = self.resolver.creatures
+        for place_type, place_id in places:
+            if place_type == 'locations':
+                likely.extend(('creatures', label) for label, home in homes.items() if home == place_id)
+        return likely
+
+    def _ready(self, subject: Tuple[str, str]) -> bool:
+        if subject not in self.warmed:
+            return False
+        prompt = self.warmed[subject]
+        return prompt is None or (self.queue is not None and self.queue.cached(prompt))
+
+    def _forget(self, subject: Tuple[str, str]):
+        self.warmed.pop(subject, None)
+        self.jobs.pop(subject, None)
+
+    def _forget_lost(self):
+        """Un-warm subjects whose job ended without an image in the cache, so a later turn can try again"""
+        for subject, job_id in list(self.jobs.items()):
+            job = self.queue.get(job_id)
+            if job is not None and job.state in (PENDING, RUNNING):
+                continue
+            if self.queue.cached(self.warmed[subject]):
+                del self.jobs[subject]
+            else:
+                # Failed, cancelled before it ran, or its image already evicted
+                self._forget(subject)
+
+    def invalidate(self, entity_type: str, entity_id: str, *_):
+        """WorldCache listener - an edited entity's artwork or prompt may have changed"""
+        with self._lock:
+            self._forget((entity_type, entity_id))
+            if entity_type == 'locations':
+                # Creature prompts name their home, and a location's inhabitants may have changed
+                for subject in [subject for subject in self.warmed if subject[0] == 'creatures']:
+                    self._forget(subject)
+
+    def observe(self, game_text: str, user_action: str = ""):
+        """Score the turn that just happened, then warm what may come after it
+
+        Blocks while artwork is hashed; the server goes through observe_later.
+        """
+        subject = self.resolver.subject(game_text, user_action)
+        if subject is None:
+            return
+        with self._lock:
+            self.scenes += 1
+            if self._ready(subject):
+                self.hits += 1
+        if subject[0] != 'creatures':
+            self.prefetch(*subject)
+
+    def observe_later(self, game_text: str, user_action: str = ""):
+        """Hand a turn to the prefetch thread, so the server is straight back to serving requests"""
+        with self._lock:
+            if self._thread is None:
+                # Lazily, like the image queue's workers, so a prefork parent never owns it
+                self._thread = threading.Thread(target=self._drain, name='scene-prefetch', daemon=True)
+                self._thread.start()
+        try:
+            self.turns.put_nowait((game_text, user_action))
+        except Full:
+            with self._lock:
+                self.dropped += 1
+
+    def _drain(self):
+        while True:
+            game_text, user_action = self.turns.get()
+            try:
+                self.observe(game_text, user_action)
+            except Exception as e:
+                print(f"⚠️ Scene prefetch failed: {e}")
+            finally:
+                self.turns.task_done()
+
+    def prefetch(self, entity_type: str, entity_id: str) -> int:
+        """Warm the likely next scenes from an entity; returns how many were newly warmed
+
+        The budget is checked and a call reserved under one lock, so turns
+        observed concurrently can't spend past it.
+        """
+        warmed = 0
+        if self.queue is not None:
+            with self._lock:
+                self._forget_lost()
+        for subject in self.likely_scenes(entity_type, entity_id):
+            with self._lock:
+                if subject in self.warmed:
+                    continue
+            if subject[0] != 'creatures' and self.resolver.artwork(*subject):
+                # Computing the versioned URL hashes the file - the slow part of a first hit
+                with self._lock:
+                    self.warmed[subject] = None
+                warmed += 1
+                continue
+            if self.queue is None:
+                continue
+            prompt = (self.resolver.creature_prompt(subject[1]) if subject[0] == 'creatures'
+                      else self.resolver.entity_prompt(*subject))
+            if prompt is None:
+                continue
+            submit = False
+            with self._lock:
+                if subject in self.warmed:
+                    continue
+                if not self.queue.cached(prompt):
+                    if self.spent >= self.budget:
+                        self.over_budget += 1
+                        continue
+                    if not self.queue.spare_capacity():
+                        # Players' own scenes come first; try again after a later turn
+                        break
+                    self.spent += 1
+                    submit = True
+                self.warmed[subject] = prompt
+            if submit:
+                job = self.queue.submit(PREFETCH_SESSION, prompt, PREFETCH)
+                with self._lock:
+                    if self.warmed.get(subject) == prompt:
+                        self.jobs[subject] = job.id
+            warmed += 1
+        return warmed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'budget': self.budget, 'spent': self.spent, 'over_budget': self.over_budget,
+                    'warmed': len(self.warmed), 'scenes': self.scenes, 'hits': self.hits, 'dropped': self.dropped,
+                    'hit_rate': round(self.hits / self.scenes, 3) if self.scenes else 0.0}
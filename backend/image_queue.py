@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Image Job Queue - per-session scene images off the request path
+A player's newer turn supersedes their pending image: queued jobs are cancelled before
+dispatch, and jobs already at DALL-E have their result cached but never delivered
+"""
+
+import heapq
+import itertools
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Set
+
+# Job priorities, most urgent first: the scene a player is in now, then speculative work
+SCENE = 0
+PREFETCH = 1
+
+# Job states
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+SUPERSEDED = 'superseded'
+
+DEFAULT_IMAGE_WORKERS = 2
+# Generated images kept per prompt, so a scene the player comes back to costs nothing
+DEFAULT_CACHE_SIZE = 256
+# Finished jobs kept around for polling
+DEFAULT_JOB_HISTORY = 1024
+
+
+class ImageJob:
+    """One requested image: who asked, for what prompt, and where it got to"""
+
+    __slots__ = ('id', 'session_id', 'prompt', 'priority', 'state', 'result', 'error', 'submitted', 'finished',
+                 'done_event')
+
+    def __init__(self, job_id: str, session_id: Optional[str], prompt: str, priority: int):
+        self.id = job_id
+        self.session_id = session_id
+        self.prompt = prompt
+        self.priority = priority
+        self.state = PENDING
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.submitted = time.time()
+        self.finished: Optional[float] = None
+        self.done_event = threading.Event()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Poll response: the image once done; superseded jobs never hand theirs out"""
+        data = {'job': self.id, 'status': self.state, 'prompt': self.prompt}
+        if self.state == DONE:
+            data['image'] = self.result
+        elif self.state == FAILED:
+            data['error'] = self.error
+        return data
+
+
+class ImageJobQueue:
+    """Priority queue of image jobs drained by a few worker threads
+
+    Each named session has at most one live scene job. Submitting a new one
+    supersedes the old: a queued job is cancelled before it costs a call,
+    a running one finishes into the prompt cache without being delivered
+    and is counted as a wasted call.
+    """
+
+    def __init__(self, generate: Callable[[str], Optional[Dict[str, Any]]], max_workers: int = DEFAULT_IMAGE_WORKERS,
+                 cache_size: int = DEFAULT_CACHE_SIZE, history: int = DEFAULT_JOB_HISTORY):
+        self.generate = generate
+        self.max_workers = max_workers
+        self.cache_size = cache_size
+        self.history = history
+        self.jobs: 'OrderedDict[str, ImageJob]' = OrderedDict()
+        self.cache: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        # session -> its live scene job, and job id -> the sessions waiting on it; both lose a job when it finishes
+        self._current: Dict[str, ImageJob] = {}
+        self._sessions: Dict[str, Set[str]] = {}
+        # prompt -> the queued or running job that will produce it
+        self._live: Dict[str, ImageJob] = {}
+        self._running = 0
+        self._heap = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._workers = []
+        self._closed = False
+        self.counters = {'submitted': 0, 'cache_hits': 0, 'dispatched': 0, 'completed': 0, 'failed': 0,
+                         'cancelled': 0, 'wasted_calls': 0, 'adopted': 0}
+
+    def _start_workers(self):
+        # Lazily, so a prefork parent never owns threads its children would lose
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._work, name=f'image-worker-{len(self._workers)}', daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def _remember(self, job: ImageJob):
+        self.jobs[job.id] = job
+        while len(self.jobs) > self.history:
+            oldest_id, oldest = next(iter(self.jobs.items()))
+            if oldest.state in (PENDING, RUNNING):
+                break
+            del self.jobs[oldest_id]
+
+    def _cache_put(self, prompt: str, result: Dict[str, Any]):
+        self.cache[prompt] = result
+        self.cache.move_to_end(prompt)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def _track(self, session_id: str, job: ImageJob):
+        self._untrack(session_id)
+        self._current[session_id] = job
+        self._sessions.setdefault(job.id, set()).add(session_id)
+
+    def _untrack(self, session_id: str):
+        job = self._current.pop(session_id, None)
+        if job is not None:
+            sessions = self._sessions[job.id]
+            sessions.discard(session_id)
+            if not sessions:
+                del self._sessions[job.id]
+
+    def _finish(self, job: ImageJob, state: str):
+        if self._live.get(job.prompt) is job:
+            del self._live[job.prompt]
+        for session_id in self._sessions.pop(job.id, ()):
+            del self._current[session_id]
+        job.state = state
+        job.finished = time.time()
+        job.done_event.set()
+
+    def _supersede(self, job: ImageJob, session_id: str):
+        if self._sessions.get(job.id, set()) - {session_id}:
+            # Another player is waiting on the same scene
+            return
+        if job.state == PENDING:
+            self.counters['cancelled'] += 1
+            self._finish(job, SUPERSEDED)
+        elif job.state == RUNNING:
+            # Already paid for - it lands in the cache but nobody gets it
+            job.state = SUPERSEDED
+            if self._live.get(job.prompt) is job:
+                del self._live[job.prompt]
+
+    def submit(self, session_id: Optional[str], prompt: str, priority: int = SCENE) -> ImageJob:
+        """Queue an image for a session, superseding its previous scene job
+
+        Without a session id the job stands alone and supersedes nothing. A prompt already queued or running is never requested twice: the
+        caller gets that job, and a scene request lifts a prefetch job to
+        scene priority.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('image queue is closed')
+            self.counters['submitted'] += 1
+            live = self._live.get(prompt)
+            tracked = priority == SCENE and session_id is not None
+            previous = self._current.get(session_id) if tracked else None
+            if live is not None:
+                if priority == SCENE:
+                    if previous is not None and previous is not live:
+                        self._supersede(previous, session_id)
+                    if live.priority != SCENE:
+                        self.counters['adopted'] += 1
+                        live.priority = SCENE
+                        if live.state == PENDING:
+                            heapq.heappush(self._heap, (SCENE, next(self._ids), live))
+                    if tracked:
+                        self._track(session_id, live)
+                return live
+
+            # Random, so an id from one server process never names another process's job
+            job = ImageJob(f'img-{uuid.uuid4().hex}', session_id, prompt, priority)
+            if tracked:
+                if previous is not None:
+                    self._supersede(previous, session_id)
+                self._track(session_id, job)
+            self._remember(job)
+
+            cached = self.cache.get(prompt)
+            if cached is not None:
+                self.cache.move_to_end(prompt)
+                self.counters['cache_hits'] += 1
+                job.result = cached
+                self._finish(job, DONE)
+                return job
+
+            heapq.heappush(self._heap, (priority, next(self._ids), job))
+            self._live[prompt] = job
+            self._start_workers()
+            self._ready.notify()
+            return job
+
+    def cancel(self, session_id: str):
+        """Supersede a session's scene job without queueing another - its scene came from elsewhere"""
+        with self._lock:
+            previous = self._current.get(session_id)
+            if previous is not None:
+                self._untrack(session_id)
+                self._supersede(previous, session_id)
+
+    def _next_job(self) -> Optional[ImageJob]:
+        with self._lock:
+            while True:
+                while self._heap:
+                    _, _, job = heapq.heappop(self._heap)
+                    if job.state == PENDING:
+                        job.state = RUNNING
+                        self._running += 1
+                        self.counters['dispatched'] += 1
+                        return job
+                if self._closed:
+                    return None
+                self._ready.wait()
+
+    def _work(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                result = self.generate(job.prompt)
+                error = None if result else 'no image returned'
+            except Exception as e:
+                result, error = None, str(e)
+            with self._lock:
+                self._running -= 1
+                if result:
+                    self._cache_put(job.prompt, result)
+                    job.result = result
+                if job.state == SUPERSEDED:
+                    self.counters['wasted_calls'] += 1
+                    self._finish(job, SUPERSEDED)
+                elif result:
+                    self.counters['completed'] += 1
+                    self._finish(job, DONE)
+                else:
+                    self.counters['failed'] += 1
+                    job.error = error
+                    self._finish(job, FAILED)
+
+    def _pending(self) -> int:
+        # A promoted job sits in the heap twice
+        return len({job.id for _, _, job in self._heap if job.state == PENDING})
+
+    def cached(self, prompt: str) -> bool:
+        with self._lock:
+            return prompt in self.cache
+
+    def spare_capacity(self) -> bool:
+        """Whether a worker is idle with nothing queued - room for speculative work"""
+        with self._lock:
+            pending = self._pending()
+            return pending == 0 and self._running < self.max_workers
+
+    def get(self, job_id: str) -> Optional[ImageJob]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[ImageJob]:
+        """The job once it has finished (or the timeout passed)"""
+        job = self.get(job_id)
+        if job is not None:
+            job.done_event.wait(timeout)
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = self._pending()
+            stats = dict(self.counters, pending=pending, running=self._running, cached=len(self.cache))
+        dispatched = stats['dispatched']
+        stats['wasted_rate'] = round(stats['wasted_calls'] / dispatched, 3) if dispatched else 0.0
+        return stats
+
+    def close(self):
+        """Cancel queued jobs and let the workers exit after their current call"""
+        with self._lock:
+            self._closed = True
+            for _, _, job in self._heap:
+                if job.state == PENDING:
+                    self.counters['cancelled'] += 1
+                    self._finish(job, SUPERSEDED)
+            self._heap.clear()
+            self._ready.notify_all()
+        for worker in self._workers:
+            worker.join()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Chat Load Generator for the Vibe Game server
+Simulated players replay multi-turn sessions against /api/chat and /api/chat/stream
+concurrently, and the run is summarised as JSON: throughput, latency percentiles,
+time to first byte, error and fallback rates. Works fully offline against --mock
+"""
+
+import argparse
+import http.client
+import json
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+CHAT_PATH = '/api/chat'
+STREAM_PATH = '/api/chat/stream'
+MODES = ('chat', 'stream', 'mixed')
+
+DEFAULT_PLAYERS = 8
+DEFAULT_TURNS = 5
+DEFAULT_TIMEOUT = 30.0
+SPAWN_TIMEOUT = 15.0
+
+# Marker the server appends when LiteLLM failed and a mock reply stood in
+FALLBACK_NOTE = 'Using fallback response'
+
+# Player sessions to replay; each simulated player takes one and cycles it for as many turns as asked
+SESSIONS = (
+    ("I look around", "I walk toward the Globe Nexus Station", "I talk to Prospero",
+     "I examine the runes on the wall", "I attack the memory ghosts"),
+    ("I enter the Arden Digital Forest", "I follow the digital deer", "I search the clearing for treasure",
+     "I cast a spell on the data wolves", "I go north"),
+    ("I approach the Elsinore Data Fortress", "I ask Hamlet about his father", "I pick up Yorick's Memory Skull",
+     "I run for the gate", "I hide behind the stone pillars"),
+    ("I open the Tempest in a Bottle", "I shout into the storm", "I move toward the light",
+     "I speak to the Weird Sisters", "I take the Comedy Circuit Crown"),
+)
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/max/mean in milliseconds (nearest rank)"""
+    if not values:
+        return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0, 'mean': 0.0}
+    ordered = sorted(values)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, max(0, int(-(-p * len(ordered) // 100)) - 1))]
+
+    return {'p50': round(rank(50) * 1000, 2), 'p95': round(rank(95) * 1000, 2), 'p99': round(rank(99) * 1000, 2),
+            'max': round(ordered[-1] * 1000, 2), 'mean': round(sum(ordered) / len(ordered) * 1000, 2)}
+
+
+def _chat_turn(connection: http.client.HTTPConnection, messages: List[Dict[str, str]],
+               session_id: str) -> Dict[str, Any]:
+    body = json.dumps({'messages': messages, 'session_id': session_id})
+    start = time.perf_counter()
+    connection.request('POST', CHAT_PATH, body=body, headers={'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    ttfb = time.perf_counter() - start
+    raw = response.read()
+    result = {'endpoint': 'chat', 'status': response.status, 'ttfb': ttfb, 'latency': time.perf_counter() - start}
+    if response.status != 200:
+        result['error'] = f'http_{response.status}'
+        return result
+    try:
+        data = json.loads(raw)
+        reply = data['choices'][0]['message']['content']
+    except (ValueError, KeyError, IndexError, TypeError):
+        result['error'] = 'server_error' if b'"error"' in raw else 'bad_response'
+        return result
+    result['reply'] = reply
+    result['fallback'] = FALLBACK_NOTE in reply or 'error' in data
+    result['image'] = 'image' in data
+    return result
+
+
+def _stream_turn(connection: http.client.HTTPConnection, messages: List[Dict[str, str]],
+                 session_id: str) -> Dict[str, Any]:
+    body = json.dumps({'messages': messages, 'session_id': session_id})
+    start = time.perf_counter()
+    connection.request('POST', STREAM_PATH, body=body, headers={'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    ttfb = time.perf_counter() - start
+    result = {'endpoint': 'stream', 'status': response.status, 'ttfb': ttfb}
+    if response.status != 200:
+        response.read()
+        result.update(latency=time.perf_counter() - start, error=f'http_{response.status}')
+        return result
+
+    parts = []
+    fallback = False
+    done = False
+    for line in response:
+        line = line.strip()
+        if not line.startswith(b'data: '):
+            continue
+        payload = line[len(b'data: '):]
+        if payload == b'[DONE]':
+            done = True
+            break
+        if 'first_event' not in result:
+            result['first_event'] = time.perf_counter() - start
+        try:
+            chunk = json.loads(payload)
+        except ValueError:
+            result['error'] = 'bad_response'
+            break
+        if 'error' in chunk:
+            result['error'] = 'stream_error'
+        fallback = fallback or bool(chunk.get('fallback'))
+        parts.append(chunk.get('content', ''))
+    response.read()
+    result['latency'] = time.perf_counter() - start
+    if not done and 'error' not in result:
+        result['error'] = 'truncated_stream'
+    result['reply'] = ''.join(parts)
+    result['fallback'] = fallback
+    return result
+
+
+def _play(base_url: str, player: int, turns: int, mode: str, think_time: float, timeout: float,
+          start_gate: threading.Barrier, results: List[Dict[str, Any]]):
+    """One simulated player: a multi-turn session whose history grows with every reply"""
+    url = urlparse(base_url)
+    script = SESSIONS[player % len(SESSIONS)]
+    session_id = f'load-{player}'
+    messages: List[Dict[str, str]] = []
+    start_gate.wait()
+    for turn in range(turns):
+        use_stream = mode == 'stream' or (mode == 'mixed' and (player + turn) % 2 == 1)
+        messages.append({'role': 'user', 'content': script[turn % len(script)]})
+        # The server answers HTTP/1.0 style and closes, so each turn opens its own connection
+        connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=timeout)
+        try:
+            result = (_stream_turn if use_stream else _chat_turn)(connection, messages, session_id)
+        except (OSError, http.client.HTTPException) as e:
+            result = {'endpoint': 'stream' if use_stream else 'chat', 'error': 'connection', 'detail': str(e)}
+        finally:
+            connection.close()
+        result.update(player=player, turn=turn)
+        results.append(result)
+        messages.append({'role': 'assistant', 'content': result.pop('reply', '')})
+        if think_time:
+            time.sleep(think_time)
+
+
+def summarize(results: List[Dict[str, Any]], seconds: float) -> Dict[str, Any]:
+    """Aggregate per-request results into the report"""
+    def block(rows):
+        errors: Dict[str, int] = {}
+        for row in rows:
+            if 'error' in row:
+                errors[row['error']] = errors.get(row['error'], 0) + 1
+        completed = [row for row in rows if 'latency' in row]
+        count = len(rows)
+        summary = {
+            'requests': count,
+            'rps': round(count / seconds, 2) if seconds else 0.0,
+            'latency_ms': percentiles([row['latency'] for row in completed]),
+            'ttfb_ms': percentiles([row['ttfb'] for row in completed]),
+            'error_rate': round(sum(errors.values()) / count, 4) if count else 0.0,
+            'fallback_rate': round(sum(1 for row in rows if row.get('fallback')) / count, 4) if count else 0.0,
+            'errors': errors,
+        }
+        first_events = [row['first_event'] for row in rows if 'first_event' in row]
+        if first_events:
+            summary['first_event_ms'] = percentiles(first_events)
+        return summary
+
+    report = {'seconds': round(seconds, 3), **block(results)}
+    report['by_endpoint'] = {endpoint: block([row for row in results if row['endpoint'] == endpoint])
+                             for endpoint in sorted({row['endpoint'] for row in results})}
+    return report
+
+
+def run_load_test(base_url: str, players: int = DEFAULT_PLAYERS, turns: int = DEFAULT_TURNS, mode: str = 'chat',
+                  think_time: float = 0.0, timeout: float = DEFAULT_TIMEOUT) -> Dict[str, Any]:
+    """Drive the server with concurrent players and return the JSON report"""
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {', '.join(MODES)}")
+    results: List[Dict[str, Any]] = []
+    start_gate = threading.Barrier(players + 1)
+    threads = [threading.Thread(target=_play, args=(base_url, player, turns, mode, think_time, timeout,
+                                                    start_gate, results), daemon=True)
+               for player in range(players)]
+    for thread in threads:
+        thread.start()
+    start_gate.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    report = summarize(results, time.perf_counter() - start)
+    return {'target': base_url, 'mode': mode, 'players': players, 'turns': turns, 'think_time': think_time,
+            **report}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+
+def spawn_mock_server(campaign: Optional[str] = None, extra_args: Optional[List[str]] = None):
+    """Start backend/server.py --mock on a free port; returns (process, base_url) once /health answers"""
+    port = _free_port()
+    command = [sys.executable, str(Path(__file__).parent / 'server.py'), '--mock', '--port', str(port)]
+    if campaign:
+        command += ['--campaign', campaign]
+    command += extra_args or []
+    process = subprocess.Popen(command, cwd=Path(__file__).parent.parent, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+    base_url = f'http://localhost:{port}'
+    deadline = time.monotonic() + SPAWN_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'server exited with code {process.returncode}')
+        try:
+            with urllib.request.urlopen(f'{base_url}/health', timeout=1):
+                return process, base_url
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError(f'server did not answer /health within {SPAWN_TIMEOUT:.0f}s')
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Load-test the Vibe Game chat endpoints')
+    parser.add_argument('--url', default='http://localhost:8000', help='Server to test (ignored with --spawn)')
+    parser.add_argument('--spawn', action='store_true', help='Start a --mock server on a free port for the run')
+    parser.add_argument('--campaign', help='Campaign for the spawned server')
+    parser.add_argument('--workers', type=int, help='--workers for the spawned server')
+    parser.add_argument('-p', '--players', type=int, default=DEFAULT_PLAYERS, help='Concurrent simulated players')
+    parser.add_argument('-t', '--turns', type=int, default=DEFAULT_TURNS, help='Turns each player sends')
+    parser.add_argument('--mode', choices=MODES, default='chat',
+                        help='Endpoint to drive: /api/chat, /api/chat/stream, or alternate between them')
+    parser.add_argument('--think-time', type=float, default=0.0, help='Seconds a player waits between turns')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='Per-request timeout in seconds')
+    parser.add_argument('-o', '--output', help='Also write the report to this file')
+    args = parser.parse_args(argv)
+
+    process = None
+    base_url = args.url
+    if args.spawn:
+        extra = ['--workers', str(args.workers)] if args.workers else []
+        try:
+            process, base_url = spawn_mock_server(args.campaign, extra)
+        except RuntimeError as e:
+            print(f"❌ Could not start the mock server: {e}", file=sys.stderr)
+            return 1
+    try:
+        report = run_load_test(base_url, args.players, args.turns, args.mode, args.think_time, args.timeout)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    return 1 if report['error_rate'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Scene Images - campaign artwork for chat turns before any DALL-E call
+Picks the curated image of the location, character or item a turn is about,
+so image generation is only paid for scenes the world doesn't already depict
+"""
+
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from world_assets import AssetCatalog
+from world_loader import WorldContentLoader, EntityRecognizer
+
+# Which entities set the scene, best first, and the files roles that picture each one
+SCENE_ROLES = (
+    ('locations', ('image', 'map')),
+    ('characters', ('portrait',)),
+    ('items', ('image',)),
+)
+
+PROMPT_STYLE = "digital art style, detailed illustration, cinematic lighting, high quality"
+
+
+def scene_prompt(subject: str) -> str:
+    """DALL-E prompt for a scene built around one subject"""
+    return f"Fantasy RPG scene: {subject}, {PROMPT_STYLE}"
+
+
+class SceneImageResolver:
+    """Maps a chat turn to an existing campaign image via the loader's entity recognizer"""
+
+    def __init__(self, loader: WorldContentLoader, catalog: Optional[AssetCatalog] = None):
+        self.loader = loader
+        self.catalog = catalog or AssetCatalog(loader.world_path)
+        self.world_hits = 0
+        self.misses = 0
+        self._creatures: Optional[Tuple[EntityRecognizer, Dict[str, str]]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def creatures(self) -> Tuple[EntityRecognizer, Dict[str, str]]:
+        """Recognizer over the creatures listed in *_inhabitants.json, and each creature's first home"""
+        creatures = self._creatures
+        if creatures is None:
+            aliases, homes = {}, {}
+            for location_id in sorted(self.loader.list_entity_ids('locations')):
+                content = self.loader.load_content('locations', location_id)
+                inhabitants = content.get('inhabitants_data') if content else None
+                for label in (inhabitants or {}).get('creatures') or []:
+                    if isinstance(label, str) and label not in homes:
+                        homes[label] = location_id
+                        aliases.setdefault(label.replace('_', ' ').lower(), ('creatures', label))
+            creatures = self._creatures = (EntityRecognizer(aliases), homes)
+        return creatures
+
+    def invalidate(self, *_):
+        """WorldCache listener - inhabitants may have changed"""
+        self._creatures = None
+
+    def mentions(self, game_text: str, user_action: str = "") -> List[Tuple[str, str]]:
+        """(entity_type, entity_id) named by the player's action, then by the response"""
+        found = self.loader.recognizer.find(user_action)
+        for entity in self.loader.recognizer.find(game_text):
+            if entity not in found:
+                found.append(entity)
+        return found
+
+    def scene_entity(self, mentioned: List[Tuple[str, str]]) -> Optional[Tuple[str, str]]:
+        """The mentioned entity that sets the scene: a location, else a character, else an item"""
+        for scene_type, _ in SCENE_ROLES:
+            for entity in mentioned:
+                if entity[0] == scene_type:
+                    return entity
+        return None
+
+    def artwork(self, entity_type: str, entity_id: str) -> Optional[Dict[str, Any]]:
+        """Image data for an entity's own artwork, if it has any on disk"""
+        roles = dict(SCENE_ROLES).get(entity_type, ())
+        return self._image_for(entity_type, entity_id, roles)
+
+    def entity_prompt(self, entity_type: str, entity_id: str) -> Optional[str]:
+        model = self.loader.load_model(entity_type, entity_id)
+        return scene_prompt(model.name) if model else None
+
+    def creature_prompt(self, label: str) -> str:
+        """Prompt for a creature, set in the location it inhabits"""
+        subject = label.replace('_', ' ')
+        home = self.creatures[1].get(label)
+        model = self.loader.load_model('locations', home) if home else None
+        return scene_prompt(f"{subject} in {model.name}" if model else subject)
+
+    def subject(self, game_text: str, user_action: str = "") -> Optional[Tuple[str, str]]:
+        """The known subject of a turn - a scene entity, else an inhabiting creature - or None"""
+        entity = self.scene_entity(self.mentions(game_text, user_action))
+        if entity:
+            return entity
+        recognizer = self.creatures[0]
+        for text in (user_action, game_text):
+            found = recognizer.find(text)
+            if found:
+                return found[0]
+        return None
+
+    def subject_prompt(self, game_text: str, user_action: str = "") -> Optional[str]:
+        """A stable prompt for a turn about something the world knows but has no artwork for
+
+        Stable prompts let a prefetched or earlier image be found in the cache.
+        """
+        subject = self.subject(game_text, user_action)
+        if subject is None:
+            return None
+        if subject[0] == 'creatures':
+            return self.creature_prompt(subject[1])
+        return self.entity_prompt(*subject)
+
+    def _image_for(self, entity_type: str, entity_id: str, roles) -> Optional[Dict[str, Any]]:
+        model = self.loader.load_model(entity_type, entity_id)
+        if model is None:
+            return None
+        for role in roles:
+            filename = model.file(role)
+            url = filename and self.catalog.url(self.loader.campaign, f"{entity_type}/{filename}")
+            if url:
+                return {
+                    'url': url,
+                    'prompt': model.name,
+                    'revised_prompt': model.name,
+                    'source': 'world',
+                    'entity': {'type': entity_type, 'id': entity_id, 'name': model.name, 'role': role},
+                }
+        return None
+
+    def resolve(self, game_text: str, user_action: str = "") -> Optional[Dict[str, Any]]:
+        """Image data for the turn's scene from campaign assets, or None when the scene is novel"""
+        mentioned = self.mentions(game_text, user_action)
+        for scene_type, roles in SCENE_ROLES:
+            for entity_type, entity_id in mentioned:
+                if entity_type != scene_type:
+                    continue
+                image = self._image_for(entity_type, entity_id, roles)
+                if image:
+                    with self._lock:
+                        self.world_hits += 1
+                    return image
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.world_hits + self.misses
+            return {'world_hits': self.world_hits, 'generated': self.misses,
+                    'hit_rate': round(self.world_hits / total, 3) if total else 0.0}
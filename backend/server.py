@@ -7,13 +7,27 @@ Supports both real LLM calls and mocking for testing
 import os
 import json
 import asyncio
-import re
 from typing import Dict, List, Any, Optional
 from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import urlparse, parse_qs, unquote
 import threading
 import time
 
+from world_loader import WorldContentLoader, DEFAULT_TEXT_BUDGET
+from world_pack import load_campaign
+from world_store import WorldStore, StoreSource
+from context_packer import ContextPacker, DEFAULT_BUDGET
+from token_counter import TokenCounter
+from world_cache import WorldCache
+from world_graph import LiveWorldGraph
+from world_index import EntityIndex, DEFAULT_PAGE_SIZE
+from prefork import PreforkServer, HAS_FORK, private_memory_kb
+from world_assets import AssetCatalog
+from scene_images import SceneImageResolver, scene_prompt
+from visual_lexicon import VisualLexicon
+from image_queue import ImageJobQueue, DONE
+from image_prefetch import ScenePrefetcher, DEFAULT_PREFETCH_BUDGET
+
 try:
     import litellm
     HAS_LITELLM = True
@@ -29,11 +43,21 @@ except ImportError:
     print("Warning: openai not installed. Install with: pip install openai")
 
 
+# Built-in fantasy vocabulary, used when no campaign lexicon is loaded
+DEFAULT_LEXICON = VisualLexicon.default()
+
+
 class DalleImageGenerator:
     """Handles DALL-E 3 image generation for game scenarios"""
     
-    def __init__(self, mock_mode: bool = False):
+    def __init__(self, mock_mode: bool = False, scene_images: Optional[SceneImageResolver] = None,
+                 lexicon: Optional[VisualLexicon] = None, image_queue: Optional[ImageJobQueue] = None):
         self.mock_mode = mock_mode
+        self.scene_images = scene_images
+        self.lexicon = lexicon or DEFAULT_LEXICON
+        self.image_queue = image_queue
+        # (game_text, user_action) of the last image request, for the prefetcher
+        self.last_scene: Optional[tuple] = None
         self.openai_api_key = os.getenv('OPENAI_API_KEY')
         
         if not self.mock_mode and self.openai_api_key:
@@ -46,59 +70,19 @@ class DalleImageGenerator:
             self.client = None
     
     def extract_visual_elements(self, text: str) -> List[str]:
-        """Extract visual elements from game text for image generation"""
-        # Common fantasy/RPG visual elements
-        visual_keywords = [
-            r'dark forest|mystical forest|enchanted forest|forest',
-            r'dragon|dragons',
-            r'castle|fortress|tower',
-            r'dungeon|cave|cavern',
-            r'ancient ruins|ruins|temple',
-            r'magical sword|sword|weapon',
-            r'glowing|magical glow|mystical light',
-            r'stone walls|stone pillars|pillars',
-            r'torch|torchlight|firelight',
-            r'runes|mysterious symbols|carvings',
-            r'starry sky|night sky|stars',
-            r'crystal|crystalline|gems',
-            r'portal|magical portal',
-            r'wizard|sage|mage',
-            r'creature|monster|beast',
-            r'treasure|gold|jewels',
-            r'mountain|cliff|valley',
-            r'river|stream|waterfall',
-            r'bridge|path|trail'
-        ]
-        
-        elements = []
-        text_lower = text.lower()
-        
-        for pattern in visual_keywords:
-            matches = re.findall(pattern, text_lower)
-            elements.extend(matches)
-        
-        # Remove duplicates and return unique elements
-        return list(set(elements))
+        """Extract visual elements from game text for image generation, most prominent first"""
+        return self.lexicon.extract(text)
     
     def build_dalle_prompt(self, game_text: str, user_action: str = "") -> str:
         """Build a DALL-E prompt from game context"""
         visual_elements = self.extract_visual_elements(game_text + " " + user_action)
         
-        # Base prompt structure
-        prompt = "Fantasy RPG scene: "
-        
         if visual_elements:
             # Use the most relevant visual elements
             main_elements = visual_elements[:3]  # Limit to avoid overly complex prompts
-            prompt += ", ".join(main_elements)
-        else:
-            # Fallback to general adventure scene
-            prompt += "an epic fantasy adventure scene"
-        
-        # Add style specifications
-        prompt += ", digital art style, detailed illustration, cinematic lighting, high quality"
-        
-        return prompt
+            return scene_prompt(", ".join(main_elements))
+        # Fallback to general adventure scene
+        return scene_prompt("an epic fantasy adventure scene")
     
     def generate_mock_image(self, prompt: str) -> Dict[str, Any]:
         """Generate a mock image response for testing"""
@@ -120,32 +104,58 @@ class DalleImageGenerator:
             "revised_prompt": prompt  # In mock mode, we don't revise the prompt
         }
     
-    def generate_image(self, game_text: str, user_action: str = "") -> Optional[Dict[str, Any]]:
-        """Generate an image based on game context"""
+    def request_image(self, prompt: str) -> Optional[Dict[str, Any]]:
+        """One DALL-E 3 call for a prompt"""
+        response = self.client.images.generate(
+            model="dall-e-3",
+            prompt=prompt,
+            size="1024x1024",
+            quality="standard",
+            n=1
+        )
+        
+        if response.data:
+            image_data = response.data[0]
+            return {
+                "url": image_data.url,
+                "prompt": prompt,
+                "revised_prompt": image_data.revised_prompt
+            }
+        
+        return None
+    
+    def generate_image(self, game_text: str, user_action: str = "",
+                       session_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Generate an image based on game context - campaign artwork first, DALL-E only for novel scenes
+
+        With an image queue, the DALL-E call runs in the background and a pending
+        job is returned for the client to poll; a session id lets the player's
+        next turn supersede it.
+        """
+        self.last_scene = (game_text, user_action)
+        if self.scene_images:
+            world_image = self.scene_images.resolve(game_text, user_action)
+            if world_image:
+                if self.image_queue and session_id:
+                    # The player has moved on to a known scene - drop any image still on its way
+                    self.image_queue.cancel(session_id)
+                return world_image
         try:
-            prompt = self.build_dalle_prompt(game_text, user_action)
+            # Known subjects without artwork get a stable prompt, so earlier or prefetched images are reused
+            prompt = ((self.scene_images and self.scene_images.subject_prompt(game_text, user_action))
+                      or self.build_dalle_prompt(game_text, user_action))
             
             if self.mock_mode or not self.client:
                 return self.generate_mock_image(prompt)
             
-            # Real DALL-E API call
-            response = self.client.images.generate(
-                model="dall-e-3",
-                prompt=prompt,
-                size="1024x1024",
-                quality="standard",
-                n=1
-            )
+            if self.image_queue:
+                job = self.image_queue.submit(session_id, prompt)
+                if job.state == DONE:
+                    return job.result
+                return {"url": None, "prompt": prompt, "revised_prompt": None, "status": job.state,
+                        "job": job.id, "poll": f"/api/images/{job.id}"}
             
-            if response.data:
-                image_data = response.data[0]
-                return {
-                    "url": image_data.url,
-                    "prompt": prompt,
-                    "revised_prompt": image_data.revised_prompt
-                }
-            
-            return None
+            return self.request_image(prompt)
             
         except Exception as e:
             print(f"Image generation error: {e}")
@@ -199,9 +209,17 @@ class GameMockResponses:
 class VibeGameHandler(BaseHTTPRequestHandler):
     """HTTP request handler for our game server"""
     
-    def __init__(self, *args, mock_mode=False, **kwargs):
+    def __init__(self, *args, mock_mode=False, context_packer=None, world_index=None, asset_catalog=None,
+                 scene_images=None, visual_lexicon=None, image_queue=None, prefetcher=None, **kwargs):
         self.mock_mode = mock_mode
-        self.image_generator = DalleImageGenerator(mock_mode=mock_mode)
+        self.context_packer = context_packer
+        self.world_index = world_index
+        self.asset_catalog = asset_catalog
+        self.scene_images = scene_images
+        self.image_queue = image_queue
+        self.prefetcher = prefetcher
+        self.image_generator = DalleImageGenerator(mock_mode=mock_mode, scene_images=scene_images,
+                                                   lexicon=visual_lexicon, image_queue=image_queue)
         super().__init__(*args, **kwargs)
     
     def _set_cors_headers(self):
@@ -218,14 +236,41 @@ class VibeGameHandler(BaseHTTPRequestHandler):
     
     def do_GET(self):
         """Serve static files and game interface"""
-        if self.path == '/' or self.path == '/index.html':
+        url = urlparse(self.path)
+        if url.path == '/api/world/entities':
+            self._handle_entity_query(parse_qs(url.query))
+        elif url.path.startswith('/world/'):
+            self._serve_world_asset(url)
+        elif url.path.startswith('/api/images/'):
+            self._handle_image_poll(url.path[len('/api/images/'):])
+        elif self.path == '/' or self.path == '/index.html':
             self._serve_file('index.html', 'text/html')
         elif self.path == '/style.css':
             self._serve_file('style.css', 'text/css')
         elif self.path == '/script.js':
             self._serve_file('script.js', 'application/javascript')
         elif self.path == '/health':
-            self._serve_json({'status': 'healthy', 'mock_mode': self.mock_mode})
+            health = {'status': 'healthy', 'mock_mode': self.mock_mode}
+            if self.context_packer:
+                health['world'] = {'campaign': self.context_packer.loader.campaign, **self.context_packer.stats()}
+            if self.world_index:
+                health.setdefault('world', {})['index'] = self.world_index.stats()
+            if self.scene_images:
+                health.setdefault('world', {})['images'] = self.scene_images.stats()
+            if self.image_queue:
+                health['image_queue'] = self.image_queue.stats()
+            if self.prefetcher:
+                health['prefetch'] = self.prefetcher.stats()
+            health['worker'] = {'pid': os.getpid(), 'private_kb': private_memory_kb()}
+            self._serve_json(health)
+        else:
+            self.send_error(404, 'File not found')
+    
+    def do_HEAD(self):
+        """Headers only - for world assets"""
+        url = urlparse(self.path)
+        if url.path.startswith('/world/'):
+            self._serve_world_asset(url, head=True)
         else:
             self.send_error(404, 'File not found')
     
@@ -233,6 +278,8 @@ class VibeGameHandler(BaseHTTPRequestHandler):
         """Handle API requests"""
         if self.path == '/api/chat':
             self._handle_chat_request()
+        elif self.path == '/api/chat/stream':
+            self._handle_chat_stream()
         else:
             self.send_error(404, 'API endpoint not found')
     
@@ -253,6 +300,62 @@ class VibeGameHandler(BaseHTTPRequestHandler):
         except Exception as e:
             self.send_error(500, f'Error serving file: {str(e)}')
     
+    def _serve_world_asset(self, url, head: bool = False):
+        """Serve /world/<campaign>/<path> images, picking a derivative by Accept and ?w=, straight from disk"""
+        campaign, _, relpath = unquote(url.path[len('/world/'):]).partition('/')
+        if not self.asset_catalog or not relpath:
+            self.send_error(404, 'File not found')
+            return
+        params = parse_qs(url.query)
+        try:
+            width = int(params['w'][0]) if 'w' in params else None
+        except ValueError:
+            self.send_error(400, 'w must be an integer')
+            return
+        asset = self.asset_catalog.respond(campaign, relpath, self.headers, params.get('v', [None])[0], width)
+        if asset.status == 404:
+            self.send_error(404, 'File not found')
+            return
+        self.send_response(asset.status)
+        for name, value in asset.headers.items():
+            self.send_header(name, value)
+        if asset.status == 416:
+            self.send_header('Content-Length', '0')
+        self._set_cors_headers()
+        self.end_headers()
+        if head or asset.path is None:
+            return
+        with open(asset.path, 'rb') as f:
+            try:
+                self.connection.sendfile(f, asset.offset, asset.length)
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
+    
+    def _handle_image_poll(self, job_id: str):
+        """Status of a queued scene image, with the image once it is ready"""
+        job = self.image_queue.get(job_id) if self.image_queue else None
+        if job is None:
+            self.send_error(404, 'Unknown image job')
+            return
+        self._serve_json(job.to_dict())
+    
+    def _handle_entity_query(self, params: Dict[str, List[str]]):
+        """Filter world entities by type, tags (all must match), status and priority, a page at a time"""
+        if not self.world_index:
+            self.send_error(404, 'No campaign loaded')
+            return
+        def first(name):
+            return params.get(name, [None])[0]
+        tags = [tag for value in params.get('tags', []) for tag in value.split(',') if tag.strip()]
+        try:
+            offset = int(first('offset') or 0)
+            limit = int(first('limit') or DEFAULT_PAGE_SIZE)
+        except ValueError:
+            self.send_error(400, 'offset and limit must be integers')
+            return
+        self._serve_json(self.world_index.query(first('type'), [tag.strip() for tag in tags], first('status'),
+                                                first('priority'), offset, limit))
+    
     def _serve_json(self, data: Dict[str, Any]):
         """Send JSON response"""
         json_data = json.dumps(data)
@@ -262,6 +365,23 @@ class VibeGameHandler(BaseHTTPRequestHandler):
         self.end_headers()
         self.wfile.write(json_data.encode('utf-8'))
     
+    def _with_world_context(self, messages: List[Dict[str, Any]], user_message: str,
+                            budget: int) -> List[Dict[str, Any]]:
+        """Add packed campaign lore to the system prompt when a campaign is loaded"""
+        if not self.context_packer:
+            return messages
+        
+        history = [msg for msg in messages if msg.get('role') != 'system']
+        world_context = self.context_packer.build_context(user_message, history, budget).render()
+        if not world_context:
+            return messages
+        
+        if messages and messages[0].get('role') == 'system':
+            system = dict(messages[0])
+            system['content'] = f"{system.get('content', '')}\n{world_context}"
+            return [system] + messages[1:]
+        return [{'role': 'system', 'content': world_context}] + messages
+    
     def _handle_chat_request(self):
         """Handle chat API requests - the heart of our dungeon master"""
         try:
@@ -271,6 +391,10 @@ class VibeGameHandler(BaseHTTPRequestHandler):
             
             messages = request_data.get('messages', [])
             model = request_data.get('model', 'gpt-3.5-turbo')
+            # Newer turns from the same player supersede their older pending images. Only an explicit
+            # session counts: players sharing an address would otherwise cancel each other's scenes
+            session_id = request_data.get('session_id') or self.headers.get('X-Session-Id')
+            session_id = str(session_id) if session_id else None
             
             if not messages:
                 self._serve_json({'error': 'No messages provided'})
@@ -288,7 +412,7 @@ class VibeGameHandler(BaseHTTPRequestHandler):
                 response_content = GameMockResponses.get_contextual_response(user_message)
                 
                 # Generate image based on the response
-                image_data = self.image_generator.generate_image(response_content, user_message)
+                image_data = self.image_generator.generate_image(response_content, user_message, session_id)
                 
                 response = {
                     'choices': [{
@@ -307,6 +431,9 @@ class VibeGameHandler(BaseHTTPRequestHandler):
             else:
                 # Use real LiteLLM call
                 try:
+                    messages = self._with_world_context(
+                        messages, user_message, request_data.get('context_budget', DEFAULT_BUDGET)
+                    )
                     response = litellm.completion(
                         model=model,
                         messages=messages,
@@ -322,7 +449,7 @@ class VibeGameHandler(BaseHTTPRequestHandler):
                     # Generate image based on the LLM response
                     if 'choices' in response and len(response['choices']) > 0:
                         ai_response = response['choices'][0]['message']['content']
-                        image_data = self.image_generator.generate_image(ai_response, user_message)
+                        image_data = self.image_generator.generate_image(ai_response, user_message, session_id)
                         
                         if image_data:
                             response['image'] = image_data
@@ -333,7 +460,7 @@ class VibeGameHandler(BaseHTTPRequestHandler):
                     response_content = GameMockResponses.get_contextual_response(user_message)
                     
                     # Generate image for fallback response too
-                    image_data = self.image_generator.generate_image(response_content, user_message)
+                    image_data = self.image_generator.generate_image(response_content, user_message, session_id)
                     
                     response = {
                         'choices': [{
@@ -349,6 +476,9 @@ class VibeGameHandler(BaseHTTPRequestHandler):
                         response['image'] = image_data
             
             self._serve_json(response)
+            if self.prefetcher and self.image_generator.last_scene:
+                # Warmed on the prefetch thread, so neither this turn nor the next request waits on it
+                self.prefetcher.observe_later(*self.image_generator.last_scene)
             
         except json.JSONDecodeError:
             self._serve_json({'error': 'Invalid JSON in request'})
@@ -356,22 +486,160 @@ class VibeGameHandler(BaseHTTPRequestHandler):
             print(f"Chat request error: {e}")
             self._serve_json({'error': f'Server error: {str(e)}'})
     
+    def _handle_chat_stream(self):
+        """Stream the DM's reply as server-sent events, in the same format as the chat-stream function"""
+        try:
+            content_length = int(self.headers['Content-Length'])
+            request_data = json.loads(self.rfile.read(content_length).decode('utf-8'))
+        except (TypeError, ValueError):
+            self.send_error(400, 'Invalid JSON in request')
+            return
+        messages = request_data.get('messages', [])
+        if not messages:
+            self.send_error(400, 'No messages provided')
+            return
+        user_message = next((msg.get('content', '') for msg in reversed(messages) if msg.get('role') == 'user'), '')
+        
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self._set_cors_headers()
+        self.end_headers()
+        try:
+            for chunk in self._stream_reply(messages, user_message, request_data):
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+    
+    def _stream_reply(self, messages: List[Dict[str, Any]], user_message: str, request_data: Dict[str, Any]):
+        """Yield {'content': ...} chunks from LiteLLM, or the mock reply word by word"""
+        fallback = False
+        if not self.mock_mode and HAS_LITELLM:
+            sent = False
+            try:
+                stream = litellm.completion(
+                    model=request_data.get('model', 'gpt-3.5-turbo'),
+                    messages=self._with_world_context(
+                        messages, user_message, request_data.get('context_budget', DEFAULT_BUDGET)
+                    ),
+                    max_tokens=request_data.get('max_tokens', 200),
+                    temperature=request_data.get('temperature', 0.8),
+                    stream=True
+                )
+                for part in stream:
+                    content = part.choices[0].delta.content
+                    if content:
+                        sent = True
+                        yield {'content': content}
+                return
+            except Exception as e:
+                print(f"LiteLLM streaming error: {e}")
+                if sent:
+                    yield {'error': str(e)}
+                    return
+                fallback = True
+        
+        words = GameMockResponses.get_contextual_response(user_message).split(' ')
+        for i, word in enumerate(words):
+            chunk = {'content': word + (' ' if i < len(words) - 1 else '')}
+            if fallback:
+                chunk['fallback'] = True
+            yield chunk
+    
     def log_message(self, format, *args):
         """Custom logging"""
         timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
         print(f"[{timestamp}] {format % args}")
 
 
-def create_handler_with_mock(mock_mode: bool):
+def create_handler_with_mock(mock_mode: bool, context_packer: Optional[ContextPacker] = None,
+                             world_index: Optional[EntityIndex] = None,
+                             asset_catalog: Optional[AssetCatalog] = None,
+                             scene_images: Optional[SceneImageResolver] = None,
+                             visual_lexicon: Optional[VisualLexicon] = None,
+                             image_queue: Optional[ImageJobQueue] = None,
+                             prefetcher: Optional[ScenePrefetcher] = None):
     """Factory function to create handler with mock mode setting"""
+    asset_catalog = asset_catalog or AssetCatalog()
     def handler(*args, **kwargs):
-        return VibeGameHandler(*args, mock_mode=mock_mode, **kwargs)
+        return VibeGameHandler(*args, mock_mode=mock_mode, context_packer=context_packer, world_index=world_index,
+                               asset_catalog=asset_catalog, scene_images=scene_images,
+                               visual_lexicon=visual_lexicon, image_queue=image_queue, prefetcher=prefetcher,
+                               **kwargs)
     return handler
 
 
-def run_server(port: int = 8000, mock_mode: bool = False):
+def run_server(port: int = 8000, mock_mode: bool = False, campaign: Optional[str] = None,
+               pack_path: Optional[str] = None, store_path: Optional[str] = None, watch: bool = False,
+               text_budget: int = DEFAULT_TEXT_BUDGET, workers: int = 1,
+               prefetch_budget: int = DEFAULT_PREFETCH_BUDGET):
     """Run the game server - our command center"""
-    handler_class = create_handler_with_mock(mock_mode)
+    if workers > 1 and not HAS_FORK:
+        print("⚠️ --workers needs os.fork(); serving from a single process")
+        workers = 1
+    if workers > 1 and watch:
+        # Hot reload would only reach one worker
+        print("⚠️ --workers can't be combined with --watch; serving from a single process")
+        workers = 1
+
+    image_queue = None
+    if not mock_mode:
+        dalle = DalleImageGenerator()
+        if dalle.client:
+            # DALL-E runs off the request path; the chat reply carries a job to poll
+            image_queue = ImageJobQueue(dalle.request_image)
+            if workers > 1:
+                # Jobs live in the process that queued them, so a poll could land on a worker that never saw it
+                print("⚠️ --workers can't be combined with the DALL-E image queue; serving from a single process")
+                workers = 1
+    
+    loader = None
+    store = None
+    if campaign and store_path:
+        store = WorldStore(store_path, read_only=True)
+        loader = WorldContentLoader(campaign, source=StoreSource(store, campaign), text_budget=text_budget)
+    elif campaign or pack_path:
+        loader = load_campaign(campaign, pack_path, text_budget=text_budget)
+    
+    context_packer = None
+    world_index = None
+    asset_catalog = AssetCatalog()
+    scene_images = None
+    visual_lexicon = None
+    graph = None
+    prefetcher = None
+    if loader:
+        campaign = loader.campaign
+        token_counter = TokenCounter.for_campaign(loader.campaign_path)
+        graph = LiveWorldGraph(loader)
+        context_packer = ContextPacker(loader, token_counter.count, graph=graph)
+        chunk_count = context_packer.warm()
+        token_counter.save()
+        world_index = EntityIndex.from_loader(loader)
+        scene_images = SceneImageResolver(loader, asset_catalog)
+        visual_lexicon = VisualLexicon.for_campaign(loader.campaign_path)
+        if workers > 1:
+            # Build everything lazy now so forked workers inherit it instead of each rebuilding it
+            loader.recognizer
+            graph.graph
+        print(f"🗺️ Loaded campaign '{campaign}' ({chunk_count} context chunks, tokenizer: {token_counter.name})")
+        
+        if prefetch_budget >= 0:
+            # Artwork is always warmed; the budget only caps DALL-E calls
+            prefetcher = ScenePrefetcher(scene_images, graph, image_queue, prefetch_budget)
+        
+        if watch and not (pack_path or store_path):
+            world_cache = WorldCache(loader, context_packer)
+            world_cache.add_listener(graph.invalidate)
+            world_cache.add_listener(world_index.listener)
+            world_cache.add_listener(scene_images.invalidate)
+            if prefetcher:
+                world_cache.add_listener(prefetcher.invalidate)
+            world_cache.start()
+    
+    handler_class = create_handler_with_mock(mock_mode, context_packer, world_index, asset_catalog, scene_images,
+                                             visual_lexicon, image_queue, prefetcher)
     
     server = HTTPServer(('localhost', port), handler_class)
     
@@ -379,8 +647,20 @@ def run_server(port: int = 8000, mock_mode: bool = False):
     print(f"🎲 Vibe Game Server [{mode}] starting on http://localhost:{port}")
     print(f"   Frontend: http://localhost:{port}")
     print(f"   Health: http://localhost:{port}/health")
+    if world_index:
+        print(f"   Entities: http://localhost:{port}/api/world/entities?type=character&tags=npc")
+        print(f"   Images: http://localhost:{port}/world/{campaign}/characters/<id>_portrait.png")
     print("   Press Ctrl+C to stop")
     
+    if workers > 1:
+        # A SQLite connection must not cross a fork - each worker opens its own read-only one
+        prefork = PreforkServer(server, workers, on_fork=store.reopen if store else None)
+        pids = prefork.start()
+        print(f"   Workers: {len(pids)} forked from pid {os.getpid()}, sharing its loaded world")
+        prefork.supervise()
+        print("\n🛑 Server stopping...")
+        return
+    
     try:
         server.serve_forever()
     except KeyboardInterrupt:
@@ -396,6 +676,16 @@ if __name__ == '__main__':
     parser.add_argument('--port', type=int, default=8000, help='Port to run server on')
     parser.add_argument('--mock', action='store_true', help='Run in mock mode for testing')
     parser.add_argument('--test', action='store_true', help='Run quick test and exit')
+    parser.add_argument('--campaign', help='Campaign under world/campaigns to use as DM context')
+    parser.add_argument('--pack', help='Compiled world pack to load instead of the campaign directory')
+    parser.add_argument('--store', help='SQLite world store to read --campaign from')
+    parser.add_argument('--watch', action='store_true', help='Hot-reload campaign files when they change')
+    parser.add_argument('--text-budget-mb', type=float, default=DEFAULT_TEXT_BUDGET / (1024 * 1024),
+                        help='Memory cap for cached entity markdown, in megabytes')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Forked worker processes sharing one loaded world snapshot')
+    parser.add_argument('--prefetch-budget', type=int, default=DEFAULT_PREFETCH_BUDGET,
+                        help='DALL-E calls image prefetch may spend on the campaign (-1 disables prefetch)')
     
     args = parser.parse_args()
     
@@ -405,4 +695,5 @@ if __name__ == '__main__':
         print(f"Mock response: {mock_response}")
         print("✅ Test complete!")
     else:
-        run_server(args.port, args.mock)
\ No newline at end of file
+        run_server(args.port, args.mock, args.campaign, args.pack, args.store, args.watch,
+                   int(args.text_budget_mb * 1024 * 1024), args.workers, args.prefetch_budget)
\ No newline at end of file
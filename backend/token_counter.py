@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Token Counting Service for world-aware prompts
+Uses the model's tokenizer when available and memoizes counts by content hash
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+try:
+    import tiktoken
+    HAS_TIKTOKEN = True
+except ImportError:
+    HAS_TIKTOKEN = False
+
+# Per-campaign memo of token counts, so a restart doesn't re-tokenize unchanged chunks
+TOKEN_CACHE_FILENAME = 'token_counts.json'
+
+DEFAULT_ENCODING = 'cl100k_base'
+
+_WORD_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+
+def heuristic_token_count(text: str) -> int:
+    """Fallback estimate - short words are one token, long words split every ~4 letters"""
+    count = 0
+    for piece in _WORD_PATTERN.findall(text):
+        count += max(1, math.ceil(len(piece) / 4)) if len(piece) > 6 else 1
+    return count
+
+
+def content_hash(text: str) -> str:
+    """Stable key for a chunk of text"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def load_tokenizer(encoding: str = DEFAULT_ENCODING):
+    """Return (name, count function) for the best tokenizer installed"""
+    if HAS_TIKTOKEN:
+        try:
+            encoder = tiktoken.get_encoding(encoding)
+            return f'tiktoken:{encoding}', lambda text: len(encoder.encode(text, disallowed_special=()))
+        except Exception as e:
+            print(f"Warning: Could not load tiktoken encoding {encoding}: {e}")
+    return 'heuristic', heuristic_token_count
+
+
+class TokenCounter:
+    """Counts tokens with a content-hash memo that can be persisted to disk"""
+
+    def __init__(self, tokenizer: Optional[Callable[[str], int]] = None, name: Optional[str] = None,
+                 cache_path: Optional[Path] = None):
+        if tokenizer is None:
+            name, tokenizer = load_tokenizer()
+        self.name = name or getattr(tokenizer, '__name__', 'custom')
+        self.tokenizer = tokenizer
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.counts: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+        if self.cache_path:
+            self.load()
+
+    @classmethod
+    def for_campaign(cls, campaign_path: Path, **kwargs) -> 'TokenCounter':
+        """Counter persisted in the campaign directory"""
+        return cls(cache_path=Path(campaign_path) / TOKEN_CACHE_FILENAME, **kwargs)
+
+    def count(self, text: str) -> int:
+        """Token count for text, served from the memo when seen before"""
+        key = content_hash(text)
+        cached = self.counts.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        tokens = self.tokenizer(text)
+        with self._lock:
+            self.counts[key] = tokens
+            self.misses += 1
+            self._dirty = True
+        return tokens
+
+    __call__ = count
+
+    def warm(self, texts: Iterable[str]) -> int:
+        """Count every text ahead of time, returning how many were new"""
+        before = self.misses
+        for text in texts:
+            self.count(text)
+        return self.misses - before
+
+    def load(self):
+        """Load persisted counts - ignored if they came from a different tokenizer"""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if data.get('tokenizer') == self.name:
+            self.counts.update(data.get('counts', {}))
+
+    def save(self):
+        """Persist counts atomically if anything new was counted"""
+        if not self.cache_path or not self._dirty:
+            return
+        with self._lock:
+            data = {'tokenizer': self.name, 'counts': dict(sorted(self.counts.items()))}
+            tmp_path = self.cache_path.with_name(self.cache_path.name + '.tmp')
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=0)
+                os.replace(tmp_path, self.cache_path)
+                self._dirty = False
+            except OSError as e:
+                print(f"Warning: Could not save token counts to {self.cache_path}: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        return {'entries': len(self.counts), 'hits': self.hits, 'misses': self.misses}
+
+
+def main():
+    """Precompute token counts for every static chunk of a campaign"""
+    import argparse
+    from world_loader import WorldContentLoader, ENTITY_TYPES
+    from context_packer import ContextPacker
+
+    parser = argparse.ArgumentParser(description='Precompute token counts for a campaign')
+    parser.add_argument('campaign', nargs='?', default='shakespeare_scifi')
+    args = parser.parse_args()
+
+    loader = WorldContentLoader(args.campaign)
+    counter = TokenCounter.for_campaign(loader.campaign_path)
+    packer = ContextPacker(loader, counter.count)
+
+    packer.world_chunks()
+    counter.count(loader.get_world_overview())
+    for entity_type in ENTITY_TYPES:
+        for entity_id in loader.list_entity_ids(entity_type):
+            packer.entity_chunks(entity_type, entity_id)
+            entity = loader.load_entity(entity_type, entity_id)
+            counter.warm(text for text in entity['content'].values() if isinstance(text, str))
+    counter.save()
+
+    print(f"✅ {counter.name}: {counter.stats()} -> {counter.cache_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+World Asset Serving - campaign images over HTTP without copying them through Python
+Resolves /world/<campaign>/<path> to an image or one of its derivatives, and works out
+ETag, Range and caching headers; the handler then hands the file to socket.sendfile()
+"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from world_loader import DEFAULT_WORLD_PATH
+
+# Only images are ever served - never the markdown and JSON next to them (secrets live there)
+ASSET_TYPES = {
+    '.png': 'image/png',
+    '.webp': 'image/webp',
+    '.avif': 'image/avif',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+}
+
+# Derivative formats to offer in place of a PNG, best first, when the client's Accept lists them
+NEGOTIATED_FORMATS = (('avif', 'image/avif'), ('webp', 'image/webp'))
+
+# URLs carrying ?v=<etag> never change content, so clients may keep them for a year untouched
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Unversioned URLs can be cached but must be revalidated (cheap - a 304 on a matching ETag)
+REVALIDATE_CACHE_CONTROL = 'public, max-age=0, must-revalidate'
+
+# File versions whose hashes are remembered; older and rarely asked-for ones are hashed again
+ETAG_CACHE_SIZE = 4096
+
+_DERIVATIVE_NAME = re.compile(r'_(\d+)w\.(\w+)$')
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class AssetResponse:
+    """What to send for one asset request: status, headers and (path, offset, length) of the body"""
+
+    __slots__ = ('status', 'headers', 'path', 'offset', 'length')
+
+    def __init__(self, status: int, headers: Dict[str, str], path: Optional[Path] = None,
+                 offset: int = 0, length: int = 0):
+        self.status = status
+        self.headers = headers
+        self.path = path
+        self.offset = offset
+        self.length = length
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """(offset, length) for a single-range Range header; None to send the whole file
+
+    Raises ValueError when the range can't be satisfied. Multi-range requests
+    are answered with the whole file, which HTTP allows.
+    """
+    if not header:
+        return None
+    match = _RANGE.match(header.strip())
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        length = min(int(end), size)
+        if length == 0:
+            raise ValueError(header)
+        return size - length, length
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, end - start + 1
+
+
+def accepted(accept: str, media_type: str) -> bool:
+    """Whether an Accept header explicitly allows a media type (q=0 excluded)"""
+    for part in accept.split(','):
+        fields = [field.strip() for field in part.split(';')]
+        if fields[0] == media_type:
+            return not any(field.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000') for field in fields[1:])
+    return False
+
+
+class AssetCatalog:
+    """Finds campaign images and their derivatives, with content-hash ETags cached per file version"""
+
+    def __init__(self, world_path: Optional[Path] = None, etag_cache_size: int = ETAG_CACHE_SIZE):
+        self.campaigns_path = Path(world_path or DEFAULT_WORLD_PATH) / 'campaigns'
+        self.etag_cache_size = etag_cache_size
+        self._etags: 'OrderedDict[Tuple[str, int, int], str]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, campaign: str, relpath: str) -> Optional[Path]:
+        """The image file a request names, or None if it doesn't exist or isn't servable"""
+        parts = relpath.split('/')
+        if not campaign or campaign.startswith('.') or '/' in campaign or '\\' in campaign:
+            return None
+        if any(part in ('', '.', '..') or part.startswith('.') or '\\' in part for part in parts):
+            return None
+        path = self.campaigns_path / campaign / Path(*parts)
+        if path.suffix.lower() not in ASSET_TYPES or not path.is_file():
+            return None
+        return path
+
+    def variants(self, path: Path) -> List[Tuple[int, str, Path]]:
+        """(width, format, path) of every derivative built for an image"""
+        stem = path.stem
+        found = []
+        try:
+            names = os.listdir(path.parent)
+        except OSError:
+            return found
+        for name in names:
+            if not name.startswith(stem + '_'):
+                continue
+            match = _DERIVATIVE_NAME.search(name)
+            if match and name[:match.start()] == stem:
+                found.append((int(match.group(1)), match.group(2), path.with_name(name)))
+        return sorted(found)
+
+    def negotiate(self, path: Path, accept: str, width: Optional[int] = None) -> Path:
+        """Best file to send for a PNG request given the client's Accept header and wanted width
+
+        Picks the smallest derivative at least `width` wide (or the widest one)
+        in the best accepted format; falls back to the optimized PNG, then the
+        original.
+        """
+        if path.suffix.lower() != '.png':
+            return path
+        variants = self.variants(path)
+        for fmt, media_type in NEGOTIATED_FORMATS:
+            if not accepted(accept or '', media_type):
+                continue
+            widths = [(w, p) for w, f, p in variants if f == fmt]
+            if widths:
+                fitting = [(w, p) for w, p in widths if width is None or w >= width]
+                return (fitting[0] if fitting and width is not None else widths[-1])[1]
+        optimized = path.with_name(f'{path.stem}_optimized.png')
+        return optimized if optimized.is_file() else path
+
+    def etag(self, path: Path, stat: os.stat_result) -> str:
+        """Strong ETag from the file's sha256, computed once per (size, mtime)"""
+        key = (str(path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._etags.get(key)
+            if cached:
+                self._etags.move_to_end(key)
+                return cached
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        tag = f'"{digest.hexdigest()[:32]}"'
+        with self._lock:
+            self._etags[key] = tag
+            while len(self._etags) > self.etag_cache_size:
+                self._etags.popitem(last=False)
+        return tag
+
+    def url(self, campaign: str, relpath: str) -> Optional[str]:
+        """Versioned URL for an asset - safe to cache forever, since new content gets a new URL"""
+        path = self.resolve(campaign, relpath)
+        if path is None:
+            return None
+        version = self.etag(path, path.stat()).strip('"')
+        return f"/world/{quote(campaign)}/{quote(relpath)}?v={version}"
+
+    def respond(self, campaign: str, relpath: str, headers, version: Optional[str] = None,
+                width: Optional[int] = None) -> AssetResponse:
+        """Status, headers and body span for GET /world/<campaign>/<relpath>
+
+        ?v= is checked against the requested file, as url() hands it out; a
+        derivative negotiated in its place is just as immutable.
+        """
+        source = self.resolve(campaign, relpath)
+        if source is None:
+            return AssetResponse(404, {})
+        immutable = bool(version) and f'"{version}"' == self.etag(source, source.stat())
+        path = self.negotiate(source, headers.get('Accept', ''), width)
+        stat = path.stat()
+        etag = self.etag(path, stat)
+        common = {
+            'ETag': etag,
+            'Cache-Control': IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+            'Vary': 'Accept',
+            'Accept-Ranges': 'bytes',
+        }
+
+        if_none_match = headers.get('If-None-Match')
+        if if_none_match and (if_none_match.strip() == '*' or etag in [t.strip() for t in if_none_match.split(',')]):
+            return AssetResponse(304, common)
+
+        content_type = ASSET_TYPES[path.suffix.lower()]
+        size = stat.st_size
+        range_header = headers.get('Range')
+        if_range = headers.get('If-Range')
+        if if_range and if_range.strip() != etag:
+            range_header = None
+        try:
+            span = parse_range(range_header, size)
+        except ValueError:
+            return AssetResponse(416, {**common, 'Content-Range': f'bytes */{size}'})
+        if span is None:
+            return AssetResponse(200, {**common, 'Content-Type': content_type, 'Content-Length': str(size)},
+                                 path, 0, size)
+        offset, length = span
+        return AssetResponse(206, {**common, 'Content-Type': content_type, 'Content-Length': str(length),
+                                   'Content-Range': f'bytes {offset}-{offset + length - 1}/{size}'},
+                             path, offset, length)
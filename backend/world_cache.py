@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Hot-Reload World Cache
+Watches a campaign directory and rebuilds only the entities whose files changed
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from world_loader import WorldContentLoader, ENTITY_TYPES, split_relpath
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    HAS_WATCHDOG = True
+except ImportError:
+    HAS_WATCHDOG = False
+
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Listener signature: (entity_type, entity_id, entity or None if deleted)
+ChangeListener = Callable[[str, str, Optional[dict]], None]
+
+
+def snapshot(campaign_path: Path) -> Dict[str, Tuple[int, int]]:
+    """(mtime_ns, size) for every file the loader reads"""
+    files = {}
+    for subdir in ('',) + ENTITY_TYPES:
+        directory = Path(campaign_path) / subdir
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith(('.md', '.json')):
+                stat = entry.stat()
+                relpath = f'{subdir}/{entry.name}' if subdir else entry.name
+                files[relpath] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+class WorldCache:
+    """Keeps a loader (and anything built on it) in step with files on disk
+
+    Rebuilds happen off to the side and are swapped in by reference, so
+    requests keep reading the previous version until the new one is ready.
+    """
+
+    def __init__(self, loader: WorldContentLoader, packer=None, poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 use_inotify: bool = True):
+        self.loader = loader
+        self.packer = packer
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify and HAS_WATCHDOG
+        self.listeners: List[ChangeListener] = []
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._snapshot = snapshot(loader.campaign_path)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._observer = None
+
+    @property
+    def mode(self) -> str:
+        return 'inotify' if self.use_inotify else 'polling'
+
+    def add_listener(self, listener: ChangeListener):
+        """Call listener after an entity is rebuilt, so indexes can update just that entity"""
+        self.listeners.append(listener)
+
+    def _entities_for(self, relpaths) -> Tuple[Set[Tuple[str, str]], bool]:
+        """Map changed files to the entities they belong to, and whether the overview changed"""
+        master_ids = {}
+        entities = set()
+        overview = False
+        for relpath in relpaths:
+            if relpath == 'WORLD_CONCEPT.md':
+                overview = True
+                continue
+            entity_type = relpath.split('/')[0]
+            if entity_type not in ENTITY_TYPES:
+                continue
+            if entity_type not in master_ids:
+                known = set(self.loader.list_entity_ids(entity_type))
+                known.update(entity_id for cached_type, entity_id in self.loader.entity_cache
+                             if cached_type == entity_type)
+                master_ids[entity_type] = sorted(known, key=lambda entity_id: (-len(entity_id), entity_id))
+            _, entity_id, _ = split_relpath(relpath, master_ids)
+            if entity_id:
+                entities.add((entity_type, entity_id))
+        return entities, overview
+
+    def apply_changes(self, relpaths) -> List[Tuple[str, str]]:
+        """Rebuild the entities touched by these campaign-relative paths"""
+        entities, overview = self._entities_for(relpaths)
+        with self._lock:
+            if overview:
+                self.loader.refresh_overview()
+                if self.packer:
+                    self.packer.invalidate_world()
+                    self.packer.world_chunks()
+            for entity_type, entity_id in sorted(entities):
+                entity = self.loader.refresh_entity(entity_type, entity_id)
+                if self.packer:
+                    self.packer.invalidate(entity_type, entity_id)
+                    if entity:
+                        self.packer.entity_chunks(entity_type, entity_id)
+                for listener in self.listeners:
+                    try:
+                        listener(entity_type, entity_id, entity)
+                    except Exception as e:
+                        print(f"World cache listener error for {entity_type}/{entity_id}: {e}")
+                self.reloads += 1
+        if entities or overview:
+            names = ', '.join(f'{t}/{i}' for t, i in sorted(entities)) + (' WORLD_CONCEPT.md' if overview else '')
+            print(f"🔄 Reloaded {names.strip()}")
+        return sorted(entities)
+
+    def poll_once(self) -> List[Tuple[str, str]]:
+        """Compare mtimes against the last snapshot and rebuild what changed"""
+        current = snapshot(self.loader.campaign_path)
+        changed = {relpath for relpath in current.keys() | self._snapshot.keys()
+                   if current.get(relpath) != self._snapshot.get(relpath)}
+        self._snapshot = current
+        return self.apply_changes(changed) if changed else []
+
+    def _poll_loop(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.poll_once()
+            except Exception as e:
+                print(f"World cache poll error: {e}")
+
+    def start(self):
+        """Start watching in the background"""
+        if self.use_inotify:
+            cache = self
+            root = Path(self.loader.campaign_path)
+
+            class Handler(FileSystemEventHandler):
+                def on_any_event(self, event):
+                    if event.is_directory:
+                        return
+                    paths = [event.src_path, getattr(event, 'dest_path', '')]
+                    relpaths = [Path(path).relative_to(root).as_posix() for path in paths
+                                if path and Path(path).is_relative_to(root)]
+                    cache.apply_changes(relpaths)
+
+            self._observer = Observer()
+            self._observer.schedule(Handler(), str(root), recursive=True)
+            self._observer.daemon = True
+            self._observer.start()
+        else:
+            self._thread = threading.Thread(target=self._poll_loop, name='world-cache-poll', daemon=True)
+            self._thread.start()
+        print(f"👀 Watching {self.loader.campaign_path} for changes ({self.mode})")
+
+    def stop(self):
+        self._stop.set()
+        if self._observer:
+            self._observer.stop()
+            self._observer.join(timeout=2)
+        if self._thread:
+            self._thread.join(timeout=2)
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+World Tools CLI for the Vibe Game
+Build-time commands for campaign data: python backend/world_cli.py <command> ...
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from world_loader import WorldContentLoader, DEFAULT_WORLD_PATH, DEFAULT_CAMPAIGN
+from world_pack import build_pack, benchmark_startup, default_pack_path
+from world_store import WorldStore, DEFAULT_DB_PATH
+from world_graph import WorldGraph, benchmark_khop
+from world_index import EntityIndex, benchmark_queries
+from world_models import measure_memory
+from visual_lexicon import VisualLexicon, benchmark_extraction
+from world_lint import lint_campaign, make_synthetic_campaign
+from world_schema import benchmark_validation, validate_many
+
+
+def cmd_pack(args) -> int:
+    """Compile a campaign into a single memory-mappable pack file"""
+    campaign_path = DEFAULT_WORLD_PATH / 'campaigns' / args.campaign
+    if not campaign_path.is_dir():
+        print(f"❌ Campaign not found: {campaign_path}")
+        return 1
+
+    pack_path = Path(args.output) if args.output else default_pack_path(args.campaign)
+    result = build_pack(campaign_path, pack_path)
+    print(f"✅ Packed {result['entities']} entities ({result['files']} files, "
+          f"{result['assets']} external assets) into {result['pack']} [{result['bytes']} bytes]")
+
+    if args.bench:
+        print(json.dumps(benchmark_startup(args.campaign, pack_path, rounds=args.rounds), indent=2))
+    return 0
+
+
+def cmd_store(args) -> int:
+    """Import, export or search the SQLite world store"""
+    with WorldStore(args.db) as store:
+        if args.action == 'import':
+            campaign_path = Path(args.path) if args.path else DEFAULT_WORLD_PATH / 'campaigns' / args.campaign
+            if not campaign_path.is_dir():
+                print(f"❌ Campaign not found: {campaign_path}")
+                return 1
+            counts = store.import_campaign(campaign_path, args.campaign, include_assets=not args.no_assets)
+            print(f"✅ Imported {counts['entities']} entities ({counts['files']} files, "
+                  f"{counts['assets']} assets) into {args.db}")
+        elif args.action == 'export':
+            if not args.path:
+                print("❌ export needs an output directory")
+                return 1
+            written = store.export_campaign(args.campaign, Path(args.path))
+            print(f"✅ Exported {written} files to {args.path}")
+        elif args.action == 'search':
+            for hit in store.search(args.campaign, args.path or '', limit=args.limit):
+                print(f"{hit['relpath']}: {hit['snippet']}")
+    return 0
+
+
+def cmd_graph(args) -> int:
+    """Summarize a campaign's relationship graph, or benchmark k-hop queries"""
+    if args.bench:
+        print(json.dumps(benchmark_khop(args.nodes, hops=args.hops), indent=2))
+        return 0
+
+    graph = WorldGraph.from_loader(WorldContentLoader(args.campaign))
+    print(f"🕸️ {len(graph.nodes)} entities, {graph.edge_count} edges, {len(graph.dangling)} dangling references")
+    for entity_type, entity_id in graph.nodes:
+        neighborhood = graph.neighborhood(entity_type, entity_id, args.hops)
+        if neighborhood:
+            names = ', '.join(f'{neighbor[1]} ({hops})' for neighbor, hops in neighborhood)
+            print(f"  {entity_type}/{entity_id} -> {names}")
+    return 0
+
+
+def cmd_index(args) -> int:
+    """Query a campaign's entity index, or benchmark tag intersections"""
+    if args.bench:
+        print(json.dumps(benchmark_queries(args.bench), indent=2))
+        return 0
+
+    index = EntityIndex.from_loader(WorldContentLoader(args.campaign))
+    tags = [tag for tag in (args.tags or '').split(',') if tag]
+    result = index.query(args.type, tags, args.status, args.priority, limit=args.limit)
+    for entity in result['entities']:
+        print(f"  {entity['type']}/{entity['id']}: {entity['name']} [{', '.join(entity['tags'])}]")
+    print(f"🏷️ {result['total']} of {index.stats()['entities']} entities match")
+    return 0
+
+
+def cmd_models(args) -> int:
+    """Compare memory held by master dicts and slotted entity models"""
+    print(json.dumps(measure_memory(args.entities), indent=2))
+    return 0
+
+
+def cmd_lexicon(args) -> int:
+    """Show the visual elements a campaign's lexicon picks out of some text, or benchmark extraction"""
+    lexicon = VisualLexicon.for_campaign(DEFAULT_WORLD_PATH / 'campaigns' / args.campaign)
+    if args.bench:
+        print(json.dumps(benchmark_extraction(args.bench, lexicon=lexicon), indent=2))
+        return 0
+    print(f"🎨 {len(lexicon.terms)} terms in {len(lexicon.groups)} groups")
+    if args.text:
+        for rank, element in enumerate(lexicon.extract(args.text), start=1):
+            print(f"  {rank}. {element}")
+    return 0
+
+
+def cmd_lint(args) -> int:
+    """Report dangling references, missing files and template violations"""
+    if args.bench:
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            campaign_path = Path(tmp) / 'synthetic'
+            start = time.perf_counter()
+            make_synthetic_campaign(campaign_path, args.bench)
+            print(f"📝 Wrote {args.bench} synthetic entities in {time.perf_counter() - start:.1f}s")
+            report = lint_campaign(campaign_path, workers=args.jobs)
+    else:
+        campaign_path = Path(args.path) if args.path else DEFAULT_WORLD_PATH / 'campaigns' / args.campaign
+        if not campaign_path.is_dir():
+            print(f"❌ Campaign not found: {campaign_path}")
+            return 1
+        report = lint_campaign(campaign_path, workers=args.jobs)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        if not args.bench:
+            for problem in report['issues']:
+                if problem['severity'] == 'error' or not args.errors_only:
+                    icon = '❌' if problem['severity'] == 'error' else '⚠️'
+                    print(f"{icon} {problem['entity']}: [{problem['code']}] {problem['message']}")
+        print(f"🔍 Linted {report['entities']} entities in {report['seconds']}s ({report['workers']} workers): "
+              f"{report['errors']} errors, {report['warnings']} warnings")
+    return 1 if report['errors'] else 0
+
+
+def cmd_validate(args) -> int:
+    """Check every master JSON against world/schema, or benchmark validator throughput"""
+    if args.bench:
+        print(json.dumps(benchmark_validation(args.bench), indent=2))
+        return 0
+
+    entities = WorldContentLoader(args.campaign, validate=False).load_all()
+    invalid = validate_many((entity['type'], entity['master']) for entity in entities)
+    for (entity_type, entity_id), errors in sorted(invalid.items()):
+        for _, message in errors:
+            print(f"❌ {entity_type}/{entity_id}: {message}")
+    print(f"📐 Validated {len(entities)} entities: {len(invalid)} invalid")
+    return 1 if invalid else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Vibe Game world tools')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    pack = subparsers.add_parser('pack', help='Compile a campaign into one pack file')
+    pack.add_argument('campaign', nargs='?', default=DEFAULT_CAMPAIGN)
+    pack.add_argument('-o', '--output', help='Pack file path (default: world/packs/<campaign>.worldpack)')
+    pack.add_argument('--bench', action='store_true', help='Compare startup against the directory loader')
+    pack.add_argument('--rounds', type=int, default=5, help='Benchmark rounds')
+    pack.set_defaults(func=cmd_pack)
+
+    store = subparsers.add_parser('store', help='SQLite world store import/export/search')
+    store.add_argument('action', choices=['import', 'export', 'search'])
+    store.add_argument('campaign')
+    store.add_argument('path', nargs='?', help='Campaign dir (import), output dir (export) or query (search)')
+    store.add_argument('--db', default=str(DEFAULT_DB_PATH), help='Database file (default: world/world.db)')
+    store.add_argument('--no-assets', action='store_true', help='Skip images on import')
+    store.add_argument('--limit', type=int, default=10, help='Search results to show')
+    store.set_defaults(func=cmd_store)
+
+    graph = subparsers.add_parser('graph', help='Relationship/inhabitant graph summary and benchmark')
+    graph.add_argument('campaign', nargs='?', default=DEFAULT_CAMPAIGN)
+    graph.add_argument('--hops', type=int, default=1, help='Neighborhood radius')
+    graph.add_argument('--bench', action='store_true', help='Benchmark k-hop queries on a synthetic graph')
+    graph.add_argument('--nodes', type=int, default=100_000, help='Synthetic graph size for --bench')
+    graph.set_defaults(func=cmd_graph)
+
+    index = subparsers.add_parser('index', help='Filter entities by type, tags, status and priority')
+    index.add_argument('campaign', nargs='?', default=DEFAULT_CAMPAIGN)
+    index.add_argument('--type', help='characters, locations or items')
+    index.add_argument('--tags', help='Comma-separated tags that must all be present')
+    index.add_argument('--status')
+    index.add_argument('--priority')
+    index.add_argument('--limit', type=int, default=50)
+    index.add_argument('--bench', type=int, metavar='N', help='Benchmark queries on a synthetic N-entity index instead')
+    index.set_defaults(func=cmd_index)
+
+    models = subparsers.add_parser('models', help='Measure entity model memory against raw master dicts')
+    models.add_argument('--entities', type=int, default=100_000, help='Synthetic entities to load')
+    models.set_defaults(func=cmd_models)
+
+    lexicon = subparsers.add_parser('lexicon', help='Rank visual elements in text with the campaign lexicon')
+    lexicon.add_argument('campaign', nargs='?', default=DEFAULT_CAMPAIGN)
+    lexicon.add_argument('--text', help='Text to extract visual elements from')
+    lexicon.add_argument('--bench', type=int, metavar='N', help='Benchmark N rounds against the old findall loop')
+    lexicon.set_defaults(func=cmd_lexicon)
+
+    lint = subparsers.add_parser('lint', help='Check references, files and templates across a campaign')
+    lint.add_argument('campaign', nargs='?', default=DEFAULT_CAMPAIGN)
+    lint.add_argument('--path', help='Campaign directory (default: world/campaigns/<campaign>)')
+    lint.add_argument('-j', '--jobs', type=int, help='Worker processes (default: one per CPU for large campaigns)')
+    lint.add_argument('--json', action='store_true', help='Print the full report as JSON')
+    lint.add_argument('--errors-only', action='store_true', help='Hide warnings such as missing images')
+    lint.add_argument('--bench', type=int, metavar='N', help='Lint a synthetic N-entity campaign instead')
+    lint.set_defaults(func=cmd_lint)
+
+    validate = subparsers.add_parser('validate', help='Validate master JSONs against world/schema')
+    validate.add_argument('campaign', nargs='?', default=DEFAULT_CAMPAIGN)
+    validate.add_argument('--bench', type=int, metavar='N', help='Benchmark validating N entities instead')
+    validate.set_defaults(func=cmd_validate)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
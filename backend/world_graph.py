@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+World Graph Index - relationships and inhabitants as a compact adjacency index
+*_relationships.json and *_inhabitants.json link entities together; this turns
+them into CSR arrays so the context packer can pull in connected entities
+"""
+
+import json
+import random
+import threading
+import time
+from array import array
+from functools import lru_cache
+from typing import Dict, Iterable, List, Any, Optional, Tuple
+
+from world_loader import WorldContentLoader, ENTITY_TYPES, RELATIONSHIP_FILES
+
+# Relationship kinds, stored per edge as an index into this tuple
+EDGE_KINDS = tuple(kind for kinds in RELATIONSHIP_FILES.values() for kind in kinds)
+
+# Entity type each kind must point at - creatures and factions are free-form
+# labels, so only these kinds report unmatched targets as dangling
+KIND_TARGET_TYPES = {'characters': 'characters', 'allies': 'characters', 'enemies': 'characters',
+                     'neutral': 'characters'}
+
+DEFAULT_QUERY_CACHE_SIZE = 4096
+
+EntityKey = Tuple[str, str]
+
+
+class WorldGraph:
+    """Undirected entity graph in CSR form with cached k-hop neighborhood queries
+
+    offsets[i]:offsets[i + 1] is the slice of targets (and kinds) holding
+    node i's neighbors. Edges are stored in both directions so a location
+    finds its inhabitants and a character finds where it lives.
+    """
+
+    def __init__(self, nodes: List[EntityKey], edges: Iterable[Tuple[int, int, int]],
+                 dangling: Optional[List[Tuple[EntityKey, str, str]]] = None,
+                 query_cache_size: int = DEFAULT_QUERY_CACHE_SIZE):
+        self.nodes = nodes
+        self.index: Dict[EntityKey, int] = {node: i for i, node in enumerate(nodes)}
+        # (source entity, kind, target) references that matched no entity
+        self.dangling = dangling or []
+
+        # Counting sort of both edge directions by source node
+        sources = array('l')
+        targets = array('l')
+        kinds = array('B')
+        for source, target, kind in edges:
+            if source == target:
+                continue
+            sources.extend((source, target))
+            targets.extend((target, source))
+            kinds.extend((kind, kind))
+
+        counts = [0] * (len(nodes) + 1)
+        for source in sources:
+            counts[source + 1] += 1
+        for i in range(len(nodes)):
+            counts[i + 1] += counts[i]
+        self.offsets = array('l', counts)
+
+        cursor = list(counts[:-1])
+        self.targets = array('l', bytes(len(targets) * targets.itemsize))
+        self.kinds = array('B', bytes(len(kinds)))
+        for source, target, kind in zip(sources, targets, kinds):
+            self.targets[cursor[source]] = target
+            self.kinds[cursor[source]] = kind
+            cursor[source] += 1
+
+        self._neighborhood = lru_cache(maxsize=query_cache_size)(self._bfs)
+
+    @classmethod
+    def from_loader(cls, loader: WorldContentLoader, **kwargs) -> 'WorldGraph':
+        """Build from a campaign's relationship and inhabitant files"""
+        nodes = [(entity_type, entity_id) for entity_type in ENTITY_TYPES
+                 for entity_id in sorted(loader.list_entity_ids(entity_type))]
+        by_id: Dict[str, List[int]] = {}
+        for i, (_, entity_id) in enumerate(nodes):
+            by_id.setdefault(entity_id, []).append(i)
+
+        edges = []
+        dangling = []
+        for source, (entity_type, entity_id) in enumerate(nodes):
+            for section, section_kinds in RELATIONSHIP_FILES.items():
+                data = loader.source.read_bytes(f'{entity_type}/{entity_id}_{section}.json')
+                if data is None:
+                    continue
+                try:
+                    references = json.loads(str(data, 'utf-8'))
+                except json.JSONDecodeError as e:
+                    print(f"Error parsing {section} JSON for {entity_id}: {e}")
+                    continue
+                for kind in section_kinds:
+                    for target in references.get(kind) or []:
+                        if isinstance(target, dict):
+                            target = target.get('id') or target.get('name')
+                        if not isinstance(target, str):
+                            continue
+                        matches = by_id.get(target, [])
+                        preferred = [i for i in matches if nodes[i][0] == KIND_TARGET_TYPES.get(kind)]
+                        if preferred or matches:
+                            edges.append((source, (preferred or matches)[0], EDGE_KINDS.index(kind)))
+                        elif kind in KIND_TARGET_TYPES:
+                            dangling.append(((entity_type, entity_id), kind, target))
+        return cls(nodes, edges, dangling, **kwargs)
+
+    @property
+    def edge_count(self) -> int:
+        """Undirected edges (each is stored twice)"""
+        return len(self.targets) // 2
+
+    def neighbors(self, entity_type: str, entity_id: str) -> List[Tuple[EntityKey, str]]:
+        """Directly connected entities and the relationship kind linking them"""
+        node = self.index.get((entity_type, entity_id))
+        if node is None:
+            return []
+        start, end = self.offsets[node], self.offsets[node + 1]
+        return [(self.nodes[self.targets[i]], EDGE_KINDS[self.kinds[i]]) for i in range(start, end)]
+
+    def _bfs(self, node: int, hops: int) -> Tuple[Tuple[int, int], ...]:
+        """(node, distance) for everything within hops of node, nearest first"""
+        offsets, targets = self.offsets, self.targets
+        seen = {node}
+        frontier = [node]
+        found = []
+        for distance in range(1, hops + 1):
+            next_frontier = []
+            for current in frontier:
+                for i in range(offsets[current], offsets[current + 1]):
+                    target = targets[i]
+                    if target not in seen:
+                        seen.add(target)
+                        next_frontier.append(target)
+            next_frontier.sort()
+            found.extend((target, distance) for target in next_frontier)
+            frontier = next_frontier
+            if not frontier:
+                break
+        return tuple(found)
+
+    def neighborhood(self, entity_type: str, entity_id: str, hops: int = 1) -> List[Tuple[EntityKey, int]]:
+        """Entities within hops of this one, with their distance (cached per node and hop count)"""
+        node = self.index.get((entity_type, entity_id))
+        if node is None or hops < 1:
+            return []
+        return [(self.nodes[target], distance) for target, distance in self._neighborhood(node, hops)]
+
+    def cache_info(self):
+        return self._neighborhood.cache_info()
+
+    def stats(self) -> Dict[str, Any]:
+        info = self.cache_info()
+        return {'nodes': len(self.nodes), 'edges': self.edge_count, 'dangling': len(self.dangling),
+                'query_cache': {'entries': info.currsize, 'hits': info.hits, 'misses': info.misses}}
+
+
+class LiveWorldGraph:
+    """A WorldGraph that rebuilds itself after world files change
+
+    Register invalidate() as a WorldCache listener. The rebuild (an O(edges)
+    pass) runs on a background thread while queries keep using the current
+    graph, which is then swapped out by reference; a burst of changes costs
+    one rebuild, not one per entity.
+    """
+
+    def __init__(self, loader: WorldContentLoader, **kwargs):
+        self.loader = loader
+        self.kwargs = kwargs
+        self.rebuilds = 0
+        self._graph: Optional[WorldGraph] = None
+        self._lock = threading.Lock()
+        self._stale = False
+        self._rebuilder: Optional[threading.Thread] = None
+
+    @property
+    def graph(self) -> WorldGraph:
+        graph = self._graph
+        if graph is None:
+            with self._lock:
+                if self._graph is None:
+                    self._graph = WorldGraph.from_loader(self.loader, **self.kwargs)
+                    self.rebuilds += 1
+                graph = self._graph
+        return graph
+
+    def invalidate(self, *_):
+        """Schedule a rebuild; queries are answered from the current graph until it is swapped in"""
+        with self._lock:
+            if self._graph is None:
+                # Never built - the first query builds it from the current files anyway
+                return
+            self._stale = True
+            if self._rebuilder is not None:
+                return
+            self._rebuilder = threading.Thread(target=self._rebuild, name='world-graph-rebuild', daemon=True)
+            self._rebuilder.start()
+
+    def _rebuild(self):
+        while True:
+            with self._lock:
+                if not self._stale:
+                    self._rebuilder = None
+                    return
+                self._stale = False
+            try:
+                graph = WorldGraph.from_loader(self.loader, **self.kwargs)
+            except Exception as e:
+                print(f"⚠️ World graph rebuild failed, keeping the previous graph: {e}")
+                continue
+            with self._lock:
+                self._graph = graph
+                self.rebuilds += 1
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until no rebuild is pending; False if the timeout passed first"""
+        with self._lock:
+            rebuilder = self._rebuilder
+        if rebuilder is not None:
+            rebuilder.join(timeout)
+            return not rebuilder.is_alive()
+        return True
+
+    def neighbors(self, entity_type: str, entity_id: str) -> List[Tuple[EntityKey, str]]:
+        return self.graph.neighbors(entity_type, entity_id)
+
+    def neighborhood(self, entity_type: str, entity_id: str, hops: int = 1) -> List[Tuple[EntityKey, int]]:
+        return self.graph.neighborhood(entity_type, entity_id, hops)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.graph.stats(), 'rebuilds': self.rebuilds}
+
+
+def synthetic_graph(num_nodes: int, avg_degree: int = 4, seed: int = 0, **kwargs) -> WorldGraph:
+    """Random graph with the shape of a large campaign, for benchmarks"""
+    rng = random.Random(seed)
+    nodes = [(ENTITY_TYPES[i % len(ENTITY_TYPES)], f'entity_{i}') for i in range(num_nodes)]
+    edges = [(rng.randrange(num_nodes), rng.randrange(num_nodes), rng.randrange(len(EDGE_KINDS)))
+             for _ in range(num_nodes * avg_degree // 2)]
+    return WorldGraph(nodes, edges, **kwargs)
+
+
+def benchmark_khop(num_nodes: int = 100_000, avg_degree: int = 4, hops: int = 2,
+                   queries: int = 10_000, seed: int = 0) -> Dict[str, Any]:
+    """Build time plus cold and cached k-hop query latency on a synthetic graph"""
+    start = time.perf_counter()
+    graph = synthetic_graph(num_nodes, avg_degree, seed, query_cache_size=queries)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    rng = random.Random(seed + 1)
+    keys = [graph.nodes[rng.randrange(num_nodes)] for _ in range(queries)]
+
+    def run():
+        start = time.perf_counter()
+        for key in keys:
+            graph.neighborhood(*key, hops=hops)
+        return (time.perf_counter() - start) / queries * 1e6
+
+    cold_us = run()
+    warm_us = run()
+    return {'nodes': num_nodes, 'edges': graph.edge_count, 'hops': hops, 'queries': queries,
+            'build_ms': round(build_ms, 1), 'cold_query_us': round(cold_us, 2),
+            'cached_query_us': round(warm_us, 2)}
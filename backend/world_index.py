@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+World Entity Index - bitmap inverted index over type, tags, status and ai_priority
+Each (field, value) maps to a Python int used as a bitset over entity slots, so
+filters and tag intersections are a few big-integer ANDs
+"""
+
+import random
+import re
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Tuple
+
+from world_loader import WorldContentLoader, ENTITY_TYPES
+
+# Fields a query can filter on
+INDEXED_FIELDS = ('type', 'tag', 'status', 'priority')
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Singular type names accepted in queries as well as directory names
+TYPE_ALIASES = {'character': 'characters', 'location': 'locations', 'item': 'items'}
+
+
+# Set bit positions of every byte value, for scanning a bitmap a byte at a time
+_BYTE_BITS = tuple(tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256))
+_NONZERO_RUN = re.compile(rb'[^\x00]+')
+
+
+def iter_bits(bitmap: int, skip: int = 0) -> Iterator[int]:
+    """Positions of set bits, lowest first, after skipping the first `skip` of them
+
+    The bitmap is converted to bytes once, so walking it never copies the
+    big integer; bytes before the offset are skipped using their popcount.
+    """
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    # Runs of zero bytes are jumped over by the regex engine rather than in Python
+    for run in _NONZERO_RUN.finditer(data):
+        byte_index = run.start()
+        for value in run.group():
+            bits = _BYTE_BITS[value]
+            if skip >= len(bits):
+                skip -= len(bits)
+            else:
+                base = byte_index * 8
+                for bit in bits[skip:]:
+                    yield base + bit
+                skip = 0
+            byte_index += 1
+
+
+def bitmap_from_slots(slots: Iterable[int], size: int) -> int:
+    """Bitmap with the given slot bits set, built in one pass"""
+    data = bytearray((size + 7) // 8)
+    for slot in slots:
+        data[slot >> 3] |= 1 << (slot & 7)
+    return int.from_bytes(data, 'little')
+
+
+def entity_terms(entity_type: str, master: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """(field, value) pairs an entity is indexed under"""
+    metadata = master.get('metadata') or {}
+    terms = [('type', entity_type)]
+    terms.extend(('tag', str(tag).lower()) for tag in master.get('tags') or [])
+    if metadata.get('status'):
+        terms.append(('status', str(metadata['status']).lower()))
+    if metadata.get('ai_priority'):
+        terms.append(('priority', str(metadata['ai_priority']).lower()))
+    return terms
+
+
+def _summary(entity_type: str, entity_id: str, master: Dict[str, Any]) -> Dict[str, Any]:
+    """What the query endpoint returns for each matching entity"""
+    metadata = master.get('metadata') or {}
+    return {
+        'id': entity_id,
+        'type': entity_type,
+        'name': master.get('name', entity_id),
+        'tags': list(master.get('tags') or []),
+        'status': metadata.get('status'),
+        'ai_priority': metadata.get('ai_priority'),
+    }
+
+
+class EntityIndex:
+    """Bitmap index over entity master files
+
+    Every entity gets a slot; a bitmap per (field, value) has that slot's bit
+    set. Slots of deleted entities are left empty rather than reused, so
+    pagination over a result stays stable while the index changes.
+    """
+
+    def __init__(self):
+        self.slots: List[Optional[Tuple[str, str]]] = []
+        self.summaries: List[Optional[Dict[str, Any]]] = []
+        self.slot_of: Dict[Tuple[str, str], int] = {}
+        self.bitmaps: Dict[Tuple[str, str], int] = {}
+        self.live = 0
+        self._terms: List[List[Tuple[str, str]]] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, entities: Iterable[Tuple[str, str, Dict[str, Any]]]) -> 'EntityIndex':
+        """Index (entity_type, entity_id, master) triples in bulk
+
+        Slots are gathered per term first and every bitmap is made once, which
+        avoids the quadratic cost of OR-ing bits into growing integers.
+        """
+        index = cls()
+        postings: Dict[Tuple[str, str], List[int]] = {}
+        for entity_type, entity_id, master in entities:
+            slot = len(index.slots)
+            index.slots.append((entity_type, entity_id))
+            index.slot_of[(entity_type, entity_id)] = slot
+            terms = entity_terms(entity_type, master)
+            index._terms.append(terms)
+            index.summaries.append(_summary(entity_type, entity_id, master))
+            for term in terms:
+                postings.setdefault(term, []).append(slot)
+        size = len(index.slots)
+        index.bitmaps = {term: bitmap_from_slots(slots, size) for term, slots in postings.items()}
+        index.live = (1 << size) - 1
+        return index
+
+    @classmethod
+    def from_loader(cls, loader: WorldContentLoader) -> 'EntityIndex':
+        def entities():
+            for entity_type in ENTITY_TYPES:
+                for entity_id in sorted(loader.list_entity_ids(entity_type)):
+                    entity = loader.load_entity(entity_type, entity_id)
+                    if entity:
+                        yield entity_type, entity_id, entity['master']
+        return cls.build(entities())
+
+    def update(self, entity_type: str, entity_id: str, master: Optional[Dict[str, Any]]):
+        """Add, replace or (with master=None) remove one entity"""
+        key = (entity_type, entity_id)
+        with self._lock:
+            slot = self.slot_of.get(key)
+            if slot is not None:
+                bit = 1 << slot
+                for term in self._terms[slot]:
+                    remaining = self.bitmaps[term] & ~bit
+                    if remaining:
+                        self.bitmaps[term] = remaining
+                    else:
+                        del self.bitmaps[term]
+                self.live &= ~bit
+                self._terms[slot] = []
+                self.summaries[slot] = None
+            if master is None:
+                return
+
+            if slot is None:
+                slot = len(self.slots)
+                self.slots.append(key)
+                self.summaries.append(None)
+                self._terms.append([])
+                self.slot_of[key] = slot
+            bit = 1 << slot
+            terms = entity_terms(entity_type, master)
+            for term in terms:
+                self.bitmaps[term] = self.bitmaps.get(term, 0) | bit
+            self.live |= bit
+            self._terms[slot] = terms
+            self.summaries[slot] = _summary(entity_type, entity_id, master)
+
+    def listener(self, entity_type: str, entity_id: str, entity: Optional[Dict[str, Any]]):
+        """WorldCache listener - keeps the index in step with hot reloads"""
+        self.update(entity_type, entity_id, entity['master'] if entity else None)
+
+    def match(self, entity_type: Optional[str] = None, tags: Iterable[str] = (), status: Optional[str] = None,
+              priority: Optional[str] = None) -> int:
+        """Bitmap of entities matching every given filter (all tags must be present)"""
+        bitmaps = self.bitmaps
+        result = self.live
+        if entity_type:
+            entity_type = TYPE_ALIASES.get(entity_type.lower(), entity_type.lower())
+            result &= bitmaps.get(('type', entity_type), 0)
+        if status:
+            result &= bitmaps.get(('status', status.lower()), 0)
+        if priority:
+            result &= bitmaps.get(('priority', priority.lower()), 0)
+        # Rarest tag first so the running result shrinks as fast as possible
+        tag_maps = sorted((bitmaps.get(('tag', tag.lower()), 0) for tag in tags), key=int.bit_count)
+        for tag_map in tag_maps:
+            if not result:
+                break
+            result &= tag_map
+        return result
+
+    def query(self, entity_type: Optional[str] = None, tags: Iterable[str] = (), status: Optional[str] = None,
+              priority: Optional[str] = None, offset: int = 0, limit: int = DEFAULT_PAGE_SIZE) -> Dict[str, Any]:
+        """One page of matching entity summaries plus the total match count"""
+        result = self.match(entity_type, tags, status, priority)
+        offset = max(0, offset)
+        limit = max(0, min(limit, MAX_PAGE_SIZE))
+        page = []
+        if limit:
+            for slot in iter_bits(result, offset):
+                page.append(self.summaries[slot])
+                if len(page) >= limit:
+                    break
+        return {'total': result.bit_count(), 'offset': offset, 'limit': limit, 'entities': page}
+
+    def values(self, field: str) -> Dict[str, int]:
+        """Every indexed value of a field with how many entities carry it"""
+        return {value: bitmap.bit_count() for (name, value), bitmap in sorted(self.bitmaps.items())
+                if name == field}
+
+    def stats(self) -> Dict[str, int]:
+        return {'entities': self.live.bit_count(), 'slots': len(self.slots), 'bitmaps': len(self.bitmaps),
+                'bytes': sum((bitmap.bit_length() + 7) // 8 for bitmap in self.bitmaps.values())}
+
+
+def synthetic_index(num_entities: int, num_tags: int = 200, tags_per_entity: int = 5, seed: int = 0) -> EntityIndex:
+    """Index of random entities with skewed tag popularity, for benchmarks"""
+    rng = random.Random(seed)
+    tag_names = [f'tag_{i}' for i in range(num_tags)]
+    weights = [1 / (i + 1) for i in range(num_tags)]
+
+    def entities():
+        for i in range(num_entities):
+            master = {
+                'name': f'Entity {i}',
+                'tags': sorted(set(rng.choices(tag_names, weights, k=tags_per_entity))),
+                'metadata': {'status': rng.choice(('active', 'active', 'active', 'draft')),
+                             'ai_priority': rng.choice(('critical', 'high', 'medium', 'low'))},
+            }
+            yield ENTITY_TYPES[i % len(ENTITY_TYPES)], f'entity_{i}', master
+    return EntityIndex.build(entities())
+
+
+def benchmark_queries(num_entities: int = 100_000, queries: int = 1000, seed: int = 0) -> Dict[str, Any]:
+    """Build time and per-query latency for tag intersections on a synthetic index"""
+    start = time.perf_counter()
+    index = synthetic_index(num_entities, seed=seed)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    rng = random.Random(seed + 1)
+    cases = [(rng.choice(('characters', None)), [f'tag_{rng.randrange(20)}' for _ in range(rng.randint(1, 3))],
+              'active', rng.choice(('high', None))) for _ in range(queries)]
+
+    start = time.perf_counter()
+    matched = 0
+    for entity_type, tags, status, priority in cases:
+        matched += index.match(entity_type, tags, status, priority).bit_count()
+    match_us = (time.perf_counter() - start) / queries * 1e6
+
+    start = time.perf_counter()
+    for entity_type, tags, status, priority in cases:
+        index.query(entity_type, tags, status, priority, limit=DEFAULT_PAGE_SIZE)
+    page_us = (time.perf_counter() - start) / queries * 1e6
+
+    return {'entities': num_entities, 'bitmaps': len(index.bitmaps), 'build_ms': round(build_ms, 1),
+            'mean_matches': matched // queries, 'match_us': round(match_us, 2), 'first_page_us': round(page_us, 2)}
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+World Linter - finds broken references and malformed entities in a campaign
+Checks every master JSON against its schema, every `files` entry against the
+directory, and every relationship/inhabitant reference against known entities
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Set
+
+from world_loader import DEFAULT_WORLD_PATH, ENTITY_TYPES, RELATIONSHIP_FILES, is_master_file
+from world_schema import SCHEMA_DIR, get_validator
+
+TEMPLATE_DIR = DEFAULT_WORLD_PATH / 'templates'
+
+# Directory name -> the "type" field its master files must carry
+ENTITY_TYPE_NAMES = {'characters': 'character', 'locations': 'location', 'items': 'item'}
+
+# Reference kinds that must name an existing entity (creatures and factions are free-form)
+ENTITY_REFERENCE_KINDS = ('allies', 'enemies', 'neutral', 'characters')
+
+IMAGE_SUFFIXES = ('.png', '.jpg', '.jpeg', '.webp', '.avif')
+
+# Campaigns smaller than this are linted in-process - a pool costs more than it saves
+PARALLEL_THRESHOLD = 2000
+DEFAULT_CHUNK_SIZE = 1000
+
+# Per-process state, set once by _init_worker so each task only ships entity ids
+_listings: Dict[str, Set[str]] = {}
+_known_ids: Set[str] = set()
+_schema_dir = SCHEMA_DIR
+_campaign_path = ''
+_campaign_name = ''
+
+
+def load_templates(template_dir: Path = TEMPLATE_DIR) -> Dict[str, Dict[str, Any]]:
+    """Entity templates keyed by directory name (characters, locations, items)"""
+    templates = {}
+    for entity_type, type_name in ENTITY_TYPE_NAMES.items():
+        try:
+            with open(Path(template_dir) / f'{type_name}_template.json', 'r', encoding='utf-8') as f:
+                templates[entity_type] = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Warning: Could not load {type_name} template: {e}")
+    return templates
+
+
+def issue(severity: str, entity_type: str, entity_id: str, code: str, message: str) -> Dict[str, str]:
+    return {'severity': severity, 'entity': f'{entity_type}/{entity_id}', 'code': code, 'message': message}
+
+
+def lint_entity(entity_type: str, entity_id: str) -> List[Dict[str, str]]:
+    """All problems with one entity, using the worker's directory listing and known ids"""
+    entity_dir = os.path.join(_campaign_path, entity_type)
+    try:
+        with open(os.path.join(entity_dir, f'{entity_id}.json'), 'r', encoding='utf-8') as f:
+            master = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        return [issue('error', entity_type, entity_id, 'bad-json', f"{entity_id}.json: {e}")]
+    if not isinstance(master, dict):
+        return [issue('error', entity_type, entity_id, 'bad-json', f"{entity_id}.json is not an object")]
+
+    problems = [issue('error', entity_type, entity_id, code, message)
+                for code, message in get_validator(entity_type, _schema_dir)(master)]
+    if master.get('id') != entity_id:
+        problems.append(issue('error', entity_type, entity_id, 'id-mismatch',
+                              f"id '{master.get('id')}' does not match file name"))
+    if master.get('campaign') != _campaign_name:
+        problems.append(issue('warning', entity_type, entity_id, 'campaign-mismatch',
+                              f"campaign '{master.get('campaign')}' in {_campaign_name}"))
+
+    listing = _listings.get(entity_type, set())
+    files = master.get('files')
+    for role, filename in (files.items() if isinstance(files, dict) else []):
+        if not isinstance(filename, str) or filename not in listing:
+            severity = 'warning' if str(filename).lower().endswith(IMAGE_SUFFIXES) else 'error'
+            problems.append(issue(severity, entity_type, entity_id, 'missing-file', f"files.{role}: {filename}"))
+
+    for section, kinds in RELATIONSHIP_FILES.items():
+        filename = f'{entity_id}_{section}.json'
+        if filename not in listing:
+            continue
+        try:
+            with open(os.path.join(entity_dir, filename), 'r', encoding='utf-8') as f:
+                references = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            problems.append(issue('error', entity_type, entity_id, 'bad-json', f"{filename}: {e}"))
+            continue
+        for kind in kinds:
+            targets = references.get(kind) if isinstance(references, dict) else None
+            if targets is None:
+                continue
+            if not isinstance(targets, list):
+                problems.append(issue('error', entity_type, entity_id, 'wrong-type', f"{section}.{kind} should be array"))
+                continue
+            if kind not in ENTITY_REFERENCE_KINDS:
+                continue
+            for target in targets:
+                target_id = target.get('id') if isinstance(target, dict) else target
+                if target_id not in _known_ids:
+                    problems.append(issue('error', entity_type, entity_id, 'dangling-reference',
+                                          f"{section}.{kind} -> {target_id}"))
+    return problems
+
+
+def _init_worker(campaign_path: Path, listings: Dict[str, Set[str]], known_ids: Set[str], schema_dir: Path):
+    global _campaign_path, _campaign_name, _listings, _known_ids, _schema_dir
+    _campaign_path = str(campaign_path)
+    _campaign_name = Path(campaign_path).name
+    _listings = listings
+    _known_ids = known_ids
+    _schema_dir = schema_dir
+
+
+def _lint_chunk(entity_type: str, entity_ids: List[str]) -> List[Dict[str, str]]:
+    problems = []
+    for entity_id in entity_ids:
+        problems.extend(lint_entity(entity_type, entity_id))
+    return problems
+
+
+def scan_campaign(campaign_path: Path) -> Dict[str, Set[str]]:
+    """File names in each entity directory - one scandir per type instead of a stat per reference"""
+    listings = {}
+    for entity_type in ENTITY_TYPES:
+        try:
+            listings[entity_type] = {entry.name for entry in os.scandir(Path(campaign_path) / entity_type)}
+        except OSError:
+            listings[entity_type] = set()
+    return listings
+
+
+def lint_campaign(campaign_path: Path, workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  schema_dir: Path = SCHEMA_DIR) -> Dict[str, Any]:
+    """Lint a whole campaign, fanning entities out to a process pool when it is large"""
+    start = time.perf_counter()
+    campaign_path = Path(campaign_path)
+    listings = scan_campaign(campaign_path)
+    entity_ids = {entity_type: sorted(name[:-5] for name in names if is_master_file(name))
+                  for entity_type, names in listings.items()}
+    known_ids = {entity_id for ids in entity_ids.values() for entity_id in ids}
+    total = sum(len(ids) for ids in entity_ids.values())
+
+    tasks = [(entity_type, ids[i:i + chunk_size])
+             for entity_type, ids in entity_ids.items() for i in range(0, len(ids), chunk_size)]
+    init_args = (campaign_path, listings, known_ids, schema_dir)
+
+    problems = []
+    if workers == 1 or (workers is None and total < PARALLEL_THRESHOLD):
+        workers = 1
+        _init_worker(*init_args)
+        for task in tasks:
+            problems.extend(_lint_chunk(*task))
+    else:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+            for chunk_problems in pool.map(_lint_chunk, *zip(*tasks)):
+                problems.extend(chunk_problems)
+
+    problems.sort(key=lambda p: (p['entity'], p['code'], p['message']))
+    return {
+        'campaign': campaign_path.name,
+        'entities': total,
+        'errors': sum(1 for p in problems if p['severity'] == 'error'),
+        'warnings': sum(1 for p in problems if p['severity'] == 'warning'),
+        'issues': problems,
+        'workers': workers,
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+
+
+def make_synthetic_campaign(campaign_path: Path, num_entities: int, broken_every: int = 50) -> int:
+    """Write a campaign of num_entities entities, with a dangling reference every broken_every locations"""
+    campaign_path = Path(campaign_path)
+    templates = load_templates()
+    per_type = {entity_type: [f'{ENTITY_TYPE_NAMES[entity_type]}_{i:06d}'
+                              for i in range(index, num_entities, len(ENTITY_TYPES))]
+                for index, entity_type in enumerate(ENTITY_TYPES)}
+    characters = per_type['characters']
+
+    for entity_type, ids in per_type.items():
+        entity_dir = campaign_path / entity_type
+        entity_dir.mkdir(parents=True, exist_ok=True)
+        template = templates[entity_type]
+        for n, entity_id in enumerate(ids):
+            files = {role: filename.replace('example_' + ENTITY_TYPE_NAMES[entity_type], entity_id)
+                     for role, filename in template['files'].items()}
+            master = dict(template, id=entity_id, name=entity_id.replace('_', ' ').title(),
+                          campaign=campaign_path.name, files=files)
+            with open(entity_dir / f'{entity_id}.json', 'w', encoding='utf-8') as f:
+                json.dump(master, f)
+            for filename in files.values():
+                if filename.endswith('.md'):
+                    (entity_dir / filename).write_text(f'# {master["name"]}\n', encoding='utf-8')
+                elif filename.endswith('_inhabitants.json'):
+                    residents = [characters[(n * 3 + k) % len(characters)] for k in range(3)] if characters else []
+                    if broken_every and n % broken_every == 0:
+                        residents.append(f'missing_{entity_id}')
+                    with open(entity_dir / filename, 'w', encoding='utf-8') as f:
+                        json.dump({'characters': residents, 'creatures': [], 'factions': []}, f)
+                elif filename.endswith('.json'):
+                    with open(entity_dir / filename, 'w', encoding='utf-8') as f:
+                        json.dump({}, f)
+    return num_entities
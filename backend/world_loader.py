@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+World Content Loader for the Vibe Game backend
+Python port of the Netlify WorldContentLoader - reads campaign entities from world/
+"""
+
+import json
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple, Union
+
+from world_models import Entity, entity_from_master
+from world_schema import get_validator
+
+DEFAULT_WORLD_PATH = Path(__file__).parent.parent / 'world'
+DEFAULT_CAMPAIGN = 'shakespeare_scifi'
+
+ENTITY_TYPES = ('characters', 'locations', 'items')
+
+# Content files that live next to a master JSON as {entity_id}_{suffix}
+MARKDOWN_SECTIONS = ('bio', 'description', 'secrets', 'dialogue', 'history')
+JSON_SECTIONS = ('stats', 'relationships', 'inhabitants')
+
+# *_relationships.json and *_inhabitants.json keys that point at other entities
+RELATIONSHIP_FILES = {
+    'relationships': ('allies', 'enemies', 'neutral'),
+    'inhabitants': ('characters', 'creatures', 'factions'),
+}
+
+# How many recent messages are scanned for entity mentions
+HISTORY_WINDOW = 6
+
+# Markdown bodies are loaded on demand into an LRU capped at this many bytes
+DEFAULT_TEXT_BUDGET = 32 * 1024 * 1024
+
+FALLBACK_OVERVIEW = """# The Stratford Nexus
+A Shakespeare-inspired sci-fantasy setting where fallen technology has become magic. Seven interconnected realm-spheres echo different aspects of the Bard's works, filled with whimsical danger and narrative technology."""
+
+_DATA_FILE_SUFFIXES = tuple(f'_{section}.json' for section in JSON_SECTIONS)
+
+
+def is_master_file(path) -> bool:
+    """Master files are {entity_id}.json - data files carry a known suffix"""
+    name = str(path).rsplit('/', 1)[-1]
+    if not name.endswith('.json'):
+        return False
+    return not name.endswith(_DATA_FILE_SUFFIXES)
+
+
+def build_aliases(master: Dict[str, Any]) -> List[str]:
+    """Derive the lowercase names a player might use for an entity"""
+    aliases = set(alias.lower() for alias in master.get('aliases', []))
+    name = master.get('name', '').lower()
+    if name:
+        aliases.add(name)
+        # "Hamlet-VII 'The Brooding Prince'" / "Verona Prime - City of Star-Crossed Fates"
+        parts = [part.strip(" '") for part in re.split(r"\s+-\s+|\s+'", name)]
+        for index, part in enumerate(parts):
+            if part.startswith('the '):
+                part = part[4:]
+            # Nicknames need two words so "'The Ambitious'" doesn't match any ambitious plan
+            if len(part) > 2 and (index == 0 or ' ' in part):
+                aliases.add(part)
+        # "Prospero the Technomancer" -> "prospero", "Yorick's Memory Skull" -> "yorick"
+        head = re.split(r'\s+(?:the|of)\s+', parts[0], maxsplit=1)[0]
+        if head != parts[0] and len(head) > 2 and not head.startswith('the '):
+            aliases.add(head)
+        first_word = parts[0].split()[0]
+        if first_word.endswith("'s") and len(first_word) > 4:
+            aliases.add(first_word[:-2])
+    return sorted(aliases)
+
+
+def split_relpath(relpath: str, master_ids: Dict[str, List[str]]):
+    """Work out (entity_type, entity_id, section) for a campaign-relative path
+
+    master_ids lists the ids of each type longest first, so "crown" never
+    claims "crown_of_command_stats.json".
+    """
+    parts = relpath.split('/')
+    if len(parts) != 2 or parts[0] not in master_ids:
+        return '', '', ''
+    entity_type, filename = parts
+    stem = Path(filename).stem
+    for entity_id in master_ids[entity_type]:
+        if stem == entity_id:
+            return entity_type, entity_id, 'master'
+        if stem.startswith(entity_id + '_'):
+            return entity_type, entity_id, stem[len(entity_id) + 1:]
+    return entity_type, '', ''
+
+
+class DirectorySource:
+    """Reads campaign files straight from world/campaigns/<campaign>"""
+
+    def __init__(self, campaign_path: Path):
+        self.root = Path(campaign_path)
+
+    def list_entity_ids(self, entity_type: str) -> List[str]:
+        entity_dir = self.root / entity_type
+        if not entity_dir.is_dir():
+            return []
+        return sorted(path.stem for path in entity_dir.glob('*.json') if is_master_file(path))
+
+    def read_bytes(self, relpath: str) -> Optional[bytes]:
+        """File contents, or None if the file doesn't exist"""
+        try:
+            with open(self.root / relpath, 'rb') as f:
+                return f.read()
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+
+
+class ByteBudgetLRU:
+    """LRU cache bounded by the total size of its values, with hit and eviction metrics"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: 'OrderedDict[Any, Tuple[Any, int]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Cached value (marking it most recently used), or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size: int):
+        """Insert a value, evicting least recently used entries to stay within budget"""
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def discard(self, key):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {'entries': len(self._entries), 'bytes': self.bytes, 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+class EntityContent(Mapping):
+    """An entity's content files - JSON data stays resident, markdown is fetched through the loader's LRU"""
+
+    def __init__(self, loader: 'WorldContentLoader', entity_type: str, entity_id: str,
+                 sections: Tuple[str, ...], data: Dict[str, Any]):
+        self._loader = loader
+        self._entity_type = entity_type
+        self._entity_id = entity_id
+        self._sections = sections
+        self._data = data
+
+    def __getitem__(self, key):
+        if key in self._data:
+            return self._data[key]
+        if key in self._sections:
+            text = self._loader.read_section(self._entity_type, self._entity_id, key)
+            if text is not None:
+                return text
+        raise KeyError(key)
+
+    def __iter__(self):
+        yield from self._sections
+        yield from self._data
+
+    def __len__(self):
+        return len(self._sections) + len(self._data)
+
+    def __repr__(self):
+        return f"EntityContent({self._entity_type}/{self._entity_id}: {list(self)})"
+
+
+class EntityRecognizer:
+    """Finds entity mentions in player text with a single compiled pattern"""
+
+    def __init__(self, aliases: Dict[str, Tuple[str, str]]):
+        # aliases maps lowercase alias -> (entity_type, entity_id)
+        self.aliases = dict(aliases)
+        if self.aliases:
+            ordered = sorted(self.aliases, key=lambda alias: (-len(alias), alias))
+            self.pattern = re.compile(r'\b(?:' + '|'.join(re.escape(a) for a in ordered) + r')\b')
+        else:
+            self.pattern = None
+
+    def with_entity(self, entity: Tuple[str, str], aliases: List[str]) -> 'EntityRecognizer':
+        """New recognizer with one entity's aliases replaced - the old one stays usable meanwhile"""
+        updated = {alias: owner for alias, owner in self.aliases.items() if owner != entity}
+        for alias in aliases:
+            updated.setdefault(alias, entity)
+        return EntityRecognizer(updated)
+
+    def find(self, text: str) -> List[Tuple[str, str]]:
+        """Return (entity_type, entity_id) pairs in order of first mention"""
+        if not self.pattern or not text:
+            return []
+        found = []
+        for match in self.pattern.finditer(text.lower()):
+            entity = self.aliases[match.group(0)]
+            if entity not in found:
+                found.append(entity)
+        return found
+
+
+class WorldContentLoader:
+    """Loads world overview and entities for one campaign"""
+
+    def __init__(self, campaign: str = DEFAULT_CAMPAIGN, world_path: Optional[Path] = None, source=None,
+                 text_budget: int = DEFAULT_TEXT_BUDGET, validate: bool = True):
+        self.campaign = campaign
+        self.world_path = Path(world_path or DEFAULT_WORLD_PATH)
+        self.campaign_path = self.world_path / 'campaigns' / campaign
+        # Anything with list_entity_ids() and read_bytes() - a directory or a compiled WorldPack
+        self.source = source or DirectorySource(self.campaign_path)
+        # Masters are kept as slotted models (the raw dict only when a model wouldn't round-trip it),
+        # data files stay resident, and markdown bodies live in text_cache
+        self.entity_cache: Dict[Tuple[str, str], Tuple[Union[Entity, Dict[str, Any]], EntityContent]] = {}
+        self.text_cache = ByteBudgetLRU(text_budget)
+        self.world_overview: Optional[str] = None
+        self._recognizer: Optional[EntityRecognizer] = None
+        # Invalid entities still load, but their schema errors are kept here and logged
+        self.validate = validate
+        self.schema_errors: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+
+    def get_world_overview(self) -> str:
+        """Load world overview (cached)"""
+        if self.world_overview is None:
+            data = self.source.read_bytes('WORLD_CONCEPT.md')
+            self.world_overview = str(data, 'utf-8') if data is not None else FALLBACK_OVERVIEW
+        return self.world_overview
+
+    def list_entity_ids(self, entity_type: str) -> List[str]:
+        """List entity ids of one type, sorted for deterministic iteration"""
+        return self.source.list_entity_ids(entity_type)
+
+    def load_entity(self, entity_type: str, entity_id: str) -> Optional[Dict[str, Any]]:
+        """Load an entity's master JSON and content files (cached)
+
+        The dict is built from the cached model on each call, so changing it
+        doesn't change the cache. Callers on a hot path that only need fields
+        or content should use load_model or load_content instead.
+        """
+        cache_key = (entity_type, entity_id)
+        cached = self.entity_cache.get(cache_key)
+        if cached is None:
+            entity = self._read_entity(entity_type, entity_id)
+            if entity:
+                self._remember(cache_key, entity)
+            return entity
+        record, content = cached
+        master = record.to_master() if isinstance(record, Entity) else record
+        return {'id': entity_id, 'type': entity_type, 'master': master, 'content': content}
+
+    def load_model(self, entity_type: str, entity_id: str) -> Optional[Entity]:
+        """An entity as a Character/Location/Item model whose text sections load on access
+
+        None if it doesn't exist, or its master is one no model can be built from.
+        """
+        if (entity_type, entity_id) not in self.entity_cache and not self.load_entity(entity_type, entity_id):
+            return None
+        record, _ = self.entity_cache[(entity_type, entity_id)]
+        if isinstance(record, Entity):
+            return record
+        try:
+            return entity_from_master(entity_type, record, self)
+        except (KeyError, AttributeError, TypeError, ValueError):
+            return None
+
+    def load_content(self, entity_type: str, entity_id: str) -> Optional[EntityContent]:
+        """An entity's content files (cached), without rebuilding its master dict"""
+        cached = self.entity_cache.get((entity_type, entity_id))
+        if cached is None:
+            entity = self.load_entity(entity_type, entity_id)
+            return entity['content'] if entity else None
+        return cached[1]
+
+    def _remember(self, cache_key: Tuple[str, str], entity: Dict[str, Any]):
+        """Cache an entity read from the source, compacting its master into a model"""
+        master = entity['master']
+        try:
+            model = entity_from_master(cache_key[0], master, self)
+            record = model if model.to_master() == master else master
+        except (KeyError, AttributeError, TypeError, ValueError):
+            # Masters the schema rejects are kept exactly as read
+            record = master
+        self.entity_cache[cache_key] = (record, entity['content'])
+
+    def _read_entity(self, entity_type: str, entity_id: str) -> Optional[Dict[str, Any]]:
+        """Read an entity from the source, bypassing the cache"""
+        try:
+            data = self.source.read_bytes(f'{entity_type}/{entity_id}.json')
+            if data is None:
+                raise FileNotFoundError(f'{entity_type}/{entity_id}.json')
+            master = json.loads(str(data, 'utf-8'))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error loading entity {entity_type}/{entity_id}: {e}")
+            return None
+
+        if self.validate:
+            errors = get_validator(entity_type)(master)
+            if errors:
+                self.schema_errors[(entity_type, entity_id)] = errors
+                print(f"Warning: {entity_type}/{entity_id} does not match its schema: "
+                      + '; '.join(message for _, message in errors))
+            else:
+                self.schema_errors.pop((entity_type, entity_id), None)
+
+        sections = []
+        for section in MARKDOWN_SECTIONS:
+            data = self.source.read_bytes(f'{entity_type}/{entity_id}_{section}.md')
+            if data is not None:
+                sections.append(section)
+                self.text_cache.put((entity_type, entity_id, section), str(data, 'utf-8'), len(data))
+
+        json_data = {}
+        for section in JSON_SECTIONS:
+            data = self.source.read_bytes(f'{entity_type}/{entity_id}_{section}.json')
+            if data is not None:
+                try:
+                    json_data[f'{section}_data'] = json.loads(str(data, 'utf-8'))
+                except json.JSONDecodeError as e:
+                    print(f"Error parsing {section} JSON for {entity_id}: {e}")
+
+        content = EntityContent(self, entity_type, entity_id, tuple(sections), json_data)
+        return {'id': entity_id, 'type': entity_type, 'master': master, 'content': content}
+
+    def read_section(self, entity_type: str, entity_id: str, section: str) -> Optional[str]:
+        """A markdown body, from the LRU or re-read from the source on a miss"""
+        key = (entity_type, entity_id, section)
+        text = self.text_cache.get(key)
+        if text is None:
+            data = self.source.read_bytes(f'{entity_type}/{entity_id}_{section}.md')
+            if data is None:
+                return None
+            text = str(data, 'utf-8')
+            self.text_cache.put(key, text, len(data))
+        return text
+
+    def refresh_entity(self, entity_type: str, entity_id: str) -> Optional[Dict[str, Any]]:
+        """Re-read one entity and swap it into the cache and recognizer (None if it was deleted)"""
+        cache_key = (entity_type, entity_id)
+        for section in MARKDOWN_SECTIONS:
+            self.text_cache.discard((entity_type, entity_id, section))
+        exists = self.source.read_bytes(f'{entity_type}/{entity_id}.json') is not None
+        entity = self._read_entity(entity_type, entity_id) if exists else None
+        if entity:
+            self._remember(cache_key, entity)
+        else:
+            self.entity_cache.pop(cache_key, None)
+            self.schema_errors.pop(cache_key, None)
+        if self._recognizer is not None:
+            aliases = build_aliases(entity['master']) if entity else []
+            self._recognizer = self._recognizer.with_entity(cache_key, aliases)
+        return entity
+
+    def refresh_overview(self) -> str:
+        """Re-read WORLD_CONCEPT.md"""
+        self.world_overview = None
+        return self.get_world_overview()
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        """Load every entity in the campaign"""
+        entities = []
+        for entity_type in ENTITY_TYPES:
+            for entity_id in self.list_entity_ids(entity_type):
+                entity = self.load_entity(entity_type, entity_id)
+                if entity:
+                    entities.append(entity)
+        return entities
+
+    @property
+    def recognizer(self) -> EntityRecognizer:
+        """Alias recognizer over every entity in the campaign (built once)"""
+        if self._recognizer is None:
+            aliases = {}
+            for entity in self.load_all():
+                for alias in build_aliases(entity['master']):
+                    aliases.setdefault(alias, (entity['type'], entity['id']))
+            self._recognizer = EntityRecognizer(aliases)
+        return self._recognizer
+
+    def find_mentions(self, user_input: str,
+                      conversation_history: Optional[List[Dict[str, Any]]] = None) -> Dict[Tuple[str, str], int]:
+        """Map each mentioned entity to how many turns ago it was last mentioned (0 = this input)"""
+        mentions = {}
+        for entity in self.recognizer.find(user_input):
+            mentions[entity] = 0
+
+        recent = (conversation_history or [])[-HISTORY_WINDOW:]
+        for turns_ago, message in enumerate(reversed(recent), start=1):
+            for entity in self.recognizer.find(message.get('content') or ''):
+                mentions.setdefault(entity, turns_ago)
+        return mentions
+
+    def analyze_input(self, user_input: str,
+                      conversation_history: Optional[List[Dict[str, Any]]] = None) -> Dict[str, List[str]]:
+        """Analyze user input for entity mentions, grouped by entity type"""
+        detected = {entity_type: [] for entity_type in ENTITY_TYPES}
+        mentions = self.find_mentions(user_input, conversation_history)
+        for (entity_type, entity_id), _ in sorted(mentions.items(), key=lambda item: item[1]):
+            detected.setdefault(entity_type, []).append(entity_id)
+        return detected
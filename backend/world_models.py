@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+World Entity Models - compact Character, Location and Item classes
+Fixed __slots__ instead of a dict per entity, interned ids and tags, and markdown
+bodies fetched through the loader's text cache only when they are read
+"""
+
+import json
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Master JSON keys with a slot of their own; anything else is kept in `extra`
+_MASTER_KEYS = ('id', 'type', 'name', 'campaign', 'tags', 'files', 'metadata')
+_METADATA_KEYS = ('created', 'last_modified', 'status', 'ai_priority')
+
+_intern = sys.intern
+
+
+def _intern_pairs(mapping: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+    return tuple((_intern(key), _intern(value) if isinstance(value, str) else value)
+                 for key, value in mapping.items())
+
+
+class LazyText:
+    """Markdown section read through the entity's loader on access - nothing is stored on the instance"""
+
+    def __init__(self, section: str):
+        self.section = section
+
+    def __get__(self, entity, owner=None):
+        if entity is None:
+            return self
+        return entity.text(self.section)
+
+
+class Entity:
+    """Base for world entities; subclasses set TYPE (master 'type') and DIRECTORY (campaign folder)"""
+
+    TYPE = 'entity'
+    DIRECTORY = ''
+
+    __slots__ = ('id', 'name', 'campaign', 'tags', 'files', 'created', 'last_modified', 'status', 'ai_priority',
+                 'extra', 'loader')
+
+    def __init__(self, id: str, name: str = '', campaign: str = '', tags: Iterable[str] = (),
+                 files: Optional[Dict[str, str]] = None, created: Optional[str] = None,
+                 last_modified: Optional[str] = None, status: Optional[str] = None,
+                 ai_priority: Optional[str] = None, extra: Optional[Dict[str, Any]] = None, loader=None):
+        self.id = _intern(id)
+        self.name = name
+        self.campaign = _intern(campaign)
+        self.tags = tuple(_intern(tag) for tag in tags)
+        self.files = _intern_pairs(files or {})
+        self.created = created
+        self.last_modified = last_modified
+        self.status = _intern(status) if status else status
+        self.ai_priority = _intern(ai_priority) if ai_priority else ai_priority
+        # Unknown top-level keys, and unknown metadata keys under 'metadata', so nothing is lost
+        self.extra = extra or None
+        self.loader = loader
+
+    @classmethod
+    def from_master(cls, master: Dict[str, Any], loader=None) -> 'Entity':
+        """Build from a master JSON dict"""
+        metadata = master.get('metadata') or {}
+        extra = {key: value for key, value in master.items() if key not in _MASTER_KEYS}
+        metadata_extra = {key: value for key, value in metadata.items() if key not in _METADATA_KEYS}
+        if metadata_extra:
+            extra['metadata'] = metadata_extra
+        return cls(master['id'], master.get('name', ''), master.get('campaign', ''), master.get('tags') or (),
+                   master.get('files'), metadata.get('created'), metadata.get('last_modified'),
+                   metadata.get('status'), metadata.get('ai_priority'), extra, loader)
+
+    def to_master(self) -> Dict[str, Any]:
+        """The master JSON dict, in the layout the templates use"""
+        extra = dict(self.extra or {})
+        metadata = {key: value for key, value in (('created', self.created), ('last_modified', self.last_modified),
+                                                  ('status', self.status), ('ai_priority', self.ai_priority))
+                    if value is not None}
+        metadata.update(extra.pop('metadata', {}))
+        master = {'id': self.id, 'type': self.TYPE, 'name': self.name, 'campaign': self.campaign,
+                  'tags': list(self.tags), 'files': dict(self.files), 'metadata': metadata}
+        master.update(extra)
+        return master
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_master(), indent=2)
+
+    def file(self, key: str) -> Optional[str]:
+        """Filename listed under files.<key>"""
+        for name, filename in self.files:
+            if name == key:
+                return filename
+        return None
+
+    def text(self, section: str) -> Optional[str]:
+        """A markdown section (bio, description, ...) via the loader, or None when unbound or missing"""
+        if self.loader is None:
+            return None
+        return self.loader.read_section(self.DIRECTORY, self.id, section)
+
+    def __eq__(self, other):
+        return type(other) is type(self) and other.to_master() == self.to_master()
+
+    def __hash__(self):
+        # Type and id only: equal entities always share them, and they never change after loading
+        return hash((self.TYPE, self.id))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.id!r})"
+
+
+class Character(Entity):
+    TYPE = 'character'
+    DIRECTORY = 'characters'
+    __slots__ = ()
+
+    bio = LazyText('bio')
+    secrets = LazyText('secrets')
+    dialogue = LazyText('dialogue')
+
+
+class Location(Entity):
+    TYPE = 'location'
+    DIRECTORY = 'locations'
+    __slots__ = ()
+
+    description = LazyText('description')
+    secrets = LazyText('secrets')
+    history = LazyText('history')
+
+
+class Item(Entity):
+    TYPE = 'item'
+    DIRECTORY = 'items'
+    __slots__ = ()
+
+    description = LazyText('description')
+    history = LazyText('history')
+
+
+# Campaign directory -> model class
+ENTITY_MODELS = {model.DIRECTORY: model for model in (Character, Location, Item)}
+
+
+def entity_from_master(entity_type: str, master: Dict[str, Any], loader=None) -> Entity:
+    """Model for a master JSON from one of the campaign directories (characters, locations, items)"""
+    return ENTITY_MODELS[entity_type].from_master(master, loader)
+
+
+def _synthetic_masters(count: int, seed: int = 0) -> List[Tuple[str, bytes]]:
+    """Master JSON files shaped like the shipped templates, as they would be read from disk"""
+    rng = random.Random(seed)
+    vocabulary = [f'tag_{i}' for i in range(200)]
+    masters = []
+    for i in range(count):
+        entity_type = ('characters', 'locations', 'items')[i % 3]
+        model = ENTITY_MODELS[entity_type]
+        entity_id = f'{model.TYPE}_{i:06d}'
+        suffixes = {'characters': ('portrait', 'public_bio', 'secrets', 'stats', 'dialogue', 'relationships'),
+                    'locations': ('map', 'image', 'description', 'secrets', 'history', 'inhabitants'),
+                    'items': ('image', 'description', 'stats', 'history')}[entity_type]
+        master = {
+            'id': entity_id,
+            'type': model.TYPE,
+            'name': f'{model.TYPE.title()} {i}',
+            'campaign': 'synthetic',
+            'tags': rng.sample(vocabulary, 4),
+            'files': {key: f'{entity_id}_{key}.md' for key in suffixes},
+            'metadata': {'created': '2025-07-12', 'last_modified': '2025-07-12', 'status': 'active',
+                         'ai_priority': rng.choice(('critical', 'high', 'medium', 'low'))},
+        }
+        masters.append((entity_type, json.dumps(master, indent=2).encode('utf-8')))
+    return masters
+
+
+def measure_memory(count: int = 100_000, seed: int = 0) -> Dict[str, Any]:
+    """Bytes held per entity as parsed master dicts versus models, measured with tracemalloc"""
+    files = _synthetic_masters(count, seed)
+
+    def held(build):
+        tracemalloc.start()
+        start = time.perf_counter()
+        objects = build()
+        seconds = time.perf_counter() - start
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return objects, size, seconds
+
+    dicts, dict_bytes, dict_seconds = held(lambda: [json.loads(data) for _, data in files])
+    del dicts
+    # Interning can resize the interpreter's interned-string table once; don't charge that to the models
+    [entity_from_master(entity_type, json.loads(data)) for entity_type, data in files]
+    models, model_bytes, model_seconds = held(
+        lambda: [entity_from_master(entity_type, json.loads(data)) for entity_type, data in files])
+    round_trips = all(json.loads(data) == model.to_master() for (_, data), model in zip(files, models))
+    return {'entities': count, 'dict_bytes_per_entity': dict_bytes // count,
+            'model_bytes_per_entity': model_bytes // count, 'saved_percent': round(100 - model_bytes * 100 / dict_bytes, 1),
+            'dict_seconds': round(dict_seconds, 2), 'model_seconds': round(model_seconds, 2), 'round_trips': round_trips}
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Compiled World Packs - a whole campaign in one memory-mapped file
+Replaces hundreds of small open/stat calls with one mmap and zero-copy slices
+
+Layout (little-endian):
+    magic       8 bytes   b'VGWPACK1'
+    version     u32
+    reserved    u32
+    index_off   u64       offset of the JSON index
+    index_len   u64
+    blobs ...             concatenated text and JSON files
+    index                 JSON: {"campaign", "files": {relpath: [offset, length]},
+                                 "entities": {type: [ids]}, "assets": {relpath: size}}
+"""
+
+import json
+import mmap
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+from world_loader import (WorldContentLoader, DirectorySource, ENTITY_TYPES, DEFAULT_WORLD_PATH,
+                          is_master_file)
+
+MAGIC = b'VGWPACK1'
+VERSION = 1
+HEADER = struct.Struct('<8sIIQQ')
+
+# Packed inline - everything else (images) is listed as an external asset
+PACKED_SUFFIXES = ('.md', '.json')
+
+PACK_SUFFIX = '.worldpack'
+DEFAULT_PACK_DIR = DEFAULT_WORLD_PATH / 'packs'
+
+
+class WorldPackError(Exception):
+    """Raised when a pack file is missing, truncated or from another version"""
+
+
+def default_pack_path(campaign: str) -> Path:
+    return DEFAULT_PACK_DIR / f'{campaign}{PACK_SUFFIX}'
+
+
+def build_pack(campaign_path: Path, pack_path: Path) -> Dict[str, Any]:
+    """Compile a campaign directory into a single pack file"""
+    campaign_path = Path(campaign_path)
+    pack_path = Path(pack_path)
+    pack_path.parent.mkdir(parents=True, exist_ok=True)
+
+    files = {}
+    assets = {}
+    entities = {}
+    tmp_path = pack_path.with_name(pack_path.name + '.tmp')
+
+    with open(tmp_path, 'wb') as out:
+        out.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+        offset = HEADER.size
+
+        for path in sorted(campaign_path.rglob('*')):
+            if not path.is_file():
+                continue
+            relpath = path.relative_to(campaign_path).as_posix()
+            if path.suffix not in PACKED_SUFFIXES:
+                assets[relpath] = path.stat().st_size
+                continue
+            data = path.read_bytes()
+            out.write(data)
+            files[relpath] = [offset, len(data)]
+            offset += len(data)
+
+            parts = relpath.split('/')
+            if len(parts) == 2 and parts[0] in ENTITY_TYPES and is_master_file(parts[1]):
+                entities.setdefault(parts[0], []).append(path.stem)
+
+        index = json.dumps({
+            'campaign': campaign_path.name,
+            'built': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'files': files,
+            'entities': {entity_type: sorted(ids) for entity_type, ids in entities.items()},
+            'assets': assets,
+        }, separators=(',', ':')).encode('utf-8')
+        out.write(index)
+
+        out.seek(0)
+        out.write(HEADER.pack(MAGIC, VERSION, 0, offset, len(index)))
+        out.flush()
+        os.fsync(out.fileno())
+
+    os.replace(tmp_path, pack_path)
+    return {
+        'pack': str(pack_path),
+        'files': len(files),
+        'entities': sum(len(ids) for ids in entities.values()),
+        'assets': len(assets),
+        'bytes': offset + len(index),
+    }
+
+
+class WorldPack:
+    """Read-only view over a pack file - a drop-in source for WorldContentLoader"""
+
+    def __init__(self, pack_path: Path):
+        self.pack_path = Path(pack_path)
+        try:
+            self._file = open(self.pack_path, 'rb')
+        except OSError as e:
+            raise WorldPackError(f"Cannot open world pack {self.pack_path}: {e}")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:
+            self._file.close()
+            raise WorldPackError(f"Empty world pack {self.pack_path}: {e}")
+        self._view = memoryview(self._mmap)
+
+        if len(self._view) < HEADER.size:
+            self.close()
+            raise WorldPackError(f"Truncated world pack {self.pack_path}")
+        magic, version, _, index_offset, index_length = HEADER.unpack_from(self._view, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise WorldPackError(f"Not a version {VERSION} world pack: {self.pack_path}")
+        if index_offset + index_length > len(self._view):
+            self.close()
+            raise WorldPackError(f"Truncated world pack {self.pack_path}")
+
+        index = json.loads(str(self._view[index_offset:index_offset + index_length], 'utf-8'))
+        self.campaign: str = index['campaign']
+        self.built: str = index.get('built', '')
+        self.files: Dict[str, List[int]] = index['files']
+        self.entities: Dict[str, List[str]] = index['entities']
+        self.assets: Dict[str, int] = index.get('assets', {})
+
+    def list_entity_ids(self, entity_type: str) -> List[str]:
+        return list(self.entities.get(entity_type, []))
+
+    def read_bytes(self, relpath: str) -> Optional[memoryview]:
+        """Zero-copy slice of the mapped file, or None if the file isn't packed"""
+        entry = self.files.get(relpath)
+        if entry is None:
+            return None
+        offset, length = entry
+        return self._view[offset:offset + length]
+
+    def has_asset(self, relpath: str) -> bool:
+        return relpath in self.assets
+
+    def close(self):
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_campaign(campaign: str, pack_path: Optional[Path] = None, **kwargs) -> WorldContentLoader:
+    """Loader backed by a pack file when given, else by the campaign directory"""
+    if pack_path:
+        pack = WorldPack(pack_path)
+        return WorldContentLoader(pack.campaign, source=pack, **kwargs)
+    return WorldContentLoader(campaign, **kwargs)
+
+
+class _CountingSource:
+    """Wraps a directory source to count how many files it tried to open"""
+
+    def __init__(self, source):
+        self.source = source
+        self.opens = 0
+
+    def list_entity_ids(self, entity_type):
+        return self.source.list_entity_ids(entity_type)
+
+    def read_bytes(self, relpath):
+        self.opens += 1
+        return self.source.read_bytes(relpath)
+
+
+def benchmark_startup(campaign: str, pack_path: Path, rounds: int = 5) -> Dict[str, Any]:
+    """Compare cold-ish startup (open source + load every entity) for directory vs pack"""
+    def run(make_source):
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            source = make_source()
+            loader = WorldContentLoader(campaign, source=source)
+            loader.get_world_overview()
+            entities = loader.load_all()
+            timings.append(time.perf_counter() - start)
+            del loader
+            if isinstance(source, WorldPack):
+                source.close()
+        return {'best_ms': round(min(timings) * 1000, 3),
+                'mean_ms': round(sum(timings) / len(timings) * 1000, 3),
+                'entities': len(entities),
+                'file_opens': source.opens if isinstance(source, _CountingSource) else 1}
+
+    campaign_path = DEFAULT_WORLD_PATH / 'campaigns' / campaign
+    directory = run(lambda: _CountingSource(DirectorySource(campaign_path)))
+    pack = run(lambda: WorldPack(pack_path))
+    return {'campaign': campaign, 'rounds': rounds, 'directory': directory, 'pack': pack,
+            'speedup': round(directory['mean_ms'] / max(pack['mean_ms'], 1e-6), 2)}
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Entity Schema Validation - world/schema/*.schema.json compiled into plain functions
+Each schema is turned into a tree of closures once, so validating an entity is a
+handful of dict lookups and isinstance checks rather than a walk over the schema
+"""
+
+import json
+import re
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Not imported from world_loader - the loader validates through this module
+WORLD_PATH = Path(__file__).parent.parent / 'world'
+SCHEMA_DIR = WORLD_PATH / 'schema'
+
+# Directory name -> schema file for its master JSONs
+ENTITY_SCHEMAS = {
+    'characters': 'character.schema.json',
+    'locations': 'location.schema.json',
+    'items': 'item.schema.json',
+}
+
+# (code, message) - codes match the world linter's so both report the same way
+SchemaError = Tuple[str, str]
+Check = Callable[[Any, List[SchemaError]], None]
+
+JSON_TYPES = {
+    'object': dict,
+    'array': list,
+    'string': str,
+    'boolean': bool,
+    'integer': int,
+    'number': (int, float),
+    'null': type(None),
+}
+
+_JSON_TYPE_NAMES = {dict: 'object', list: 'array', str: 'string', bool: 'boolean', int: 'integer',
+                    float: 'number', type(None): 'null'}
+
+
+class SchemaValidationError(ValueError):
+    """Raised when an entity does not match its schema"""
+
+    def __init__(self, entity_id: str, errors: List[SchemaError]):
+        self.entity_id = entity_id
+        self.errors = errors
+        super().__init__(f"{entity_id}: " + '; '.join(message for _, message in errors))
+
+
+def _type_name(value) -> str:
+    return _JSON_TYPE_NAMES.get(type(value), type(value).__name__)
+
+
+def _field(path: str, key) -> str:
+    if isinstance(key, int):
+        return f'{path}[{key}]'
+    return f'{path}.{key}' if path else key
+
+
+def _label(path: str) -> str:
+    return f"'{path}'" if path else 'entity'
+
+
+class SchemaCompiler:
+    """Compiles the subset of JSON Schema (draft-07) the world schemas use
+
+    Supported: type, enum, const, pattern, minLength, required, properties,
+    additionalProperties, items, minItems, minimum, maximum, allOf and $ref to
+    another file in the same directory. Field paths are baked in at compile
+    time, so a valid entity never builds a string.
+    """
+
+    def __init__(self, schema_dir: Path = SCHEMA_DIR):
+        self.schema_dir = Path(schema_dir)
+        self._schemas: Dict[str, Dict[str, Any]] = {}
+        self._compiled: Dict[Tuple[str, str], Check] = {}
+
+    def load(self, name: str) -> Dict[str, Any]:
+        if name not in self._schemas:
+            with open(self.schema_dir / name, 'r', encoding='utf-8') as f:
+                self._schemas[name] = json.load(f)
+        return self._schemas[name]
+
+    def compile_file(self, name: str, path: str = '') -> Check:
+        if (name, path) not in self._compiled:
+            self._compiled[(name, path)] = self.compile(self.load(name), path)
+        return self._compiled[(name, path)]
+
+    def compile(self, schema: Dict[str, Any], path: str = '') -> Check:
+        label = _label(path)
+        if schema.get('type') == 'string' and set(schema) <= _STRING_KEYWORDS:
+            return self._compile_string(schema, label)
+        checks: List[Check] = []
+
+        if '$ref' in schema:
+            ref = schema['$ref']
+            if not ref.endswith('.schema.json'):
+                raise ValueError(f"Unsupported $ref {ref!r} - only sibling schema files are supported")
+            checks.append(self.compile_file(ref, path))
+
+        for subschema in schema.get('allOf', []):
+            checks.append(self.compile(subschema, path))
+
+        type_check = None
+        if 'type' in schema:
+            names = schema['type'] if isinstance(schema['type'], list) else [schema['type']]
+            expected = tuple(t for name in names for t in
+                             (JSON_TYPES[name] if isinstance(JSON_TYPES[name], tuple) else (JSON_TYPES[name],)))
+            allow_bool = bool in expected
+            wanted = ' or '.join(names)
+
+            def type_check(value, errors):
+                if not isinstance(value, expected) or (not allow_bool and isinstance(value, bool)):
+                    errors.append(('wrong-type', f"{label} should be {wanted}, got {_type_name(value)}"))
+                    return False
+                return True
+
+        if 'const' in schema:
+            const = schema['const']
+
+            def check_const(value, errors):
+                if value != const:
+                    errors.append(('bad-value', f"{label} must be {const!r} (got {value!r})"))
+            checks.append(check_const)
+
+        if 'enum' in schema:
+            allowed = frozenset(v for v in schema['enum'] if not isinstance(v, (dict, list)))
+            listed = ', '.join(str(v) for v in schema['enum'])
+
+            def check_enum(value, errors):
+                if isinstance(value, (dict, list)) or value not in allowed:
+                    errors.append(('bad-value', f"{label} must be one of {listed} (got {value!r})"))
+            checks.append(check_enum)
+
+        if 'pattern' in schema:
+            search = re.compile(schema['pattern']).search
+            pattern = schema['pattern']
+
+            def check_pattern(value, errors):
+                if isinstance(value, str) and not search(value):
+                    errors.append(('bad-value', f"{label} does not match {pattern} (got {value!r})"))
+            checks.append(check_pattern)
+
+        if 'minLength' in schema:
+            min_length = schema['minLength']
+
+            def check_min_length(value, errors):
+                if isinstance(value, str) and len(value) < min_length:
+                    errors.append(('bad-value', f"{label} is shorter than {min_length}"))
+            checks.append(check_min_length)
+
+        for keyword, compare, word in (('minimum', lambda v, b: v < b, 'below'),
+                                       ('maximum', lambda v, b: v > b, 'above')):
+            if keyword in schema:
+                bound = schema[keyword]
+
+                def check_bound(value, errors, bound=bound, compare=compare, word=word):
+                    if isinstance(value, (int, float)) and not isinstance(value, bool) and compare(value, bound):
+                        errors.append(('bad-value', f"{label} is {word} {bound}"))
+                checks.append(check_bound)
+
+        if 'required' in schema:
+            required = tuple((key, _field(path, key)) for key in schema['required'])
+
+            def check_required(value, errors):
+                if isinstance(value, dict):
+                    for key, field in required:
+                        if key not in value:
+                            errors.append(('missing-field', f"missing '{field}'"))
+            checks.append(check_required)
+
+        if 'properties' in schema:
+            properties = tuple((key, self.compile(sub, _field(path, key)))
+                               for key, sub in schema['properties'].items())
+
+            def check_properties(value, errors):
+                if isinstance(value, dict):
+                    for key, check in properties:
+                        if key in value:
+                            check(value[key], errors)
+            checks.append(check_properties)
+
+        additional = schema.get('additionalProperties', True)
+        if additional is not True:
+            known = frozenset(schema.get('properties', {}))
+            extra = self.compile(additional, _field(path, '*')) if isinstance(additional, dict) else None
+
+            def check_additional(value, errors):
+                if isinstance(value, dict):
+                    for key, item in value.items():
+                        if key in known:
+                            continue
+                        if extra is not None:
+                            extra(item, errors)
+                        else:
+                            errors.append(('unknown-field', f"unexpected '{_field(path, key)}'"))
+            checks.append(check_additional)
+
+        if 'items' in schema or 'minItems' in schema:
+            item_check = self.compile(schema['items'], f'{path}[]') if 'items' in schema else None
+            min_items = schema.get('minItems', 0)
+
+            def check_items(value, errors):
+                if isinstance(value, list):
+                    if len(value) < min_items:
+                        errors.append(('bad-value', f"{label} needs at least {min_items} items"))
+                    if item_check is not None:
+                        for item in value:
+                            item_check(item, errors)
+            checks.append(check_items)
+
+        checks = tuple(checks)
+        if type_check is None:
+            if len(checks) == 1:
+                return checks[0]
+
+            def validate(value, errors):
+                for check in checks:
+                    check(value, errors)
+        else:
+            def validate(value, errors):
+                if type_check(value, errors):
+                    for check in checks:
+                        check(value, errors)
+        return validate
+
+    @staticmethod
+    def _compile_string(schema: Dict[str, Any], label: str) -> Check:
+        """Leaf string schemas (the bulk of every entity) fold into a single function"""
+        min_length = schema.get('minLength', 0)
+        search = re.compile(schema['pattern']).search if 'pattern' in schema else None
+        pattern = schema.get('pattern')
+        allowed = frozenset(schema['enum']) if 'enum' in schema else None
+        listed = ', '.join(str(v) for v in schema.get('enum', []))
+
+        def check_string(value, errors):
+            if type(value) is not str:
+                errors.append(('wrong-type', f"{label} should be string, got {_type_name(value)}"))
+                return
+            if len(value) < min_length:
+                errors.append(('bad-value', f"{label} is shorter than {min_length}"))
+            if search is not None and not search(value):
+                errors.append(('bad-value', f"{label} does not match {pattern} (got {value!r})"))
+            if allowed is not None and value not in allowed:
+                errors.append(('bad-value', f"{label} must be one of {listed} (got {value!r})"))
+        return check_string
+
+
+# Keywords the single-function string fast path understands
+_STRING_KEYWORDS = frozenset(('type', 'minLength', 'pattern', 'enum', 'description', 'title'))
+
+
+@lru_cache(maxsize=None)
+def _compiler(schema_dir: str) -> SchemaCompiler:
+    return SchemaCompiler(Path(schema_dir))
+
+
+def get_validator(entity_type: str, schema_dir: Optional[Path] = None) -> Callable[[Dict[str, Any]], List[SchemaError]]:
+    """Compiled validator for an entity directory (characters, locations, items), cached per process"""
+    compiler = _compiler(str(schema_dir or SCHEMA_DIR))
+    check = compiler.compile_file(ENTITY_SCHEMAS.get(entity_type, 'base_entity.schema.json'))
+
+    def validator(master: Dict[str, Any]) -> List[SchemaError]:
+        errors: List[SchemaError] = []
+        check(master, errors)
+        # allOf branches can report the same problem twice
+        return list(dict.fromkeys(errors)) if errors else errors
+    return validator
+
+
+def validate_entity(entity_type: str, master: Dict[str, Any], schema_dir: Optional[Path] = None) -> List[SchemaError]:
+    """Schema errors for one master JSON (empty when valid)"""
+    return get_validator(entity_type, schema_dir)(master)
+
+
+def check_entity(entity_type: str, master: Dict[str, Any], schema_dir: Optional[Path] = None):
+    """Raise SchemaValidationError unless the master JSON is valid"""
+    errors = validate_entity(entity_type, master, schema_dir)
+    if errors:
+        raise SchemaValidationError(str(master.get('id', '?')) if isinstance(master, dict) else '?', errors)
+
+
+def validate_many(entities, schema_dir: Optional[Path] = None) -> Dict[Tuple[str, str], List[SchemaError]]:
+    """Validate (entity_type, master) pairs in bulk, returning only the invalid ones"""
+    validators = {}
+    invalid = {}
+    for entity_type, master in entities:
+        if entity_type not in validators:
+            validators[entity_type] = get_validator(entity_type, schema_dir)
+        errors = validators[entity_type](master)
+        if errors:
+            invalid[(entity_type, str(master.get('id', '?')) if isinstance(master, dict) else '?')] = errors
+    return invalid
+
+
+def benchmark_validation(count: int = 100_000, schema_dir: Optional[Path] = None) -> Dict[str, Any]:
+    """Validations per second over masters shaped like the shipped campaign"""
+    samples = []
+    for entity_type, type_name in (('characters', 'character'), ('locations', 'location'), ('items', 'item')):
+        with open(WORLD_PATH / 'templates' / f'{type_name}_template.json', 'r', encoding='utf-8') as f:
+            samples.append((entity_type, json.load(f)))
+
+    start = time.perf_counter()
+    _compiler.cache_clear()
+    for entity_type, _ in samples:
+        get_validator(entity_type, schema_dir)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    entities = [samples[i % len(samples)] for i in range(count)]
+    start = time.perf_counter()
+    invalid = validate_many(entities, schema_dir)
+    seconds = time.perf_counter() - start
+    return {'entities': count, 'invalid': len(invalid), 'compile_ms': round(compile_ms, 2),
+            'seconds': round(seconds, 3), 'per_second': int(count / max(seconds, 1e-9)),
+            'us_per_entity': round(seconds / count * 1e6, 2)}
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+SQLite World Store - an indexed, transactional home for campaign data
+Imports from and exports to the world/campaigns directory layout written by EntityCreator
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+from world_loader import ENTITY_TYPES, DEFAULT_WORLD_PATH, RELATIONSHIP_FILES, is_master_file, split_relpath
+
+DEFAULT_DB_PATH = DEFAULT_WORLD_PATH / 'world.db'
+
+TEXT_SUFFIXES = ('.md', '.json', '.txt')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (
+    campaign TEXT NOT NULL,
+    entity_type TEXT NOT NULL,
+    entity_id TEXT NOT NULL,
+    name TEXT,
+    status TEXT,
+    ai_priority TEXT,
+    master TEXT NOT NULL,
+    PRIMARY KEY (campaign, entity_type, entity_id)
+);
+CREATE INDEX IF NOT EXISTS idx_entities_status ON entities (campaign, status);
+CREATE INDEX IF NOT EXISTS idx_entities_priority ON entities (campaign, ai_priority);
+
+CREATE TABLE IF NOT EXISTS files (
+    campaign TEXT NOT NULL,
+    relpath TEXT NOT NULL,
+    entity_type TEXT NOT NULL DEFAULT '',
+    entity_id TEXT NOT NULL DEFAULT '',
+    section TEXT NOT NULL DEFAULT '',
+    content BLOB NOT NULL,
+    PRIMARY KEY (campaign, relpath)
+);
+CREATE INDEX IF NOT EXISTS idx_files_entity ON files (campaign, entity_type, entity_id);
+
+CREATE TABLE IF NOT EXISTS tags (
+    campaign TEXT NOT NULL,
+    entity_type TEXT NOT NULL,
+    entity_id TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (campaign, tag, entity_type, entity_id)
+);
+
+CREATE TABLE IF NOT EXISTS relationships (
+    campaign TEXT NOT NULL,
+    entity_type TEXT NOT NULL,
+    entity_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    target TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_relationships_source ON relationships (campaign, entity_type, entity_id);
+CREATE INDEX IF NOT EXISTS idx_relationships_target ON relationships (campaign, target);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS content_fts USING fts5(
+    body,
+    campaign UNINDEXED,
+    relpath UNINDEXED,
+    entity_type UNINDEXED,
+    entity_id UNINDEXED,
+    section UNINDEXED
+);
+"""
+
+
+def has_fts5() -> bool:
+    """Whether this Python's SQLite was built with FTS5"""
+    try:
+        sqlite3.connect(':memory:').execute('CREATE VIRTUAL TABLE probe USING fts5(x)')
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+HAS_FTS5 = has_fts5()
+
+
+def fts_query(text: str) -> str:
+    """Quote each word so player text ("Yorick's skull") is never parsed as FTS syntax"""
+    return ' '.join('"%s"' % word.replace('"', '""') for word in text.split())
+
+
+class WorldStore:
+    """SQLite-backed campaign storage with tag, type and full-text queries"""
+
+    def __init__(self, db_path: Path = DEFAULT_DB_PATH, read_only: bool = False):
+        self.db_path = Path(db_path)
+        self.read_only = read_only
+        self.conn = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.read_only:
+            conn = sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True, check_same_thread=False)
+        else:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            # WAL lets every server worker read while an import is writing
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+            if HAS_FTS5:
+                conn.executescript(FTS_SCHEMA)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def close(self):
+        self.conn.close()
+
+    def reopen(self):
+        """Replace the connection with a fresh one - for a forked child, which must not share its parent's"""
+        try:
+            self.conn.close()
+        except sqlite3.Error:
+            pass
+        self.conn = self._connect()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def import_campaign(self, campaign_path: Path, campaign: Optional[str] = None,
+                        include_assets: bool = True) -> Dict[str, int]:
+        """Replace a campaign's rows with the contents of a campaign directory, in one transaction"""
+        campaign_path = Path(campaign_path)
+        campaign = campaign or campaign_path.name
+
+        master_ids = {}
+        for entity_type in ENTITY_TYPES:
+            entity_dir = campaign_path / entity_type
+            if entity_dir.is_dir():
+                ids = [path.stem for path in entity_dir.glob('*.json') if is_master_file(path)]
+                master_ids[entity_type] = sorted(ids, key=lambda entity_id: (-len(entity_id), entity_id))
+
+        counts = {'entities': 0, 'files': 0, 'assets': 0}
+        with self.conn:
+            self._delete_campaign(campaign)
+            for path in sorted(campaign_path.rglob('*')):
+                if not path.is_file():
+                    continue
+                relpath = path.relative_to(campaign_path).as_posix()
+                is_text = path.suffix in TEXT_SUFFIXES
+                if not is_text and not include_assets:
+                    continue
+                data = path.read_bytes()
+                entity_type, entity_id, section = split_relpath(relpath, master_ids)
+                self._put_file(campaign, relpath, entity_type, entity_id, section, data)
+                counts['files' if is_text else 'assets'] += 1
+
+                if section == 'master':
+                    self._put_entity(campaign, entity_type, entity_id, json.loads(data))
+                    counts['entities'] += 1
+                elif section in RELATIONSHIP_FILES:
+                    self._put_relationships(campaign, entity_type, entity_id, section, json.loads(data))
+        return counts
+
+    def export_campaign(self, campaign: str, out_path: Path) -> int:
+        """Write a campaign back out in the directory layout, byte for byte"""
+        out_path = Path(out_path)
+        written = 0
+        for row in self.conn.execute('SELECT relpath, content FROM files WHERE campaign = ? ORDER BY relpath',
+                                     (campaign,)):
+            target = out_path / row['relpath']
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(row['content'])
+            written += 1
+        return written
+
+    def _delete_campaign(self, campaign: str):
+        for table in ('entities', 'files', 'tags', 'relationships'):
+            self.conn.execute(f'DELETE FROM {table} WHERE campaign = ?', (campaign,))
+        if HAS_FTS5:
+            self.conn.execute('DELETE FROM content_fts WHERE campaign = ?', (campaign,))
+
+    def _put_file(self, campaign, relpath, entity_type, entity_id, section, data: bytes):
+        self.conn.execute(
+            'INSERT OR REPLACE INTO files (campaign, relpath, entity_type, entity_id, section, content) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (campaign, relpath, entity_type, entity_id, section, data))
+        if HAS_FTS5 and relpath.endswith('.md'):
+            self.conn.execute('DELETE FROM content_fts WHERE campaign = ? AND relpath = ?', (campaign, relpath))
+            self.conn.execute(
+                'INSERT INTO content_fts (body, campaign, relpath, entity_type, entity_id, section) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (data.decode('utf-8'), campaign, relpath, entity_type, entity_id, section))
+
+    def _put_entity(self, campaign, entity_type, entity_id, master: Dict[str, Any]):
+        metadata = master.get('metadata', {})
+        self.conn.execute(
+            'INSERT OR REPLACE INTO entities (campaign, entity_type, entity_id, name, status, ai_priority, master) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (campaign, entity_type, entity_id, master.get('name'), metadata.get('status'),
+             metadata.get('ai_priority'), json.dumps(master)))
+        self.conn.execute('DELETE FROM tags WHERE campaign = ? AND entity_type = ? AND entity_id = ?',
+                          (campaign, entity_type, entity_id))
+        self.conn.executemany(
+            'INSERT OR IGNORE INTO tags (campaign, entity_type, entity_id, tag) VALUES (?, ?, ?, ?)',
+            [(campaign, entity_type, entity_id, tag) for tag in master.get('tags', [])])
+
+    def _put_relationships(self, campaign, entity_type, entity_id, section, data: Dict[str, Any]):
+        self.conn.execute(
+            'DELETE FROM relationships WHERE campaign = ? AND entity_type = ? AND entity_id = ? AND kind IN (%s)'
+            % ','.join('?' * len(RELATIONSHIP_FILES[section])),
+            (campaign, entity_type, entity_id) + RELATIONSHIP_FILES[section])
+        rows = []
+        for kind in RELATIONSHIP_FILES[section]:
+            for target in data.get(kind, []):
+                if isinstance(target, str):
+                    rows.append((campaign, entity_type, entity_id, kind, target))
+        self.conn.executemany(
+            'INSERT INTO relationships (campaign, entity_type, entity_id, kind, target) VALUES (?, ?, ?, ?, ?)', rows)
+
+    def write_file(self, campaign: str, relpath: str, data: bytes):
+        """Transactionally replace one file, keeping entity, tag and relationship rows in step"""
+        master_ids = {entity_type: self.list_entity_ids(campaign, entity_type) for entity_type in ENTITY_TYPES}
+        parts = relpath.split('/')
+        if len(parts) == 2 and parts[0] in master_ids and is_master_file(parts[1]):
+            master_ids[parts[0]].append(Path(parts[1]).stem)
+        for ids in master_ids.values():
+            ids.sort(key=lambda entity_id: (-len(entity_id), entity_id))
+
+        entity_type, entity_id, section = split_relpath(relpath, master_ids)
+        with self.conn:
+            self._put_file(campaign, relpath, entity_type, entity_id, section, data)
+            if section == 'master':
+                self._put_entity(campaign, entity_type, entity_id, json.loads(data))
+            elif section in RELATIONSHIP_FILES:
+                self._put_relationships(campaign, entity_type, entity_id, section, json.loads(data))
+
+    def list_entity_ids(self, campaign: str, entity_type: str) -> List[str]:
+        rows = self.conn.execute(
+            'SELECT entity_id FROM entities WHERE campaign = ? AND entity_type = ? ORDER BY entity_id',
+            (campaign, entity_type))
+        return [row['entity_id'] for row in rows]
+
+    def read_bytes(self, campaign: str, relpath: str) -> Optional[bytes]:
+        row = self.conn.execute('SELECT content FROM files WHERE campaign = ? AND relpath = ?',
+                                (campaign, relpath)).fetchone()
+        return row['content'] if row else None
+
+    def get_entity(self, campaign: str, entity_type: str, entity_id: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(
+            'SELECT master FROM entities WHERE campaign = ? AND entity_type = ? AND entity_id = ?',
+            (campaign, entity_type, entity_id)).fetchone()
+        return json.loads(row['master']) if row else None
+
+    def query(self, campaign: str, entity_type: Optional[str] = None, tags: Optional[List[str]] = None,
+              status: Optional[str] = None, ai_priority: Optional[str] = None) -> List[Dict[str, str]]:
+        """Entities matching every given filter (all tags must be present)"""
+        sql = 'SELECT e.entity_type, e.entity_id, e.name FROM entities e WHERE e.campaign = ?'
+        params: List[Any] = [campaign]
+        if entity_type:
+            sql += ' AND e.entity_type = ?'
+            params.append(entity_type)
+        if status:
+            sql += ' AND e.status = ?'
+            params.append(status)
+        if ai_priority:
+            sql += ' AND e.ai_priority = ?'
+            params.append(ai_priority)
+        for tag in tags or []:
+            sql += (' AND EXISTS (SELECT 1 FROM tags t WHERE t.campaign = e.campaign AND t.tag = ?'
+                    ' AND t.entity_type = e.entity_type AND t.entity_id = e.entity_id)')
+            params.append(tag)
+        sql += ' ORDER BY e.entity_type, e.entity_id'
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def related(self, campaign: str, entity_type: str, entity_id: str) -> Dict[str, List[str]]:
+        """Outgoing relationship and inhabitant references, grouped by kind"""
+        grouped: Dict[str, List[str]] = {}
+        for row in self.conn.execute(
+                'SELECT kind, target FROM relationships WHERE campaign = ? AND entity_type = ? AND entity_id = ? '
+                'ORDER BY rowid', (campaign, entity_type, entity_id)):
+            grouped.setdefault(row['kind'], []).append(row['target'])
+        return grouped
+
+    def search(self, campaign: str, text: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Full-text search over markdown content, best matches first"""
+        if HAS_FTS5:
+            rows = self.conn.execute(
+                "SELECT relpath, entity_type, entity_id, section, snippet(content_fts, 0, '[', ']', '...', 12) AS snippet "
+                'FROM content_fts WHERE content_fts MATCH ? AND campaign = ? ORDER BY bm25(content_fts) LIMIT ?',
+                (fts_query(text), campaign, limit))
+            return [dict(row) for row in rows]
+
+        # Without FTS5 fall back to a substring scan
+        rows = self.conn.execute(
+            "SELECT relpath, entity_type, entity_id, section, '' AS snippet FROM files "
+            "WHERE campaign = ? AND relpath LIKE '%.md' AND CAST(content AS TEXT) LIKE ? ORDER BY relpath LIMIT ?",
+            (campaign, f'%{text}%', limit))
+        return [dict(row) for row in rows]
+
+
+class StoreSource:
+    """Adapts a WorldStore campaign into a WorldContentLoader source"""
+
+    def __init__(self, store: WorldStore, campaign: str):
+        self.store = store
+        self.campaign = campaign
+
+    def list_entity_ids(self, entity_type: str) -> List[str]:
+        return self.store.list_entity_ids(self.campaign, entity_type)
+
+    def read_bytes(self, relpath: str) -> Optional[bytes]:
+        return self.store.read_bytes(self.campaign, relpath)
@@ -1,13 +1,104 @@
 const { Anthropic } = require('@anthropic-ai/sdk');
 const fs = require('fs');
 const path = require('path');
+const crypto = require('crypto');
+
+// Same fallback estimate as backend/token_counter.py heuristic_token_count
+function heuristicTokenCount(text) {
+  const pieces = text.match(/[A-Za-z]+|\d+|[^\sA-Za-z\d]/g) || [];
+  let count = 0;
+  for (const piece of pieces) {
+    count += piece.length > 6 ? Math.max(1, Math.ceil(piece.length / 4)) : 1;
+  }
+  return count;
+}
+
+// Markdown bodies are loaded on demand into an LRU capped at this many bytes
+const TEXT_CACHE_BYTES = 8 * 1024 * 1024;
 
 // World-aware content loader for dynamic DM responses
 class WorldContentLoader {
-  constructor() {
+  constructor(textCacheBytes = TEXT_CACHE_BYTES) {
     this.worldPath = path.join(__dirname, '../../world/campaigns/shakespeare_scifi');
     this.entityCache = new Map();
     this.worldOverview = null;
+    // sha256 of a block's text -> its token count, so repeated blocks are never recounted
+    this.tokenCounts = new Map();
+    // Map iteration order doubles as LRU order - oldest first
+    this.textCache = new Map();
+    this.textCacheBytes = 0;
+    this.textCacheLimit = textCacheBytes;
+    this.textCacheStats = { hits: 0, misses: 0, evictions: 0 };
+    // Formatted context blocks, keyed by the loaded entity object. World files are
+    // fixed for a deploy, so a block lives as long as the function instance
+    this.contextBlocks = new WeakMap();
+    this.staticBlocks = new Map();
+  }
+
+  // Read a markdown body through the byte-budgeted LRU
+  getText(filePath) {
+    const cached = this.textCache.get(filePath);
+    if (cached !== undefined) {
+      this.textCache.delete(filePath);
+      this.textCache.set(filePath, cached);
+      this.textCacheStats.hits++;
+      return cached;
+    }
+
+    this.textCacheStats.misses++;
+    let text;
+    try {
+      text = fs.readFileSync(filePath, 'utf8');
+    } catch (error) {
+      return undefined;
+    }
+    const size = Buffer.byteLength(text, 'utf8');
+    if (size <= this.textCacheLimit) {
+      this.textCache.set(filePath, text);
+      this.textCacheBytes += size;
+      for (const [oldPath, oldText] of this.textCache) {
+        if (this.textCacheBytes <= this.textCacheLimit) break;
+        this.textCache.delete(oldPath);
+        this.textCacheBytes -= Buffer.byteLength(oldText, 'utf8');
+        this.textCacheStats.evictions++;
+      }
+    }
+    return text;
+  }
+
+  countTokens(text) {
+    return this.makeBlock(text).tokens;
+  }
+
+  // Text with its content hash and token count, so prompts can be summed instead of recounted
+  makeBlock(text) {
+    const hash = crypto.createHash('sha256').update(text, 'utf8').digest('hex');
+    let tokens = this.tokenCounts.get(hash);
+    if (tokens === undefined) {
+      tokens = heuristicTokenCount(text);
+      this.tokenCounts.set(hash, tokens);
+    }
+    return { text, hash, tokens };
+  }
+
+  // Block for text that never changes within a deploy (prompt preamble, overview, guidelines)
+  getStaticBlock(name, build) {
+    if (!this.staticBlocks.has(name)) {
+      this.staticBlocks.set(name, this.makeBlock(build()));
+    }
+    return this.staticBlocks.get(name);
+  }
+
+  // Formatted context for an entity, with one sub-block per section line
+  getContextBlock(entity, formatSections) {
+    let block = this.contextBlocks.get(entity);
+    if (!block) {
+      const sections = formatSections.call(this, entity).map(([section, line]) => ({ section, ...this.makeBlock(line) }));
+      block = this.makeBlock(sections.map(section => section.text).join(''));
+      block.sections = sections;
+      this.contextBlocks.set(entity, block);
+    }
+    return block;
   }
 
   // Load world overview (cached)
@@ -59,7 +150,11 @@ A Shakespeare-inspired sci-fantasy setting where fallen technology has become ma
       for (const fileType of contentFiles) {
         const filePath = path.join(entityDir, `${entityId}_${fileType}.md`);
         if (fs.existsSync(filePath)) {
-          entityData.content[fileType] = fs.readFileSync(filePath, 'utf8');
+          // Only the path stays resident - the text is fetched through the LRU when read
+          Object.defineProperty(entityData.content, fileType, {
+            get: () => this.getText(filePath),
+            enumerable: true
+          });
         }
       }
 
@@ -140,9 +235,14 @@ A Shakespeare-inspired sci-fantasy setting where fallen technology has become ma
 
   // Build context-aware system prompt
   buildWorldAwarePrompt(userInput, conversationHistory = []) {
+    return this.buildWorldAwarePromptBlock(userInput, conversationHistory).text;
+  }
+
+  // Assemble the system prompt from cached blocks - only string joins and token sums per request
+  buildWorldAwarePromptBlock(userInput, conversationHistory = []) {
     const detectedEntities = this.analyzeInput(userInput, conversationHistory);
-    
-    let systemPrompt = `You are an expert Dungeon Master running the Stratford Nexus campaign, a Shakespeare-inspired sci-fantasy adventure where fallen technology has become magic. Your role is to:
+
+    const preamble = this.getStaticBlock('preamble', () => `You are an expert Dungeon Master running the Stratford Nexus campaign, a Shakespeare-inspired sci-fantasy adventure where fallen technology has become magic. Your role is to:
 
 1. Create vivid, engaging scenarios that respond to player actions
 2. Maintain narrative consistency with the established world
@@ -162,126 +262,129 @@ Guidelines:
 - Technology often malfunctions into magical effects
 - Maintain the Shakespearean elegant speech patterns for important NPCs
 
-`;
+`);
 
     // Add world context
-    const worldOverview = this.getWorldOverview();
-    systemPrompt += `\n<world_context>\n${worldOverview.slice(0, 1500)}\n</world_context>\n`;
+    const worldContext = this.getStaticBlock('world', () =>
+      `\n<world_context>\n${this.getWorldOverview().slice(0, 1500)}\n</world_context>\n`);
 
     // Add relevant entities
-    let entityContext = '';
-    let tokenCount = systemPrompt.length / 4; // Rough token estimate
-
-    // Load characters first (highest priority)
-    for (const characterId of detectedEntities.characters.slice(0, 2)) { // Limit to 2 characters
-      const character = this.loadEntity('characters', characterId);
-      if (character && tokenCount < 8000) {
-        entityContext += this.formatCharacterContext(character);
-        tokenCount += 800; // Estimate
-      }
-    }
-
-    // Load locations
-    for (const locationId of detectedEntities.locations.slice(0, 1)) { // Limit to 1 location
-      const location = this.loadEntity('locations', locationId);
-      if (location && tokenCount < 8000) {
-        entityContext += this.formatLocationContext(location);
-        tokenCount += 600; // Estimate
+    const entityBlocks = [];
+    let tokenCount = preamble.tokens + worldContext.tokens;
+
+    const addEntities = (entityType, ids, formatSections) => {
+      for (const entityId of ids) {
+        const entity = this.loadEntity(entityType, entityId);
+        if (entity && entity.master && tokenCount < 8000) {
+          const block = this.getContextBlock(entity, formatSections);
+          entityBlocks.push(block.text);
+          tokenCount += block.tokens;
+        }
       }
-    }
+    };
 
-    // Load items
-    for (const itemId of detectedEntities.items.slice(0, 2)) { // Limit to 2 items
-      const item = this.loadEntity('items', itemId);
-      if (item && tokenCount < 8000) {
-        entityContext += this.formatItemContext(item);
-        tokenCount += 400; // Estimate
-      }
-    }
+    // Load characters first (highest priority), then locations, then items
+    addEntities('characters', detectedEntities.characters.slice(0, 2), this.characterSections); // Limit to 2 characters
+    addEntities('locations', detectedEntities.locations.slice(0, 1), this.locationSections); // Limit to 1 location
+    addEntities('items', detectedEntities.items.slice(0, 2), this.itemSections); // Limit to 2 items
 
-    if (entityContext) {
-      systemPrompt += `\n<current_entities>\n${entityContext}\n</current_entities>\n`;
+    const parts = [preamble.text, worldContext.text];
+    if (entityBlocks.length > 0) {
+      const wrapper = this.getStaticBlock('entities', () => '\n<current_entities>\n\n</current_entities>\n');
+      parts.push(`\n<current_entities>\n${entityBlocks.join('')}\n</current_entities>\n`);
+      tokenCount += wrapper.tokens;
     }
 
     // Add DM-specific guidelines
-    systemPrompt += `\n<dm_guidelines>
+    const guidelines = this.getStaticBlock('guidelines', () => `\n<dm_guidelines>
 - Reference the loaded entity details naturally in your responses
 - Use character secrets and motivations to drive plot development
 - Incorporate location atmosphere and hidden elements into scene descriptions
 - Remember that items have rich histories and magical properties
 - Maintain consistency with established character relationships and personalities
-</dm_guidelines>`;
+</dm_guidelines>`);
+    parts.push(guidelines.text);
+    tokenCount += guidelines.tokens;
 
-    return systemPrompt;
+    return { text: parts.join(''), tokens: tokenCount };
   }
 
   // Format character data for system prompt
   formatCharacterContext(character) {
     if (!character || !character.master) return '';
-    
-    let context = `\n<character name="${character.master.name}" id="${character.id}">\n`;
-    
+    return this.getContextBlock(character, this.characterSections).text;
+  }
+
+  characterSections(character) {
+    const sections = [['open', `\n<character name="${character.master.name}" id="${character.id}">\n`]];
+
     if (character.content.bio) {
-      context += `Bio: ${character.content.bio.slice(0, 500)}...\n`;
+      sections.push(['bio', `Bio: ${character.content.bio.slice(0, 500)}...\n`]);
     }
-    
+
     if (character.content.secrets) {
-      context += `[DM SECRETS] ${character.content.secrets.slice(0, 400)}...\n`;
+      sections.push(['secrets', `[DM SECRETS] ${character.content.secrets.slice(0, 400)}...\n`]);
     }
-    
+
     if (character.content.dialogue) {
-      context += `Speech Style: ${character.content.dialogue.slice(0, 300)}...\n`;
+      sections.push(['dialogue', `Speech Style: ${character.content.dialogue.slice(0, 300)}...\n`]);
     }
 
     if (character.content.stats_data) {
-      context += `Level: ${character.content.stats_data.level || 'Unknown'}\n`;
+      sections.push(['stats', `Level: ${character.content.stats_data.level || 'Unknown'}\n`]);
     }
-    
-    context += `</character>\n`;
-    return context;
+
+    sections.push(['close', `</character>\n`]);
+    return sections;
   }
 
   // Format location data for system prompt
   formatLocationContext(location) {
     if (!location || !location.master) return '';
-    
-    let context = `\n<location name="${location.master.name}" id="${location.id}">\n`;
-    
+    return this.getContextBlock(location, this.locationSections).text;
+  }
+
+  locationSections(location) {
+    const sections = [['open', `\n<location name="${location.master.name}" id="${location.id}">\n`]];
+
     if (location.content.description) {
-      context += `Description: ${location.content.description.slice(0, 600)}...\n`;
+      sections.push(['description', `Description: ${location.content.description.slice(0, 600)}...\n`]);
     }
-    
+
     if (location.content.secrets) {
-      context += `[DM SECRETS] ${location.content.secrets.slice(0, 400)}...\n`;
+      sections.push(['secrets', `[DM SECRETS] ${location.content.secrets.slice(0, 400)}...\n`]);
     }
 
     if (location.content.inhabitants_data) {
       const characters = location.content.inhabitants_data.characters || [];
       if (characters.length > 0) {
-        context += `Inhabitants: ${characters.slice(0, 3).join(', ')}\n`;
+        sections.push(['inhabitants', `Inhabitants: ${characters.slice(0, 3).join(', ')}\n`]);
       }
     }
-    
-    context += `</location>\n`;
-    return context;
+
+    sections.push(['close', `</location>\n`]);
+    return sections;
   }
 
   // Format item data for system prompt
   formatItemContext(item) {
     if (!item || !item.master) return '';
-    
-    let context = `\n<item name="${item.master.name}" id="${item.id}">\n`;
-    
+    return this.getContextBlock(item, this.itemSections).text;
+  }
+
+  itemSections(item) {
+    const sections = [['open', `\n<item name="${item.master.name}" id="${item.id}">\n`]];
+
     if (item.content.description) {
-      context += `Description: ${item.content.description.slice(0, 400)}...\n`;
+      sections.push(['description', `Description: ${item.content.description.slice(0, 400)}...\n`]);
     }
-    
+
     if (item.content.stats_data) {
-      context += `Properties: ${Object.keys(item.content.stats_data.properties || {}).join(', ')}\n`;
+      sections.push(['stats', `Properties: ${Object.keys(item.content.stats_data.properties || {}).join(', ')}\n`]);
     }
-    
-    context += `</item>\n`;
-    return context;
+
+    sections.push(['close', `</item>\n`]);
+    return sections;
   }
 }
 
@@ -384,7 +487,8 @@ exports.handler = async (event, context) => {
     }
 
     // Build world-aware system prompt
-    const worldAwarePrompt = worldLoader.buildWorldAwarePrompt(userMessage, conversationHistory);
+    const promptBlock = worldLoader.buildWorldAwarePromptBlock(userMessage, conversationHistory);
+    const worldAwarePrompt = promptBlock.text;
     
     // Prepare messages for Anthropic
     const anthropicMessages = messages.filter(msg => msg.role !== 'system');
@@ -422,7 +526,7 @@ exports.handler = async (event, context) => {
           model: 'claude-3-5-haiku-20241022',
           mode: 'live',
           world_aware: true,
-          system_prompt_tokens: Math.floor(worldAwarePrompt.length / 4) // Rough estimate
+          system_prompt_tokens: promptBlock.tokens
         }),
       };
 
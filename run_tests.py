@@ -86,6 +86,11 @@ def main():
     ], 'Server quick test')
     results.append(('Server Test', server_result))
     
+    load_result = run_command([
+        'python', 'backend/load_test.py', '--spawn', '--players', '4', '--turns', '3', '--mode', 'mixed'
+    ], 'Server load smoke test (mock)')
+    results.append(('Load Test', load_result))
+    
     # Summary
     print("\n📊 TEST SUMMARY")
     print("=" * 40)
@@ -6,138 +6,482 @@ Generates images for characters, locations, and items using OpenAI's DALL-E API
 
 import os
 import json
-import requests
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from openai import OpenAI
 import time
 
+from image_journal import ImageJobJournal, DEAD
+from image_manifest import ImageManifest, prompt_hash
+
+try:
+    import requests
+    HAS_REQUESTS = True
+except ImportError:
+    HAS_REQUESTS = False
+
+try:
+    from openai import OpenAI
+    HAS_OPENAI = True
+except ImportError:
+    HAS_OPENAI = False
+
+DALLE_MODEL = "dall-e-3"
+DEFAULT_SIZE = "1024x1024"
+DEFAULT_QUALITY = "standard"
+
+# Images requested at once - the provider's rate limit, not this, should set the pace
+DEFAULT_IMAGE_WORKERS = 4
+# Times one image is retried after a 429 before giving up on it
+MAX_RATE_LIMIT_RETRIES = 6
+# Wait used when a 429 carries no Retry-After header (doubles per retry, with jitter)
+DEFAULT_RETRY_AFTER = 2.0
+MAX_RETRY_AFTER = 60.0
+# Successful calls needed before a throttled limiter lets one more request run
+RECOVERY_SUCCESSES = 5
+
+# Downloads stream in chunks of this size, so memory stays flat whatever the image size
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# (connect, read) timeouts in seconds
+DOWNLOAD_TIMEOUT = (10, 60)
+# Attempts after the first, with full-jitter backoff starting at DOWNLOAD_BACKOFF seconds
+MAX_DOWNLOAD_RETRIES = 4
+DOWNLOAD_BACKOFF = 0.5
+# Download statuses worth retrying; any other error status fails at once
+RETRYABLE_STATUSES = (408, 429, 500, 502, 503, 504)
+
+_NETWORK_ERRORS = (requests.RequestException, OSError) if HAS_REQUESTS else (OSError,)
+
+
+class RateLimited(Exception):
+    """The provider answered 429; retry_after is its Retry-After in seconds, if it sent one"""
+
+    def __init__(self, retry_after=None):
+        self.retry_after = retry_after
+        super().__init__(f"rate limited (retry after {retry_after}s)" if retry_after else "rate limited")
+
+
+def _retry_after(error):
+    """Retry-After of a 429 raised by the OpenAI client or requests, or None if it isn't a 429"""
+    response = getattr(error, 'response', None)
+    status = getattr(error, 'status_code', None) or getattr(response, 'status_code', None)
+    if status != 429:
+        return None
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        return float(headers.get('retry-after') or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class ImageGenerationError(Exception):
+    """Raised when an image was generated but could not be saved"""
+
+
+class DownloadError(Exception):
+    """A download attempt failed in a way worth retrying (the partial file is kept for resuming)"""
+
+
+class AdaptiveLimiter:
+    """Caps in-flight requests, shrinking the cap on 429s and growing it back as calls succeed
+
+    A 429 halves the limit and pauses every worker until its Retry-After has
+    passed; each RECOVERY_SUCCESSES successes in a row raise it by one again, up
+    to the configured maximum.
+    """
+
+    def __init__(self, max_concurrency):
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = self.max_concurrency
+        self.in_flight = 0
+        self.resume_at = 0.0
+        self.throttled = 0
+        self._streak = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                wait = self.resume_at - time.monotonic()
+                if wait <= 0 and self.in_flight < self.limit:
+                    self.in_flight += 1
+                    return
+                self._cond.wait(timeout=wait if wait > 0 else None)
+
+    def release(self, ok=True):
+        with self._cond:
+            self.in_flight -= 1
+            if ok:
+                self._streak += 1
+                if self._streak >= RECOVERY_SUCCESSES and self.limit < self.max_concurrency:
+                    self.limit += 1
+                    self._streak = 0
+            self._cond.notify_all()
+
+    def backoff(self, retry_after):
+        """Called on a 429 - pause everyone for retry_after seconds and halve concurrency"""
+        with self._cond:
+            self.throttled += 1
+            self._streak = 0
+            self.limit = max(1, self.limit // 2)
+            self.resume_at = max(self.resume_at, time.monotonic() + retry_after)
+            self._cond.notify_all()
+
+
 class WorldImageGenerator:
-    def __init__(self, api_key=None):
-        self.client = OpenAI(api_key=api_key or os.getenv('OPENAI_API_KEY'))
+    def __init__(self, api_key=None, client=None, session=None):
+        if client is None and not HAS_OPENAI:
+            raise ImportError("openai is required for image generation. Install with: pip install openai")
+        self.client = client or OpenAI(api_key=api_key or os.getenv('OPENAI_API_KEY'))
         self.world_path = Path(__file__).parent.parent.parent / 'world'
-        
-    def generate_image(self, prompt, filename, size="1024x1024", quality="standard"):
-        """Generate an image using DALL-E and save it"""
+        self.limiter = None
+        self._session = session
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """One pooled HTTP session shared by every download thread"""
+        with self._session_lock:
+            if self._session is None:
+                if not HAS_REQUESTS:
+                    raise ImportError("requests is required to download images. Install with: pip install requests")
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=DEFAULT_IMAGE_WORKERS * 4)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._session = session
+            return self._session
+
+    def _request_image(self, prompt, size, quality):
+        """One DALL-E call; raises RateLimited on a 429"""
         try:
-            print(f"🎨 Generating image: {filename}")
-            print(f"📝 Prompt: {prompt}")
-            
             response = self.client.images.generate(
-                model="dall-e-3",
+                model=DALLE_MODEL,
                 prompt=prompt,
                 size=size,
                 quality=quality,
                 n=1,
             )
-            
-            image_url = response.data[0].url
-            
-            # Download and save the image
-            img_response = requests.get(image_url)
-            if img_response.status_code == 200:
-                with open(filename, 'wb') as f:
-                    f.write(img_response.content)
-                print(f"✅ Saved: {filename}")
-                return True
-            else:
-                print(f"❌ Failed to download image for {filename}")
+        except Exception as e:
+            retry_after = _retry_after(e)
+            if retry_after is not None:
+                raise RateLimited(retry_after)
+            raise
+        return response.data[0].url
+
+    def _generate_url(self, prompt, size, quality):
+        """Image URL for a prompt, waiting out 429s through the shared limiter when one is running"""
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            if self.limiter:
+                self.limiter.acquire()
+            try:
+                url = self._request_image(prompt, size, quality)
+            except RateLimited as e:
+                if self.limiter:
+                    self.limiter.release(ok=False)
+                if attempt == MAX_RATE_LIMIT_RETRIES:
+                    raise
+                wait = e.retry_after or min(MAX_RETRY_AFTER, DEFAULT_RETRY_AFTER * 2 ** attempt)
+                wait += random.uniform(0, wait * 0.1)
+                print(f"⏳ Rate limited, retrying in {wait:.1f}s")
+                if self.limiter:
+                    self.limiter.backoff(wait)
+                else:
+                    time.sleep(wait)
+                continue
+            except Exception:
+                if self.limiter:
+                    self.limiter.release(ok=False)
+                raise
+            if self.limiter:
+                self.limiter.release()
+            return url
+
+    def _download_attempt(self, image_url, part_path):
+        """Stream the image into part_path, resuming from what it already holds"""
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+        with self.session.get(image_url, stream=True, timeout=DOWNLOAD_TIMEOUT, headers=headers) as response:
+            if response.status_code == 416:
+                # Our partial file doesn't fit what the server has - start over
+                part_path.unlink(missing_ok=True)
+                raise DownloadError("range not satisfiable")
+            if response.status_code in RETRYABLE_STATUSES:
+                raise DownloadError(f"HTTP {response.status_code}")
+            if response.status_code not in (200, 206):
                 return False
-                
+            if response.status_code == 200:
+                offset = 0
+            length = response.headers.get('Content-Length')
+            expected = offset + int(length) if length else None
+
+            with open(part_path, 'ab' if offset else 'wb') as f:
+                for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+                written = f.tell()
+        if expected is not None and written != expected:
+            raise DownloadError(f"got {written} of {expected} bytes")
+        return True
+
+    def download_image(self, image_url, filename):
+        """Fetch a generated image to filename
+
+        The body streams into a hidden .part file beside the target, which is
+        renamed over it only once complete. Failed attempts are retried with
+        jittered backoff and resume with a Range request from the partial file.
+        Resuming never crosses calls: a .part left by an earlier run may hold
+        the start of a different image, so it is discarded up front.
+        """
+        filename = Path(filename)
+        part_path = filename.with_name(f".{filename.name}.part")
+        part_path.unlink(missing_ok=True)
+        for attempt in range(MAX_DOWNLOAD_RETRIES + 1):
+            try:
+                if not self._download_attempt(image_url, part_path):
+                    part_path.unlink(missing_ok=True)
+                    return False
+                os.replace(part_path, filename)
+                return True
+            except (DownloadError,) + _NETWORK_ERRORS as e:
+                if attempt == MAX_DOWNLOAD_RETRIES:
+                    print(f"❌ Download failed for {filename.name} after {attempt + 1} attempts: {e}")
+                    part_path.unlink(missing_ok=True)
+                    return False
+                time.sleep(random.uniform(0, DOWNLOAD_BACKOFF * 2 ** attempt))
+        return False
+
+    def _generate(self, prompt, filename, size=DEFAULT_SIZE, quality=DEFAULT_QUALITY):
+        """Generate and save one image, raising on failure"""
+        print(f"🎨 Generating image: {filename}")
+        print(f"📝 Prompt: {prompt}")
+
+        image_url = self._generate_url(prompt, size, quality)
+
+        # Download and save the image
+        if not self.download_image(image_url, filename):
+            raise ImageGenerationError(f"Failed to download image for {filename}")
+        print(f"✅ Saved: {filename}")
+
+    def generate_image(self, prompt, filename, size=DEFAULT_SIZE, quality=DEFAULT_QUALITY):
+        """Generate an image using DALL-E and save it"""
+        try:
+            self._generate(prompt, filename, size, quality)
+            return True
         except Exception as e:
             print(f"❌ Error generating image for {filename}: {e}")
             return False
-    
-    def generate_character_image(self, character_data, campaign="default"):
-        """Generate image for a character entity"""
+
+    def character_image_job(self, character_data, campaign="default"):
+        """Prompt and output path for a character portrait"""
         character_id = character_data['id']
         name = character_data['name']
-        
+
         # Create character-specific prompt
         prompt = f"Fantasy sci-fi character portrait of {name}, whimsical Shakespearean style, fallen technology magic, detailed face, colorful clothing with tech elements, fantasy RPG art style"
-        
+
         filename = self.world_path / f"campaigns/{campaign}/characters/{character_id}_portrait.png"
-        filename.parent.mkdir(parents=True, exist_ok=True)
-        
-        return self.generate_image(prompt, filename)
-    
-    def generate_location_image(self, location_data, campaign="default"):
-        """Generate image for a location entity"""
+        return prompt, filename
+
+    def location_image_job(self, location_data, campaign="default"):
+        """Prompt and output path for a location image"""
         location_id = location_data['id']
         name = location_data['name']
-        
+
         prompt = f"Fantasy sci-fi location of {name}, Shakespearean architecture with futuristic technology, magical energy, whimsical but mysterious atmosphere, detailed environment art"
-        
+
         filename = self.world_path / f"campaigns/{campaign}/locations/{location_id}_image.png"
-        filename.parent.mkdir(parents=True, exist_ok=True)
-        
-        return self.generate_image(prompt, filename)
-    
-    def generate_item_image(self, item_data, campaign="default"):
-        """Generate image for an item entity"""
+        return prompt, filename
+
+    def item_image_job(self, item_data, campaign="default"):
+        """Prompt and output path for an item image"""
         item_id = item_data['id']
         name = item_data['name']
-        
+
         prompt = f"Fantasy sci-fi item: {name}, magical technology artifact, Shakespearean elegance with futuristic elements, detailed object art, glowing effects"
-        
+
         filename = self.world_path / f"campaigns/{campaign}/items/{item_id}_image.png"
+        return prompt, filename
+
+    def generate_character_image(self, character_data, campaign="default"):
+        """Generate image for a character entity"""
+        prompt, filename = self.character_image_job(character_data, campaign)
+        filename.parent.mkdir(parents=True, exist_ok=True)
+        return self.generate_image(prompt, filename)
+
+    def generate_location_image(self, location_data, campaign="default"):
+        """Generate image for a location entity"""
+        prompt, filename = self.location_image_job(location_data, campaign)
         filename.parent.mkdir(parents=True, exist_ok=True)
-        
         return self.generate_image(prompt, filename)
-    
-    def generate_all_images_for_campaign(self, campaign="default"):
-        """Generate images for all entities in a campaign"""
+
+    def generate_item_image(self, item_data, campaign="default"):
+        """Generate image for an item entity"""
+        prompt, filename = self.item_image_job(item_data, campaign)
+        filename.parent.mkdir(parents=True, exist_ok=True)
+        return self.generate_image(prompt, filename)
+
+    def campaign_image_jobs(self, campaign="default"):
+        """(prompt, filename) for every entity image in a campaign"""
         campaign_path = self.world_path / f"campaigns/{campaign}"
-        
-        # Generate character images
-        characters_path = campaign_path / "characters"
-        if characters_path.exists():
-            for json_file in characters_path.glob("*.json"):
-                if not json_file.name.endswith("_stats.json") and not json_file.name.endswith("_relationships.json"):
-                    try:
-                        with open(json_file, 'r') as f:
-                            character_data = json.load(f)
-                        self.generate_character_image(character_data, campaign)
-                        time.sleep(1)  # Rate limiting
-                    except Exception as e:
-                        print(f"❌ Error processing {json_file}: {e}")
-        
-        # Generate location images
-        locations_path = campaign_path / "locations"
-        if locations_path.exists():
-            for json_file in locations_path.glob("*.json"):
-                if not json_file.name.endswith("_inhabitants.json"):
-                    try:
-                        with open(json_file, 'r') as f:
-                            location_data = json.load(f)
-                        self.generate_location_image(location_data, campaign)
-                        time.sleep(1)  # Rate limiting
-                    except Exception as e:
-                        print(f"❌ Error processing {json_file}: {e}")
-        
-        # Generate item images
-        items_path = campaign_path / "items"
-        if items_path.exists():
-            for json_file in items_path.glob("*.json"):
-                if not json_file.name.endswith("_stats.json"):
-                    try:
-                        with open(json_file, 'r') as f:
-                            item_data = json.load(f)
-                        self.generate_item_image(item_data, campaign)
-                        time.sleep(1)  # Rate limiting
-                    except Exception as e:
-                        print(f"❌ Error processing {json_file}: {e}")
+        sources = (
+            ("characters", ("_stats.json", "_relationships.json"), self.character_image_job),
+            ("locations", ("_inhabitants.json",), self.location_image_job),
+            ("items", ("_stats.json",), self.item_image_job),
+        )
+        jobs = []
+        for directory, data_suffixes, make_job in sources:
+            entity_path = campaign_path / directory
+            if not entity_path.exists():
+                continue
+            for json_file in sorted(entity_path.glob("*.json")):
+                if json_file.name.endswith(data_suffixes):
+                    continue
+                try:
+                    with open(json_file, 'r') as f:
+                        jobs.append(make_job(json.load(f), campaign))
+                except Exception as e:
+                    print(f"❌ Error processing {json_file}: {e}")
+        return jobs
+
+    def _pending_jobs(self, jobs, manifest, force):
+        """Jobs whose image is missing or was made from a different prompt, model, size or quality"""
+        pending = []
+        for prompt, filename in jobs:
+            request_hash = prompt_hash(prompt, DALLE_MODEL, DEFAULT_SIZE, DEFAULT_QUALITY)
+            if not force:
+                if manifest.is_current(filename, request_hash):
+                    continue
+                if filename.exists() and not manifest.is_known(filename):
+                    # Made before the manifest existed - adopt it rather than pay for it again
+                    manifest.record(filename, request_hash, DALLE_MODEL, DEFAULT_SIZE, DEFAULT_QUALITY)
+                    continue
+            pending.append((prompt, filename, request_hash))
+        return pending
+
+    def _run_job(self, prompt, filename, request_hash, manifest, journal):
+        """Claim, generate and record one image; None when another process holds the job"""
+        job_id = manifest.relpath(filename)
+        if not journal.claim(job_id):
+            return None
+        try:
+            self._generate(prompt, filename)
+        except Exception as e:
+            print(f"❌ Error generating image for {filename}: {e}")
+            if journal.fail(job_id, e) == DEAD:
+                print(f"☠️ {job_id} failed {journal.max_attempts} times, moved to the dead-letter list")
+            return False
+        try:
+            manifest.record(filename, request_hash, DALLE_MODEL, DEFAULT_SIZE, DEFAULT_QUALITY)
+        except OSError as e:
+            # The image is on disk and paid for - only the next run's up-to-date check loses it
+            print(f"⚠️ Could not record {job_id} in the image manifest: {e}")
+        journal.complete(job_id)
+        return True
+
+    def generate_all_images_for_campaign(self, campaign="default", max_workers=DEFAULT_IMAGE_WORKERS, progress=None,
+                                         force=False):
+        """Generate images for all entities in a campaign
+
+        Only images that are new or whose prompt changed since the last run
+        (per the campaign's image manifest) are generated, unless force is set.
+        Jobs go through the campaign's job journal: each is claimed before it
+        runs, so an interrupted run resumes and several processes can share a
+        campaign. Jobs that keep failing are dead-lettered until retried, and
+        the journal is compacted after a pass with no failures.
+        Up to max_workers images are in flight at once; 429 responses shrink
+        that and pause for their Retry-After. progress(done, total, filename, ok)
+        is called as each image finishes. Returns a summary of the run.
+        """
+        campaign_path = self.world_path / f"campaigns/{campaign}"
+        manifest = ImageManifest(campaign_path)
+        journal = ImageJobJournal(campaign_path)
+        all_jobs = self.campaign_image_jobs(campaign)
+        jobs = self._pending_jobs(all_jobs, manifest, force)
+        skipped = len(all_jobs) - len(jobs)
+        if skipped:
+            print(f"⏭️ {skipped} images are up to date")
+
+        if force:
+            journal.retry_dead()
+        journal.enqueue((manifest.relpath(filename), request_hash) for _, filename, request_hash in jobs)
+        dead = journal.dead_letters()
+        if dead:
+            jobs = [job for job in jobs if manifest.relpath(job[1]) not in dead]
+            print(f"☠️ {len(dead)} images are dead-lettered (retry them with --retry-dead)")
+        total = len(jobs)
+        self.limiter = AdaptiveLimiter(max_workers)
+        start = time.perf_counter()
+        succeeded = failed = elsewhere = 0
+
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+                futures = {}
+                for prompt, filename, request_hash in jobs:
+                    filename.parent.mkdir(parents=True, exist_ok=True)
+                    future = pool.submit(self._run_job, prompt, filename, request_hash, manifest, journal)
+                    futures[future] = filename
+                for future in as_completed(futures):
+                    ok = future.result()
+                    if ok is None:
+                        elsewhere += 1
+                        total -= 1
+                        continue
+                    succeeded += ok
+                    failed += not ok
+                    done = succeeded + failed
+                    print(f"📊 [{done}/{total}] {'✅' if ok else '❌'} {futures[future].name}")
+                    if progress:
+                        progress(done, total, futures[future], ok)
+        finally:
+            throttled = self.limiter.throttled
+            self.limiter = None
+
+        seconds = time.perf_counter() - start
+        print(f"🖼️ {succeeded}/{total} images in {seconds:.1f}s ({failed} failed, {throttled} rate-limit waits)")
+        if not failed and not elsewhere:
+            # A clean pass: the history behind each job's state is no longer needed
+            journal.compact()
+        return {'total': total, 'succeeded': succeeded, 'failed': failed, 'skipped': skipped,
+                'dead_lettered': len(dead), 'claimed_elsewhere': elsewhere, 'rate_limited': throttled,
+                'seconds': round(seconds, 2)}
 
 def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generate DALL-E images for a campaign')
+    parser.add_argument('campaign', nargs='?', default='shakespeare_scifi')
+    parser.add_argument('--force', action='store_true', help='Regenerate every image, even unchanged ones')
+    parser.add_argument('--workers', type=int, default=DEFAULT_IMAGE_WORKERS, help='Images generated at once')
+    parser.add_argument('--retry-dead', action='store_true', help='Requeue images that failed too many times')
+    parser.add_argument('--dead-letters', action='store_true', help='List images that failed too many times and exit')
+    args = parser.parse_args()
+
+    if args.dead_letters or args.retry_dead:
+        journal = ImageJobJournal(Path(__file__).parent.parent.parent / 'world' / 'campaigns' / args.campaign)
+        if args.dead_letters:
+            for job_id, job in journal.dead_letters().items():
+                print(f"☠️ {job_id} ({job['attempts']} attempts): {job['error']}")
+            return
+        print(f"🔁 Requeued {len(journal.retry_dead())} dead-lettered images")
+
     generator = WorldImageGenerator()
-    
+
     # Check if API key is available
     if not generator.client.api_key:
         print("❌ OpenAI API key not found. Please set OPENAI_API_KEY environment variable.")
         return
-    
-    print("🚀 Starting image generation for Shakespeare sci-fantasy world...")
-    generator.generate_all_images_for_campaign("shakespeare_scifi")
+
+    print(f"🚀 Starting image generation for {args.campaign}...")
+    generator.generate_all_images_for_campaign(args.campaign, max_workers=args.workers, force=args.force)
     print("✅ Image generation complete!")
 
+    from image_derivatives import HAS_PIL, build_campaign_derivatives
+    if HAS_PIL:
+        summary = build_campaign_derivatives(generator.world_path / 'campaigns' / args.campaign)
+        print(f"✅ Derivatives: {summary['rebuilt']} images rebuilt, {summary['up_to_date']} up to date")
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -6,28 +6,61 @@ Creates characters, locations, and items with proper file structure
 
 import json
 import os
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'backend'))
+from world_models import Character, Location, Item
+from world_schema import check_entity, SchemaValidationError
+
+# Threads used by create_many - writes are I/O bound, so more threads than cores helps
+DEFAULT_WRITE_WORKERS = 16
+
+
+class EntityWriteError(Exception):
+    """Raised when an entity's files could not all be written (none of them are left behind)"""
+
+
+def _json_bytes(data):
+    return json.dumps(data, indent=2).encode('utf-8')
+
+
+def _fsync_dir(directory):
+    """Make renames in a directory durable (a no-op where directories can't be opened)"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
 class EntityCreator:
     def __init__(self, world_path=None):
         self.world_path = Path(world_path or Path(__file__).parent.parent.parent / 'world')
         self.templates_path = self.world_path / 'templates'
-    
-    def create_character(self, character_id, name, campaign, tags=None, bio="", secrets="", dialogue="", **kwargs):
-        """Create a complete character entity with all files"""
-        tags = tags or ["npc"]
-        campaign_path = self.world_path / f"campaigns/{campaign}/characters"
-        campaign_path.mkdir(parents=True, exist_ok=True)
-        
-        # Create master JSON file
-        character_data = {
-            "id": character_id,
-            "type": "character",
-            "name": name,
-            "campaign": campaign,
-            "tags": tags,
-            "files": {
+
+    def _metadata(self, kwargs):
+        today = datetime.now().isoformat()[:10]
+        return {
+            "created": today,
+            "last_modified": today,
+            "status": "active",
+            "ai_priority": kwargs.get("ai_priority", "medium")
+        }
+
+    def build_character(self, character_id, name, campaign, tags=None, bio="", secrets="", dialogue="", **kwargs):
+        """Master JSON and file contents for a character, without writing anything"""
+        character = Character(
+            character_id, name, campaign, tags or ["npc"],
+            files={
                 "portrait": f"{character_id}_portrait.png",
                 "public_bio": f"{character_id}_bio.md",
                 "secrets": f"{character_id}_secrets.md",
@@ -35,31 +68,9 @@ class EntityCreator:
                 "dialogue": f"{character_id}_dialogue.md",
                 "relationships": f"{character_id}_relationships.json"
             },
-            "metadata": {
-                "created": datetime.now().isoformat()[:10],
-                "last_modified": datetime.now().isoformat()[:10],
-                "status": "active",
-                "ai_priority": kwargs.get("ai_priority", "medium")
-            }
-        }
-        
-        # Save master file
-        with open(campaign_path / f"{character_id}.json", 'w') as f:
-            json.dump(character_data, f, indent=2)
-        
-        # Create bio file
-        with open(campaign_path / f"{character_id}_bio.md", 'w') as f:
-            f.write(f"# {name}\n\n{bio}")
-        
-        # Create secrets file
-        with open(campaign_path / f"{character_id}_secrets.md", 'w') as f:
-            f.write(f"# {name}'s Secrets\n\n{secrets}")
-        
-        # Create dialogue file
-        with open(campaign_path / f"{character_id}_dialogue.md", 'w') as f:
-            f.write(f"# {name}'s Dialogue\n\n{dialogue}")
-        
-        # Create basic stats file
+            **self._metadata(kwargs)
+        )
+
         stats = kwargs.get("stats", {
             "level": 5,
             "hit_points": 50,
@@ -73,32 +84,22 @@ class EntityCreator:
                 "charisma": 16
             }
         })
-        
-        with open(campaign_path / f"{character_id}_stats.json", 'w') as f:
-            json.dump(stats, f, indent=2)
-        
-        # Create relationships file
         relationships = kwargs.get("relationships", {"allies": [], "enemies": [], "neutral": []})
-        with open(campaign_path / f"{character_id}_relationships.json", 'w') as f:
-            json.dump(relationships, f, indent=2)
-        
-        print(f"✅ Created character: {name} ({character_id})")
-        return character_data
-    
-    def create_location(self, location_id, name, campaign, tags=None, description="", secrets="", history="", **kwargs):
-        """Create a complete location entity with all files"""
-        tags = tags or ["location"]
-        campaign_path = self.world_path / f"campaigns/{campaign}/locations"
-        campaign_path.mkdir(parents=True, exist_ok=True)
-        
-        # Create master JSON file
-        location_data = {
-            "id": location_id,
-            "type": "location",
-            "name": name,
-            "campaign": campaign,
-            "tags": tags,
-            "files": {
+
+        files = {
+            f"{character_id}_bio.md": f"# {name}\n\n{bio}".encode('utf-8'),
+            f"{character_id}_secrets.md": f"# {name}'s Secrets\n\n{secrets}".encode('utf-8'),
+            f"{character_id}_dialogue.md": f"# {name}'s Dialogue\n\n{dialogue}".encode('utf-8'),
+            f"{character_id}_stats.json": _json_bytes(stats),
+            f"{character_id}_relationships.json": _json_bytes(relationships),
+        }
+        return 'characters', character.to_master(), files
+
+    def build_location(self, location_id, name, campaign, tags=None, description="", secrets="", history="", **kwargs):
+        """Master JSON and file contents for a location, without writing anything"""
+        location = Location(
+            location_id, name, campaign, tags or ["location"],
+            files={
                 "map": f"{location_id}_map.png",
                 "image": f"{location_id}_image.png",
                 "description": f"{location_id}_description.md",
@@ -106,94 +107,181 @@ class EntityCreator:
                 "history": f"{location_id}_history.md",
                 "inhabitants": f"{location_id}_inhabitants.json"
             },
-            "metadata": {
-                "created": datetime.now().isoformat()[:10],
-                "last_modified": datetime.now().isoformat()[:10],
-                "status": "active",
-                "ai_priority": kwargs.get("ai_priority", "medium")
-            }
-        }
-        
-        # Save master file
-        with open(campaign_path / f"{location_id}.json", 'w') as f:
-            json.dump(location_data, f, indent=2)
-        
-        # Create description file
-        with open(campaign_path / f"{location_id}_description.md", 'w') as f:
-            f.write(f"# {name}\n\n{description}")
-        
-        # Create secrets file
-        with open(campaign_path / f"{location_id}_secrets.md", 'w') as f:
-            f.write(f"# {name} - Hidden Secrets\n\n{secrets}")
-        
-        # Create history file
-        with open(campaign_path / f"{location_id}_history.md", 'w') as f:
-            f.write(f"# History of {name}\n\n{history}")
-        
-        # Create inhabitants file
+            **self._metadata(kwargs)
+        )
+
         inhabitants = kwargs.get("inhabitants", {"characters": [], "creatures": []})
-        with open(campaign_path / f"{location_id}_inhabitants.json", 'w') as f:
-            json.dump(inhabitants, f, indent=2)
-        
-        print(f"✅ Created location: {name} ({location_id})")
-        return location_data
-    
-    def create_item(self, item_id, name, campaign, tags=None, description="", history="", **kwargs):
-        """Create a complete item entity with all files"""
-        tags = tags or ["item"]
-        campaign_path = self.world_path / f"campaigns/{campaign}/items"
-        campaign_path.mkdir(parents=True, exist_ok=True)
-        
-        # Create master JSON file
-        item_data = {
-            "id": item_id,
-            "type": "item",
-            "name": name,
-            "campaign": campaign,
-            "tags": tags,
-            "files": {
+
+        files = {
+            f"{location_id}_description.md": f"# {name}\n\n{description}".encode('utf-8'),
+            f"{location_id}_secrets.md": f"# {name} - Hidden Secrets\n\n{secrets}".encode('utf-8'),
+            f"{location_id}_history.md": f"# History of {name}\n\n{history}".encode('utf-8'),
+            f"{location_id}_inhabitants.json": _json_bytes(inhabitants),
+        }
+        return 'locations', location.to_master(), files
+
+    def build_item(self, item_id, name, campaign, tags=None, description="", history="", **kwargs):
+        """Master JSON and file contents for an item, without writing anything"""
+        item = Item(
+            item_id, name, campaign, tags or ["item"],
+            files={
                 "image": f"{item_id}_image.png",
                 "description": f"{item_id}_description.md",
                 "stats": f"{item_id}_stats.json",
                 "history": f"{item_id}_history.md"
             },
-            "metadata": {
-                "created": datetime.now().isoformat()[:10],
-                "last_modified": datetime.now().isoformat()[:10],
-                "status": "active",
-                "ai_priority": kwargs.get("ai_priority", "medium")
-            }
-        }
-        
-        # Save master file
-        with open(campaign_path / f"{item_id}.json", 'w') as f:
-            json.dump(item_data, f, indent=2)
-        
-        # Create description file
-        with open(campaign_path / f"{item_id}_description.md", 'w') as f:
-            f.write(f"# {name}\n\n{description}")
-        
-        # Create history file
-        with open(campaign_path / f"{item_id}_history.md", 'w') as f:
-            f.write(f"# History of {name}\n\n{history}")
-        
-        # Create stats file
+            **self._metadata(kwargs)
+        )
+
         stats = kwargs.get("stats", {
             "rarity": "common",
             "value": 100,
             "weight": 1,
             "properties": []
         })
-        
-        with open(campaign_path / f"{item_id}_stats.json", 'w') as f:
-            json.dump(stats, f, indent=2)
-        
+
+        files = {
+            f"{item_id}_description.md": f"# {name}\n\n{description}".encode('utf-8'),
+            f"{item_id}_history.md": f"# History of {name}\n\n{history}".encode('utf-8'),
+            f"{item_id}_stats.json": _json_bytes(stats),
+        }
+        return 'items', item.to_master(), files
+
+    def _build(self, spec):
+        """Build an entity from a spec dict like {"type": "character", "id": ..., "name": ..., ...}"""
+        spec = dict(spec)
+        entity_type = spec.pop('type')
+        entity_id = spec.pop('id')
+        builders = {'character': self.build_character, 'location': self.build_location, 'item': self.build_item}
+        if entity_type not in builders:
+            raise ValueError(f"Unknown entity type {entity_type!r} for {entity_id}")
+        return builders[entity_type](entity_id, **spec)
+
+    def write_entity(self, entity_dir, master, files):
+        """Write every file of one entity, or none of them
+
+        Each file goes to a temp name in the same directory first. Content
+        files are renamed into place before the master JSON, so loaders never
+        see the entity until all of its files are there. Files being replaced
+        are hard-linked aside first, so a failed rename puts them all back.
+        """
+        entity_dir = Path(entity_dir)
+        entity_dir.mkdir(parents=True, exist_ok=True)
+        ordered = list(files.items()) + [(f"{master['id']}.json", _json_bytes(master))]
+        token = uuid.uuid4().hex[:8]
+        temps = []
+        try:
+            for filename, data in ordered:
+                tmp_path = entity_dir / f".{filename}.{token}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                temps.append((tmp_path, entity_dir / filename))
+        except OSError as e:
+            for tmp_path, _ in temps:
+                tmp_path.unlink(missing_ok=True)
+            (entity_dir / f".{ordered[len(temps)][0]}.{token}.tmp").unlink(missing_ok=True)
+            raise EntityWriteError(f"Could not write {master['id']}: {e}")
+        # final path -> hard link to the version it replaced, or None if it is new
+        replaced = {}
+        try:
+            for tmp_path, final_path in temps:
+                backup = None
+                if final_path.is_file():
+                    backup = entity_dir / f".{final_path.name}.{token}.bak"
+                    os.link(final_path, backup)
+                replaced[final_path] = backup
+                os.replace(tmp_path, final_path)
+        except OSError as e:
+            for final_path, backup in replaced.items():
+                try:
+                    if backup is not None:
+                        os.replace(backup, final_path)
+                    elif final_path.is_file():
+                        final_path.unlink()
+                except OSError as rollback_error:
+                    print(f"⚠️ Could not roll back {final_path}: {rollback_error}")
+            for tmp_path, _ in temps:
+                tmp_path.unlink(missing_ok=True)
+            raise EntityWriteError(f"Could not write {master['id']}: {e}")
+        for backup in replaced.values():
+            if backup is not None:
+                backup.unlink(missing_ok=True)
+
+    def _create(self, built):
+        entity_type, data, files = built
+        # Refuse to write anything the schema would reject
+        check_entity(entity_type, data)
+        entity_dir = self.world_path / 'campaigns' / data['campaign'] / entity_type
+        self.write_entity(entity_dir, data, files)
+        _fsync_dir(entity_dir)
+        return data
+
+    def create_character(self, character_id, name, campaign, tags=None, bio="", secrets="", dialogue="", **kwargs):
+        """Create a complete character entity with all files"""
+        character_data = self._create(self.build_character(character_id, name, campaign, tags, bio, secrets,
+                                                           dialogue, **kwargs))
+        print(f"✅ Created character: {name} ({character_id})")
+        return character_data
+
+    def create_location(self, location_id, name, campaign, tags=None, description="", secrets="", history="", **kwargs):
+        """Create a complete location entity with all files"""
+        location_data = self._create(self.build_location(location_id, name, campaign, tags, description, secrets,
+                                                         history, **kwargs))
+        print(f"✅ Created location: {name} ({location_id})")
+        return location_data
+
+    def create_item(self, item_id, name, campaign, tags=None, description="", history="", **kwargs):
+        """Create a complete item entity with all files"""
+        item_data = self._create(self.build_item(item_id, name, campaign, tags, description, history, **kwargs))
         print(f"✅ Created item: {name} ({item_id})")
         return item_data
 
+    def create_many(self, specs, workers=DEFAULT_WRITE_WORKERS):
+        """Create thousands of entities at once
+
+        specs are dicts with "type" (character/location/item), "id" and the
+        keyword arguments of the matching create_* method. Every entity is
+        validated first and written all-or-nothing through a thread pool; each
+        touched directory is fsynced once at the end. Returns the created
+        masters and a {entity_id: error} map for the ones that failed.
+        """
+        planned = []
+        failed = {}
+        for spec in specs:
+            try:
+                entity_type, data, files = self._build(spec)
+                check_entity(entity_type, data)
+            except (SchemaValidationError, ValueError, KeyError, TypeError) as e:
+                failed[str(spec.get('id', '?'))] = str(e)
+                continue
+            entity_dir = self.world_path / 'campaigns' / data['campaign'] / entity_type
+            planned.append((entity_dir, data, files))
+
+        for entity_dir in {entity_dir for entity_dir, _, _ in planned}:
+            entity_dir.mkdir(parents=True, exist_ok=True)
+
+        created = []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [(data, pool.submit(self.write_entity, entity_dir, data, files))
+                       for entity_dir, data, files in planned]
+            for data, future in futures:
+                try:
+                    future.result()
+                    created.append(data)
+                except EntityWriteError as e:
+                    failed[data['id']] = str(e)
+
+        for entity_dir in sorted({entity_dir for entity_dir, _, _ in planned}):
+            _fsync_dir(entity_dir)
+
+        print(f"✅ Created {len(created)} entities" + (f" ({len(failed)} failed)" if failed else ""))
+        return {'created': created, 'failed': failed}
+
+
 def main():
     creator = EntityCreator()
-    print("🛠️ Entity Creator ready! Use the create_character(), create_location(), and create_item() methods.")
+    print("🛠️ Entity Creator ready! Use the create_character(), create_location(), create_item() "
+          "and create_many() methods.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
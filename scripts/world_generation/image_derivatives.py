@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Image Derivative Builder for World Building
+Turns each full-size DALL-E PNG into responsive WebP/AVIF/JPEG widths, a blurred
+placeholder and an optimized PNG, stored beside the original and listed in `files`
+"""
+
+import json
+import os
+import re
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from entity_creator import EntityCreator
+
+try:
+    from PIL import Image, ImageFilter
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+try:
+    import pillow_avif  # noqa: F401 - registers AVIF support on Pillow builds without it
+except ImportError:
+    pass
+
+# Responsive widths in pixels; widths above the source's own are skipped rather than upscaled
+DERIVATIVE_WIDTHS = (320, 640, 1024)
+# Pillow save options per derivative format
+FORMAT_OPTIONS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 6},
+    'avif': {'format': 'AVIF', 'quality': 60},
+    'jpg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+PLACEHOLDER_WIDTH = 24
+PLACEHOLDER_BLUR = 2
+
+# files keys whose images get derivatives
+IMAGE_ROLES = ('portrait', 'image', 'map')
+ENTITY_DIRECTORIES = ('characters', 'locations', 'items')
+
+# files keys written by derivative_names, e.g. "portrait_640w_webp"
+_DERIVATIVE_KEY = re.compile(r'^(' + '|'.join(IMAGE_ROLES) + r')_(?:\d+w_(\w+)|placeholder|optimized)$')
+
+
+def png_dimensions(path):
+    """(width, height) from a PNG's IHDR chunk, without decoding it; None if it isn't a PNG"""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(24)
+    except OSError:
+        return None
+    if len(header) < 24 or header[:8] != b'\x89PNG\r\n\x1a\n' or header[12:16] != b'IHDR':
+        return None
+    return struct.unpack('>II', header[16:24])
+
+
+def available_formats():
+    """Derivative formats this Pillow can write"""
+    if not HAS_PIL:
+        return ()
+    Image.init()
+    return tuple(name for name, options in FORMAT_OPTIONS.items() if options['format'] in Image.SAVE)
+
+
+def derivative_names(source_name, width, formats):
+    """{files key suffix: filename} of every derivative for a source image of the given width"""
+    stem = source_name.rsplit('.', 1)[0]
+    names = {}
+    for target in DERIVATIVE_WIDTHS:
+        if target > width:
+            continue
+        for fmt in formats:
+            names[f"{target}w_{fmt}"] = f"{stem}_{target}w.{fmt}"
+    names['placeholder'] = f"{stem}_placeholder.jpg"
+    names['optimized'] = f"{stem}_optimized.png"
+    return names
+
+
+def stale_derivatives(source, names):
+    """The derivatives that are missing or older than their source"""
+    source = Path(source)
+    source_mtime = source.stat().st_mtime_ns
+    stale = {}
+    for key, name in names.items():
+        try:
+            if os.stat(source.with_name(name)).st_mtime_ns >= source_mtime:
+                continue
+        except OSError:
+            pass
+        stale[key] = name
+    return stale
+
+
+def _save(image, path, **options):
+    """Encode to a temp file beside path, then rename over it"""
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    try:
+        image.save(tmp_path, **options)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def render_derivatives(source, names):
+    """Write the named derivatives of one source image - runs in a pool worker"""
+    source = Path(source)
+    with Image.open(source) as original:
+        original.load()
+        rgb = original.convert('RGB')
+        for key, name in names.items():
+            path = source.with_name(name)
+            if key == 'optimized':
+                _save(original, path, format='PNG', optimize=True)
+            elif key == 'placeholder':
+                height = max(1, round(rgb.height * PLACEHOLDER_WIDTH / rgb.width))
+                tiny = rgb.resize((PLACEHOLDER_WIDTH, height), Image.LANCZOS)
+                _save(tiny.filter(ImageFilter.GaussianBlur(PLACEHOLDER_BLUR)), path, format='JPEG', quality=40)
+            else:
+                width, fmt = key.split('w_')
+                width = int(width)
+                height = max(1, round(rgb.height * width / rgb.width))
+                resized = rgb if width == rgb.width else rgb.resize((width, height), Image.LANCZOS)
+                _save(resized, path, **FORMAT_OPTIONS[fmt])
+    return str(source), sorted(names)
+
+
+def campaign_images(campaign_path):
+    """(entity_dir, master, role, source path) for every entity image that exists"""
+    campaign_path = Path(campaign_path)
+    images = []
+    for directory in ENTITY_DIRECTORIES:
+        entity_dir = campaign_path / directory
+        if not entity_dir.exists():
+            continue
+        for json_file in sorted(entity_dir.glob("*.json")):
+            try:
+                with open(json_file, 'r') as f:
+                    master = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            if not isinstance(master, dict) or not isinstance(master.get('files'), dict):
+                continue
+            for role in IMAGE_ROLES:
+                filename = master['files'].get(role)
+                if filename and (entity_dir / filename).exists():
+                    images.append((entity_dir, master, role, entity_dir / filename))
+    return images
+
+
+def build_campaign_derivatives(campaign_path, workers=None, formats=None):
+    """Bring every image derivative in a campaign up to date
+
+    Only derivatives that are missing or older than their source are encoded,
+    in a process pool. Each entity's master JSON gets a files entry per
+    derivative on disk (e.g. "portrait_640w_webp"); entries the source no
+    longer produces are dropped along with their files, and the master is
+    rewritten only if that changed anything.
+    """
+    if not HAS_PIL:
+        raise ImportError("Pillow is required for image derivatives. Install with: pip install Pillow")
+    formats = tuple(formats or available_formats())
+    start = time.perf_counter()
+    images = campaign_images(campaign_path)
+
+    work = {}
+    listed = {}
+    for entity_dir, master, role, source in images:
+        dimensions = png_dimensions(source)
+        if dimensions is None:
+            with Image.open(source) as image:
+                dimensions = image.size
+        names = derivative_names(source.name, dimensions[0], formats)
+        listed.setdefault((entity_dir, master['id']), (master, {}))[1][role] = names
+        stale = stale_derivatives(source, names)
+        if stale:
+            work[source] = stale
+
+    written = 0
+    failures = {}
+    if work:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(render_derivatives, source, names): source for source, names in work.items()}
+            for future in as_completed(futures):
+                source = futures[future]
+                try:
+                    _, done = future.result()
+                    written += len(done)
+                    print(f"🖼️ {source.name}: {len(done)} derivatives")
+                except Exception as e:
+                    failures[source.name] = str(e)
+                    print(f"❌ Derivatives failed for {source.name}: {e}")
+
+    creator = EntityCreator()
+    updated = 0
+    for (entity_dir, _), (master, roles) in listed.items():
+        new_files = {}
+        for key, name in master['files'].items():
+            match = _DERIVATIVE_KEY.match(key)
+            if (match and match.group(1) in roles and name not in roles[match.group(1)].values()
+                    and match.group(2) in formats + (None,)):
+                # A width the source has shrunk below; formats this Pillow can't write are left alone
+                (entity_dir / name).unlink(missing_ok=True)
+                continue
+            new_files[key] = name
+        for role, names in roles.items():
+            for key, name in names.items():
+                # A failed render leaves nothing to list
+                if (entity_dir / name).is_file():
+                    new_files[f"{role}_{key}"] = name
+                else:
+                    new_files.pop(f"{role}_{key}", None)
+        if new_files != master['files']:
+            creator.write_entity(entity_dir, {**master, 'files': new_files}, {})
+            updated += 1
+
+    return {'images': len(images), 'rebuilt': len(work) - len(failures), 'up_to_date': len(images) - len(work),
+            'derivatives_written': written, 'entities_updated': updated, 'failed': failures,
+            'formats': list(formats), 'seconds': round(time.perf_counter() - start, 2)}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Build responsive image derivatives for a campaign')
+    parser.add_argument('campaign', nargs='?', default='shakespeare_scifi')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='Worker processes (default: CPU count)')
+    args = parser.parse_args()
+
+    campaign_path = Path(__file__).parent.parent.parent / 'world' / 'campaigns' / args.campaign
+    if not HAS_PIL:
+        print("❌ Pillow not installed. Install with: pip install Pillow")
+        sys.exit(1)
+    summary = build_campaign_derivatives(campaign_path, workers=args.jobs)
+    print(f"✅ {summary['rebuilt']} images rebuilt, {summary['up_to_date']} up to date, "
+          f"{summary['derivatives_written']} files written in {summary['seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Image Job Journal for World Building
+Append-only log of campaign image jobs, so an interrupted run picks up where it stopped
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+JOURNAL_NAME = "images_journal.jsonl"
+
+# Job states, in the order a job normally passes through them
+QUEUED = "queued"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+DEAD = "dead"
+
+# A claim older than this is treated as abandoned even if its owner can't be checked
+DEFAULT_LEASE_SECONDS = 15 * 60
+# Failed attempts before a job moves to the dead-letter list
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+def _owner_alive(owner):
+    """Whether the process behind an owner tag ('host:pid') is still running, if it's on this host"""
+    host, _, pid = owner.rpartition(':')
+    if host != socket.gethostname() or not pid.isdigit():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ImageJobJournal:
+    """Replays and appends to a campaign's images_journal.jsonl
+
+    Every state change is one JSON line. Appends happen under an exclusive
+    file lock after catching up on lines other processes wrote, so a claim
+    is atomic across generator processes sharing the campaign. Jobs are
+    keyed by image path relative to the campaign. A compacted journal starts
+    with a {"generation": n} line; a process that sees a new generation, or
+    a file shorter than what it has read, replays the journal from the top.
+    """
+
+    def __init__(self, campaign_path, lease_seconds=DEFAULT_LEASE_SECONDS, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.path = Path(campaign_path) / JOURNAL_NAME
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.jobs = {}
+        self._offset = 0
+        self._generation = 0
+        self._thread_lock = threading.Lock()
+        with self._locked():
+            pass
+
+    @contextmanager
+    def _locked(self):
+        """Hold the journal lock with self.jobs caught up to the end of the file"""
+        with self._thread_lock, open(self.path, 'a+b') as f:
+            if HAS_FCNTL:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                generation = self._read_generation(f)
+                f.seek(0, os.SEEK_END)
+                if generation != self._generation or f.tell() < self._offset:
+                    # Compacted by another process since we last read it - our offset means nothing now
+                    self.jobs = {}
+                    self._offset = 0
+                    self._generation = generation
+                f.seek(self._offset)
+                data = f.read()
+                end = data.rfind(b'\n') + 1
+                for line in data[:end].splitlines():
+                    try:
+                        event = json.loads(line)
+                        if 'generation' not in event:
+                            self._apply(event)
+                    except (ValueError, KeyError, TypeError):
+                        # A line torn by a crash mid-write - the job falls back to its previous state
+                        continue
+                self._offset += end
+                yield f
+            finally:
+                if HAS_FCNTL:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    @staticmethod
+    def _read_generation(f):
+        f.seek(0)
+        first = f.readline()
+        if first.startswith(b'{"generation"'):
+            try:
+                return json.loads(first)['generation']
+            except (ValueError, KeyError):
+                pass
+        return 0
+
+    def _apply(self, event):
+        job = self.jobs.setdefault(event['job'], {'state': QUEUED, 'attempts': 0, 'error': None})
+        job['state'] = event['state']
+        for key in ('attempts', 'error', 'owner', 'at', 'hash'):
+            if key in event:
+                job[key] = event[key]
+
+    def _append(self, f, job_id, state, **fields):
+        event = {'job': job_id, 'state': state, 'at': time.time(), **fields}
+        line = (json.dumps(event) + '\n').encode('utf-8')
+        f.seek(0, os.SEEK_END)
+        if f.tell() > self._offset:
+            # Drop a torn tail so our line starts cleanly
+            f.truncate(self._offset)
+        f.write(line)
+        f.flush()
+        self._offset += len(line)
+        self._apply(event)
+
+    def _claimable(self, job):
+        if job['state'] in (QUEUED, FAILED):
+            return True
+        if job['state'] == IN_FLIGHT:
+            expired = time.time() - job.get('at', 0) > self.lease_seconds
+            return expired or not _owner_alive(job.get('owner', ''))
+        return False
+
+    def enqueue(self, jobs):
+        """Queue (job_id, request_hash) pairs unless already queued, running or dead-lettered for that hash
+
+        A job a live worker is still running is left alone even for a new hash;
+        it's re-queued once that worker's lease goes stale.
+        """
+        queued = 0
+        with self._locked() as f:
+            for job_id, request_hash in jobs:
+                job = self.jobs.get(job_id)
+                if job and job.get('hash') == request_hash and job['state'] != DONE:
+                    continue
+                if job and job['state'] == IN_FLIGHT and not self._claimable(job):
+                    continue
+                self._append(f, job_id, QUEUED, hash=request_hash, attempts=0, error=None)
+                queued += 1
+        return queued
+
+    def claim(self, job_id):
+        """Atomically take a job for this process; False if it's done, dead or held by a live worker"""
+        with self._locked() as f:
+            job = self.jobs.get(job_id)
+            if job is None or not self._claimable(job):
+                return False
+            self._append(f, job_id, IN_FLIGHT, owner=self.owner, attempts=job['attempts'] + 1)
+            return True
+
+    def complete(self, job_id):
+        with self._locked() as f:
+            self._append(f, job_id, DONE, error=None)
+
+    def fail(self, job_id, error):
+        """Record a failed attempt; the job is dead-lettered once it has used max_attempts"""
+        with self._locked() as f:
+            attempts = self.jobs.get(job_id, {}).get('attempts', 0)
+            state = DEAD if attempts >= self.max_attempts else FAILED
+            self._append(f, job_id, state, error=str(error))
+            return state
+
+    def dead_letters(self):
+        """{job_id: job} for jobs that ran out of attempts"""
+        with self._locked():
+            return {job_id: dict(job) for job_id, job in sorted(self.jobs.items()) if job['state'] == DEAD}
+
+    def retry_dead(self, job_ids=None):
+        """Put dead-lettered jobs (all, or the given ones) back in the queue with fresh attempts"""
+        retried = []
+        with self._locked() as f:
+            for job_id, job in sorted(self.jobs.items()):
+                if job['state'] == DEAD and (job_ids is None or job_id in job_ids):
+                    self._append(f, job_id, QUEUED, attempts=0, error=None)
+                    retried.append(job_id)
+        return retried
+
+    def counts(self):
+        with self._locked():
+            counts = {}
+            for job in self.jobs.values():
+                counts[job['state']] = counts.get(job['state'], 0) + 1
+            return counts
+
+    def compact(self):
+        """Rewrite the journal as one line per job with its current state, under a new generation"""
+        with self._locked() as f:
+            self._generation += 1
+            lines = (json.dumps({'generation': self._generation}) + '\n').encode('utf-8')
+            lines += b''.join((json.dumps({'job': job_id, **job}) + '\n').encode('utf-8')
+                              for job_id, job in sorted(self.jobs.items()))
+            f.seek(0)
+            f.truncate()
+            f.write(lines)
+            f.flush()
+            self._offset = len(lines)
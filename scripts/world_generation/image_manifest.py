@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Image Manifest for World Building
+Records the prompt, model and checksum behind every generated campaign image
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+MANIFEST_NAME = "images_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def prompt_hash(prompt, model, size, quality):
+    """Identity of a generation request - the image only needs redoing when this changes"""
+    key = json.dumps([prompt, model, size, quality], ensure_ascii=False)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def file_checksum(path, chunk_size=1024 * 1024):
+    """sha256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ImageManifest:
+    """Per-campaign record of generated images, keyed by path relative to the campaign
+
+    Each entry holds the prompt hash, model, size and quality the image was
+    made with, plus its sha256, byte size and mtime. Safe to share between
+    generator threads and processes: each save happens under a file lock
+    and merges into what is on disk, so no process drops another's entries.
+    """
+
+    def __init__(self, campaign_path):
+        self.campaign_path = Path(campaign_path)
+        self.path = self.campaign_path / MANIFEST_NAME
+        # The manifest itself is swapped by rename, so the lock lives in a file of its own
+        self.lock_path = self.path.with_name(f".{self.path.name}.lock")
+        self._lock = threading.Lock()
+        self.entries = self._read()
+
+    def _read(self):
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f).get('images', {})
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️ Ignoring unreadable image manifest {self.path}: {e}")
+            return {}
+
+    @contextmanager
+    def _locked(self):
+        """Hold the manifest lock across threads and processes"""
+        with self._lock, open(self.lock_path, 'a') as f:
+            if HAS_FCNTL:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if HAS_FCNTL:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def relpath(self, filename):
+        return Path(filename).relative_to(self.campaign_path).as_posix()
+
+    def _file_matches(self, entry, filename):
+        """The file on disk is the one the entry describes (checksummed only when size or mtime moved)"""
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return False
+        if stat.st_size != entry.get('bytes'):
+            return False
+        if stat.st_mtime_ns == entry.get('mtime_ns'):
+            return True
+        return file_checksum(filename) == entry.get('sha256')
+
+    def is_current(self, filename, request_hash):
+        """Whether filename exists and was generated from this exact request"""
+        with self._lock:
+            entry = self.entries.get(self.relpath(filename))
+        return bool(entry) and entry.get('prompt_hash') == request_hash and self._file_matches(entry, filename)
+
+    def is_known(self, filename):
+        with self._lock:
+            return self.relpath(filename) in self.entries
+
+    def record(self, filename, request_hash, model, size, quality):
+        """Remember that filename was generated from this request, and save"""
+        stat = os.stat(filename)
+        entry = {
+            'prompt_hash': request_hash,
+            'model': model,
+            'size': size,
+            'quality': quality,
+            'sha256': file_checksum(filename),
+            'bytes': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'generated': datetime.now().isoformat(timespec='seconds'),
+        }
+        with self._locked():
+            # Entries other processes saved since we last read win over our stale copies of them
+            entries = self._read()
+            entries[self.relpath(filename)] = entry
+            self._save(entries)
+            self.entries = entries
+
+    def _save(self, entries):
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{self.path.name}.", suffix='.tmp', dir=self.path.parent)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'version': MANIFEST_VERSION, 'images': dict(sorted(entries.items()))}, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
@@ -5,12 +5,16 @@ Tests the complete end-to-end flow from frontend to world content loading
 """
 
 import os
+import sys
 import json
 import subprocess
 import time
 import requests
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'backend'))
+from token_counter import TokenCounter
+
 class IntegrationTester:
     def __init__(self):
         self.base_path = Path(__file__).parent.parent.parent
@@ -165,29 +169,28 @@ class IntegrationTester:
         print("\n📊 Estimating Token Usage")
         print("=" * 50)
         
-        # Load sample content to estimate sizes
+        # Load sample content and count it with the shared token counter
+        counter = TokenCounter.for_campaign(self.world_path)
         sample_sizes = {}
         
         # World concept
         concept_path = self.world_path / 'WORLD_CONCEPT.md'
         if concept_path.exists():
-            concept_size = len(concept_path.read_text())
-            sample_sizes['world_concept'] = concept_size // 4  # Rough token estimate
+            sample_sizes['world_concept'] = counter.count(concept_path.read_text())
         
         # Character content
         prospero_path = self.world_path / 'characters' / 'prospero_technomancer_bio.md'
         if prospero_path.exists():
-            bio_size = len(prospero_path.read_text())
-            sample_sizes['character_bio'] = bio_size // 4
+            sample_sizes['character_bio'] = counter.count(prospero_path.read_text())
             
         # Location content
         globe_path = self.world_path / 'locations' / 'globe_nexus_station_description.md'
         if globe_path.exists():
-            desc_size = len(globe_path.read_text())
-            sample_sizes['location_desc'] = desc_size // 4
+            sample_sizes['location_desc'] = counter.count(globe_path.read_text())
         
         base_prompt_tokens = 500  # Estimated base DM prompt
         
+        print(f"Tokenizer: {counter.name}")
         print(f"Base DM prompt: ~{base_prompt_tokens} tokens")
         for content_type, tokens in sample_sizes.items():
             print(f"{content_type}: ~{tokens} tokens")
@@ -10,6 +10,9 @@ import json
 import requests
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'backend'))
+from token_counter import TokenCounter
+
 class WorldAwareTester:
     def __init__(self):
         self.base_path = Path(__file__).parent.parent.parent
@@ -137,7 +140,8 @@ Level: 12
         
         full_prompt = f"{base_prompt}\n{world_context}\n{character_context}"
         
-        print(f"Generated prompt length: {len(full_prompt)} characters (~{len(full_prompt)//4} tokens)")
+        counter = TokenCounter.for_campaign(self.world_path)
+        print(f"Generated prompt length: {len(full_prompt)} characters ({counter.count(full_prompt)} tokens, {counter.name})")
         print("✅ Prompt successfully generated with world-aware content")
     
     def test_netlify_function_structure(self):
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for the token-budgeted context packer
+The DM only gets as much lore as the budget allows - make sure we spend it well!
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+
+import pytest
+from world_loader import WorldContentLoader
+from context_packer import ContextPacker, ContextChunk, ENTITIES_OPENING, ENTITIES_CLOSING
+from token_counter import content_hash
+
+
+@pytest.fixture
+def packer():
+    return ContextPacker(WorldContentLoader('shakespeare_scifi'))
+
+
+class TestEntityRecognition:
+    """Test that players' words map onto campaign entities"""
+
+    def test_detects_characters_locations_and_items(self, packer):
+        detected = packer.loader.analyze_input("I ask Prospero about Yorick's skull at the Globe Nexus Station")
+        assert detected['characters'] == ['prospero_technomancer']
+        assert detected['items'] == ['yoricks_memory_skull']
+        assert detected['locations'] == ['globe_nexus_station']
+
+    def test_history_mentions_are_older(self, packer):
+        history = [{'role': 'user', 'content': 'I visit Elsinore Data Fortress'}]
+        mentions = packer.loader.find_mentions('I greet Puck', history)
+        assert mentions[('characters', 'puck_probability_sprite')] == 0
+        assert mentions[('locations', 'elsinore_data_fortress')] == 1
+
+
+class TestContextPacker:
+    """Test budgeted, deterministic lore selection"""
+
+    def test_never_exceeds_budget(self, packer):
+        for budget in (0, 50, 300, 1000, 4000):
+            packed = packer.build_context('I ask Prospero about the Tempest in a Bottle', budget=budget)
+            assert packed.tokens <= budget
+            assert packer.count_tokens(packed.render()) <= budget
+
+    def test_reported_tokens_match_rendered_pieces(self, packer):
+        packed = packer.build_context('I ask Prospero about his magic', budget=800)
+        chunk_tokens = sum(chunk.tokens for chunk in packed.chunks)
+        wrapper_tokens = sum(packer.count_tokens(opening + closing) for opening, closing in packed.wrappers.values())
+        if any(entity_type != 'world' for entity_type, _ in packed.wrappers):
+            wrapper_tokens += packer.count_tokens(ENTITIES_OPENING + ENTITIES_CLOSING)
+        assert packed.tokens == chunk_tokens + wrapper_tokens
+
+    def test_is_deterministic(self, packer):
+        first = packer.build_context('Puck and Prospero argue over the Comedy Circuit Crown', budget=900)
+        second = packer.build_context('Puck and Prospero argue over the Comedy Circuit Crown', budget=900)
+        assert [c.key for c in first.chunks] == [c.key for c in second.chunks]
+        assert first.render() == second.render()
+
+    def test_mentioned_entity_is_rendered(self, packer):
+        rendered = packer.build_context('I talk to Prospero', budget=600).render()
+        assert '<character name="Prospero the Technomancer" id="prospero_technomancer">' in rendered
+
+    def test_prefers_high_priority_and_recent_chunks(self, packer):
+        high = ContextChunk('items', 'a', 'bio', 0, 'x' * 40, 10, 1.5)
+        low = ContextChunk('items', 'b', 'bio', 0, 'y' * 40, 10, 1.0)
+        stale = ContextChunk('items', 'c', 'bio', 0, 'z' * 40, 10, 1.5 * 0.6 ** 3)
+        packer._wrapper_cache.update({('items', key): ('', '', 0) for key in 'abc'})
+        packer._entities_wrapper_tokens = 0
+        packed = packer.pack([(low.base_score, low), (stale.base_score, stale), (high.base_score, high)], budget=20)
+        assert [chunk.entity_id for chunk in packed.chunks] == ['a', 'b']
+
+    def test_chunks_are_precomputed_with_hash_and_tokens(self, packer):
+        chunks = packer.entity_chunks('characters', 'prospero_technomancer')
+        assert chunks is packer.entity_chunks('characters', 'prospero_technomancer')
+        for chunk in chunks:
+            assert chunk.content_hash == content_hash(chunk.text)
+            assert chunk.tokens == packer.count_tokens(chunk.text)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
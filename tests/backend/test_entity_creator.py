@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for bulk, all-or-nothing entity creation
+A crash halfway through an entity should never leave it half-visible
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'scripts', 'world_generation'))
+
+import pytest
+from entity_creator import EntityCreator, EntityWriteError
+from world_loader import WorldContentLoader
+
+
+@pytest.fixture
+def creator(tmp_path):
+    return EntityCreator(tmp_path)
+
+
+def specs(count):
+    kinds = ('character', 'location', 'item')
+    return [{'type': kinds[i % 3], 'id': f'entity_{i:04d}', 'name': f'Entity {i}', 'campaign': 'bulk'}
+            for i in range(count)]
+
+
+class TestCreateMany:
+    """Test the bulk creation API"""
+
+    def test_creates_every_entity(self, creator, tmp_path):
+        result = creator.create_many(specs(60), workers=4)
+        assert len(result['created']) == 60
+        assert result['failed'] == {}
+        loader = WorldContentLoader('bulk', world_path=tmp_path)
+        assert len(loader.load_all()) == 60
+        assert loader.schema_errors == {}
+
+    def test_matches_single_entity_files(self, creator, tmp_path):
+        creator.create_many([{'type': 'character', 'id': 'bulk_hero', 'name': 'Hero', 'campaign': 'one',
+                              'bio': 'Brave.'}])
+        creator.create_character('single_hero', 'Hero', 'one', bio='Brave.')
+        characters = tmp_path / 'campaigns' / 'one' / 'characters'
+        bulk = sorted(path.name.replace('bulk_hero', 'X') for path in characters.glob('bulk_hero*'))
+        single = sorted(path.name.replace('single_hero', 'X') for path in characters.glob('single_hero*'))
+        assert bulk == single
+        assert (characters / 'bulk_hero_bio.md').read_text() == (characters / 'single_hero_bio.md').read_text()
+
+    def test_invalid_specs_are_skipped(self, creator, tmp_path):
+        batch = specs(3) + [{'type': 'item', 'id': 'Bad Id', 'name': 'Bad', 'campaign': 'bulk'},
+                            {'type': 'dragon', 'id': 'smaug', 'name': 'Smaug', 'campaign': 'bulk'}]
+        result = creator.create_many(batch)
+        assert len(result['created']) == 3
+        assert set(result['failed']) == {'Bad Id', 'smaug'}
+        assert not list(tmp_path.rglob('Bad Id*'))
+
+    def test_failed_entity_leaves_no_master_or_temp_files(self, creator, tmp_path):
+        items = tmp_path / 'campaigns' / 'bulk' / 'items'
+        (items / 'entity_0002_stats.json').mkdir(parents=True)
+        result = creator.create_many(specs(6))
+        assert set(result['failed']) == {'entity_0002'}
+        assert not (items / 'entity_0002.json').exists()
+        assert (items / 'entity_0005.json').exists()
+        assert not [path for path in items.glob('entity_0002_*') if path.is_file()]
+        assert not [path for path in tmp_path.rglob('*') if path.name.endswith(('.tmp', '.bak'))]
+
+    def test_single_create_raises_on_write_failure(self, creator, tmp_path):
+        (tmp_path / 'campaigns' / 'one' / 'items' / 'cup_history.md').mkdir(parents=True)
+        with pytest.raises(EntityWriteError):
+            creator.create_item('cup', 'Cup', 'one')
+        assert not (tmp_path / 'campaigns' / 'one' / 'items' / 'cup.json').exists()
+
+    def test_failed_update_restores_previous_files(self, creator, tmp_path):
+        creator.create_item('cup', 'Cup', 'one', description='Old cup')
+        items = tmp_path / 'campaigns' / 'one' / 'items'
+        before = {path.name: path.read_bytes() for path in items.iterdir()}
+        (items / 'cup_stats.json').unlink()
+        (items / 'cup_stats.json').mkdir()
+        with pytest.raises(EntityWriteError):
+            creator.create_item('cup', 'Cup', 'one', description='New cup')
+        after = {path.name: path.read_bytes() for path in items.iterdir() if path.is_file()}
+        assert after == {name: data for name, data in before.items() if name != 'cup_stats.json'}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
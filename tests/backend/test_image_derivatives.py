@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests for responsive image derivatives
+A 2 MB portrait should become a handful of small files, built only once
+"""
+
+import sys
+import os
+import json
+import shutil
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'scripts', 'world_generation'))
+
+import pytest
+from world_loader import DEFAULT_WORLD_PATH
+from image_derivatives import (HAS_PIL, png_dimensions, derivative_names, stale_derivatives, campaign_images,
+                               build_campaign_derivatives)
+
+SHAKESPEARE = DEFAULT_WORLD_PATH / 'campaigns' / 'shakespeare_scifi'
+
+
+@pytest.fixture
+def campaign(tmp_path):
+    characters = tmp_path / 'characters'
+    characters.mkdir()
+    for name in ('ariel_wind_drone.json', 'ariel_wind_drone_portrait.png'):
+        shutil.copy(SHAKESPEARE / 'characters' / name, characters / name)
+    return tmp_path
+
+
+class TestPlanning:
+    """Test naming and staleness without decoding any image"""
+
+    def test_reads_png_size_from_header(self):
+        assert png_dimensions(SHAKESPEARE / 'characters' / 'ariel_wind_drone_portrait.png') == (1024, 1024)
+        assert png_dimensions(SHAKESPEARE / 'characters' / 'ariel_wind_drone.json') is None
+
+    def test_names_skip_upscaling(self):
+        names = derivative_names('ariel_portrait.png', 640, ('webp', 'jpg'))
+        assert names == {'320w_webp': 'ariel_portrait_320w.webp', '320w_jpg': 'ariel_portrait_320w.jpg',
+                         '640w_webp': 'ariel_portrait_640w.webp', '640w_jpg': 'ariel_portrait_640w.jpg',
+                         'placeholder': 'ariel_portrait_placeholder.jpg', 'optimized': 'ariel_portrait_optimized.png'}
+
+    def test_only_missing_or_older_derivatives_are_stale(self, campaign):
+        source = campaign / 'characters' / 'ariel_wind_drone_portrait.png'
+        names = derivative_names(source.name, 1024, ('webp',))
+        fresh = source.with_name(names['320w_webp'])
+        fresh.write_bytes(b'webp')
+        old = source.with_name(names['640w_webp'])
+        old.write_bytes(b'webp')
+        source_mtime = source.stat().st_mtime
+        os.utime(old, (source_mtime - 10, source_mtime - 10))
+        os.utime(fresh, (source_mtime + 10, source_mtime + 10))
+        assert set(stale_derivatives(source, names)) == set(names) - {'320w_webp'}
+
+    def test_finds_entity_images(self, campaign):
+        [(entity_dir, master, role, source)] = campaign_images(campaign)
+        assert (master['id'], role, source.name) == ('ariel_wind_drone', 'portrait', 'ariel_wind_drone_portrait.png')
+
+
+@pytest.mark.skipif(not HAS_PIL, reason='Pillow not installed')
+class TestBuild:
+    """Test encoding and the files listing"""
+
+    def test_builds_once_and_lists_files(self, campaign):
+        summary = build_campaign_derivatives(campaign, workers=2, formats=('webp', 'jpg'))
+        assert summary['rebuilt'] == 1 and summary['entities_updated'] == 1
+        master = json.loads((campaign / 'characters' / 'ariel_wind_drone.json').read_text())
+        assert master['files']['portrait_320w_webp'] == 'ariel_wind_drone_portrait_320w.webp'
+        for name in master['files'].values():
+            if name.startswith('ariel_wind_drone_portrait_'):
+                assert (campaign / 'characters' / name).exists()
+        again = build_campaign_derivatives(campaign, workers=2, formats=('webp', 'jpg'))
+        assert (again['rebuilt'], again['up_to_date'], again['entities_updated']) == (0, 1, 0)
+
+    def test_failed_render_lists_only_written_files(self, campaign):
+        characters = campaign / 'characters'
+        blocker = characters / 'ariel_wind_drone_portrait_1024w.webp'
+        blocker.mkdir()
+        os.utime(blocker, (0, 0))
+        summary = build_campaign_derivatives(campaign, workers=1, formats=('webp',))
+        assert list(summary['failed']) == ['ariel_wind_drone_portrait.png']
+        files = json.loads((characters / 'ariel_wind_drone.json').read_text())['files']
+        assert files['portrait_320w_webp'] == 'ariel_wind_drone_portrait_320w.webp'
+        assert 'portrait_1024w_webp' not in files and 'portrait_optimized' not in files
+        assert all((characters / name).is_file() for name in files.values() if '_portrait_' in name)
+
+    def test_shrunken_source_drops_wider_derivatives(self, campaign):
+        from PIL import Image
+        characters = campaign / 'characters'
+        source = characters / 'ariel_wind_drone_portrait.png'
+        build_campaign_derivatives(campaign, workers=1, formats=('webp',))
+        with Image.open(source) as image:
+            image.resize((500, 500)).save(source)
+        build_campaign_derivatives(campaign, workers=1, formats=('webp',))
+        files = json.loads((characters / 'ariel_wind_drone.json').read_text())['files']
+        assert 'portrait_320w_webp' in files
+        assert 'portrait_640w_webp' not in files and 'portrait_1024w_webp' not in files
+        assert not (characters / 'ariel_wind_drone_portrait_1024w.webp').exists()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Tests for campaign image generation
+Many images in flight at once, backing off when the provider says slow down
+"""
+
+import sys
+import os
+import json
+import threading
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'scripts', 'world_generation'))
+
+import pytest
+import dalle_generator
+from dalle_generator import WorldImageGenerator, AdaptiveLimiter, DALLE_MODEL, DEFAULT_SIZE, DEFAULT_QUALITY
+from image_journal import ImageJobJournal
+from image_manifest import ImageManifest, prompt_hash
+
+
+class FakeRateLimitError(Exception):
+    """Shaped like openai.RateLimitError - a status code and a response with headers"""
+
+    def __init__(self, retry_after):
+        class Response:
+            status_code = 429
+            headers = {'retry-after': str(retry_after)}
+        self.status_code = 429
+        self.response = Response()
+        super().__init__('429 Too Many Requests')
+
+
+class FakeImages:
+    def __init__(self, latency=0.05, rate_limit_first=0):
+        self.latency = latency
+        self.rate_limit_first = rate_limit_first
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, **kwargs):
+        with self._lock:
+            self.calls += 1
+            if self.calls <= self.rate_limit_first:
+                raise FakeRateLimitError(0.05)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self._lock:
+            self.in_flight -= 1
+
+        class Data:
+            url = f'https://images.example/{abs(hash(prompt))}.png'
+
+        class Response:
+            data = [Data()]
+        return Response()
+
+
+class FakeClient:
+    def __init__(self, **kwargs):
+        self.images = FakeImages(**kwargs)
+        self.api_key = 'sk-test'
+
+
+class FakeGenerator(WorldImageGenerator):
+    """Writes a placeholder instead of downloading"""
+
+    def download_image(self, image_url, filename):
+        filename.write_bytes(b'\x89PNG' + image_url.encode())
+        return True
+
+
+def make_campaign(world_path, count):
+    for i in range(count):
+        kind, directory = (('character', 'characters'), ('location', 'locations'), ('item', 'items'))[i % 3]
+        path = world_path / 'campaigns' / 'test' / directory
+        path.mkdir(parents=True, exist_ok=True)
+        (path / f'{kind}_{i}.json').write_text(json.dumps({'id': f'{kind}_{i}', 'name': f'{kind.title()} {i}'}))
+        if kind == 'location':
+            (path / f'{kind}_{i}_inhabitants.json').write_text('{}')
+
+
+@pytest.fixture
+def generator(tmp_path):
+    def make(**kwargs):
+        generator = FakeGenerator(client=FakeClient(**kwargs))
+        generator.world_path = tmp_path
+        return generator
+    return make
+
+
+class TestCampaignGeneration:
+    """Test the concurrent campaign pipeline"""
+
+    def test_runs_images_concurrently(self, generator, tmp_path):
+        make_campaign(tmp_path, 12)
+        gen = generator(latency=0.05)
+        seen = []
+        start = time.perf_counter()
+        summary = gen.generate_all_images_for_campaign('test', max_workers=4,
+                                                       progress=lambda done, total, f, ok: seen.append(done))
+        assert summary['succeeded'] == 12 and summary['failed'] == 0
+        assert seen == list(range(1, 13))
+        assert 1 < gen.client.images.max_in_flight <= 4
+        assert time.perf_counter() - start < 12 * 0.05
+        assert len(list((tmp_path / 'campaigns' / 'test').rglob('*.png'))) == 12
+
+    def test_backs_off_on_429(self, generator, tmp_path):
+        make_campaign(tmp_path, 6)
+        gen = generator(latency=0.01, rate_limit_first=3)
+        summary = gen.generate_all_images_for_campaign('test', max_workers=4)
+        assert summary['succeeded'] == 6
+        assert summary['rate_limited'] == 3
+
+    def test_gives_up_after_retries(self, generator, tmp_path, monkeypatch):
+        monkeypatch.setattr(dalle_generator, 'MAX_RATE_LIMIT_RETRIES', 1)
+        make_campaign(tmp_path, 1)
+        gen = generator(rate_limit_first=10)
+        assert gen.generate_all_images_for_campaign('test')['failed'] == 1
+
+
+class TestIncrementalGeneration:
+    """Test the prompt-hash manifest"""
+
+    def test_rerun_only_regenerates_changed_prompts(self, generator, tmp_path):
+        make_campaign(tmp_path, 6)
+        gen = generator(latency=0)
+        assert gen.generate_all_images_for_campaign('test')['succeeded'] == 6
+        assert (tmp_path / 'campaigns' / 'test' / 'images_manifest.json').exists()
+
+        again = gen.generate_all_images_for_campaign('test')
+        assert (again['succeeded'], again['skipped']) == (0, 6)
+
+        master = tmp_path / 'campaigns' / 'test' / 'items' / 'item_2.json'
+        master.write_text(json.dumps({'id': 'item_2', 'name': 'Renamed Item'}))
+        (tmp_path / 'campaigns' / 'test' / 'characters' / 'character_0_portrait.png').unlink()
+        changed = gen.generate_all_images_for_campaign('test')
+        assert (changed['succeeded'], changed['skipped']) == (2, 4)
+        assert gen.client.images.calls == 8
+
+    def test_force_and_edited_files(self, generator, tmp_path):
+        make_campaign(tmp_path, 3)
+        gen = generator(latency=0)
+        gen.generate_all_images_for_campaign('test')
+        (tmp_path / 'campaigns' / 'test' / 'items' / 'item_2_image.png').write_bytes(b'hand-edited, longer image')
+        assert gen.generate_all_images_for_campaign('test')['succeeded'] == 1
+        assert gen.generate_all_images_for_campaign('test', force=True)['succeeded'] == 3
+
+    def test_adopts_images_made_before_the_manifest(self, generator, tmp_path):
+        make_campaign(tmp_path, 3)
+        (tmp_path / 'campaigns' / 'test' / 'characters' / 'character_0_portrait.png').write_bytes(b'\x89PNG old')
+        summary = generator(latency=0).generate_all_images_for_campaign('test')
+        assert (summary['succeeded'], summary['skipped']) == (2, 1)
+
+    def test_concurrent_manifests_keep_each_others_entries(self, tmp_path):
+        campaign_path = tmp_path / 'campaign'
+        campaign_path.mkdir()
+        for name in ('a.png', 'b.png'):
+            (campaign_path / name).write_bytes(name.encode())
+        first, second = ImageManifest(campaign_path), ImageManifest(campaign_path)
+        first.record(campaign_path / 'a.png', 'hash-a', DALLE_MODEL, DEFAULT_SIZE, DEFAULT_QUALITY)
+        second.record(campaign_path / 'b.png', 'hash-b', DALLE_MODEL, DEFAULT_SIZE, DEFAULT_QUALITY)
+
+        assert set(ImageManifest(campaign_path).entries) == {'a.png', 'b.png'}
+        assert set(second.entries) == {'a.png', 'b.png'}
+        assert not list(campaign_path.glob('*.tmp')) and not list(campaign_path.glob('.*.tmp'))
+
+
+class TestResumableRuns:
+    """Test the job journal behind campaign runs"""
+
+    def test_failed_images_retry_then_dead_letter(self, generator, tmp_path):
+        make_campaign(tmp_path, 3)
+        gen = generator(latency=0)
+        broken = gen.client.images.generate
+
+        def generate(prompt, **kwargs):
+            if 'Item 2' in prompt:
+                raise RuntimeError('content policy')
+            return broken(prompt, **kwargs)
+        gen.client.images.generate = generate
+
+        for run in range(3):
+            summary = gen.generate_all_images_for_campaign('test')
+            assert summary['failed'] == 1
+        assert gen.generate_all_images_for_campaign('test')['dead_lettered'] == 1
+
+        journal = ImageJobJournal(tmp_path / 'campaigns' / 'test')
+        assert list(journal.dead_letters()) == ['items/item_2_image.png']
+        assert journal.dead_letters()['items/item_2_image.png']['error'] == 'content policy'
+
+        gen.client.images.generate = broken
+        journal.retry_dead()
+        assert gen.generate_all_images_for_campaign('test')['succeeded'] == 1
+
+    def test_skips_jobs_claimed_by_another_process(self, generator, tmp_path):
+        make_campaign(tmp_path, 3)
+        gen = generator(latency=0)
+        campaign_path = tmp_path / 'campaigns' / 'test'
+        prompt, filename = gen.campaign_image_jobs('test')[-1]
+        other = ImageJobJournal(campaign_path)
+        other.enqueue([('items/item_2_image.png', prompt_hash(prompt, DALLE_MODEL, DEFAULT_SIZE, DEFAULT_QUALITY))])
+        assert other.claim('items/item_2_image.png')
+
+        summary = gen.generate_all_images_for_campaign('test')
+        assert (summary['claimed_elsewhere'], summary['succeeded']) == (1, 2)
+        assert not filename.exists()
+
+
+class FakeResponse:
+    def __init__(self, status, body, fail_after=None, headers=None):
+        self.status_code = status
+        self.body = body
+        self.fail_after = fail_after
+        self.headers = headers if headers is not None else {'Content-Length': str(len(body))}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), 4):
+            if self.fail_after is not None and start >= self.fail_after:
+                raise ConnectionError('connection reset')
+            yield self.body[start:start + 4]
+
+
+class FakeSession:
+    """Serves IMAGE, dropping the connection partway through the first `drops` responses"""
+
+    def __init__(self, body, drops=0, status=200):
+        self.body = body
+        self.drops = drops
+        self.status = status
+        self.requests = []
+
+    def get(self, url, stream=False, timeout=None, headers=None):
+        assert stream and timeout
+        headers = headers or {}
+        self.requests.append(headers.get('Range'))
+        fail_after = 8 if len(self.requests) <= self.drops else None
+        if self.status != 200:
+            return FakeResponse(self.status, b'')
+        if 'Range' in headers:
+            offset = int(headers['Range'][len('bytes='):-1])
+            return FakeResponse(206, self.body[offset:], fail_after)
+        return FakeResponse(200, self.body, fail_after)
+
+
+IMAGE = bytes(range(48))
+
+
+class TestDownloads:
+    """Test streaming, resume and retry"""
+
+    @pytest.fixture(autouse=True)
+    def no_backoff(self, monkeypatch):
+        monkeypatch.setattr(dalle_generator, 'DOWNLOAD_BACKOFF', 0)
+
+    def test_resumes_after_dropped_connection(self, tmp_path):
+        session = FakeSession(IMAGE, drops=2)
+        gen = WorldImageGenerator(client=FakeClient(), session=session)
+        target = tmp_path / 'portrait.png'
+        assert gen.download_image('https://images.example/a.png', target)
+        assert target.read_bytes() == IMAGE
+        assert session.requests == [None, 'bytes=8-', 'bytes=16-']
+        assert not (tmp_path / '.portrait.png.part').exists()
+
+    def test_gives_up_cleanly_when_retries_run_out(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(dalle_generator, 'MAX_DOWNLOAD_RETRIES', 1)
+        session = FakeSession(IMAGE, drops=5)
+        gen = WorldImageGenerator(client=FakeClient(), session=session)
+        target = tmp_path / 'portrait.png'
+        assert not gen.download_image('https://images.example/a.png', target)
+        assert session.requests == [None, 'bytes=8-']
+        assert not target.exists()
+        assert not (tmp_path / '.portrait.png.part').exists()
+
+    def test_never_resumes_a_part_file_from_an_earlier_run(self, tmp_path):
+        (tmp_path / '.portrait.png.part').write_bytes(b'old image bytes!')
+        session = FakeSession(IMAGE)
+        gen = WorldImageGenerator(client=FakeClient(), session=session)
+        target = tmp_path / 'portrait.png'
+        assert gen.download_image('https://images.example/b.png', target)
+        assert session.requests == [None]
+        assert target.read_bytes() == IMAGE
+
+    def test_client_errors_are_not_retried(self, tmp_path):
+        session = FakeSession(IMAGE, status=403)
+        gen = WorldImageGenerator(client=FakeClient(), session=session)
+        assert not gen.download_image('https://images.example/a.png', tmp_path / 'portrait.png')
+        assert len(session.requests) == 1
+
+
+class TestAdaptiveLimiter:
+    """Test the AIMD concurrency limit"""
+
+    def test_halves_and_recovers(self):
+        limiter = AdaptiveLimiter(8)
+        limiter.backoff(0)
+        limiter.backoff(0)
+        assert limiter.limit == 2
+        for _ in range(dalle_generator.RECOVERY_SUCCESSES):
+            limiter.acquire()
+            limiter.release()
+        assert limiter.limit == 3
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for the image job journal
+A crashed run should resume, and two generators should never make the same image
+"""
+
+import sys
+import os
+import json
+import socket
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'scripts', 'world_generation'))
+
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+from image_journal import ImageJobJournal, JOURNAL_NAME, IN_FLIGHT, DONE, FAILED, DEAD
+
+JOBS = [(f'characters/character_{i}_portrait.png', f'hash{i}') for i in range(30)]
+
+
+def claim_all(campaign_path):
+    journal = ImageJobJournal(campaign_path)
+    return [job_id for job_id, _ in JOBS if journal.claim(job_id)]
+
+
+class TestJournal:
+    """Test state transitions, replay and dead letters"""
+
+    def test_replays_state_from_disk(self, tmp_path):
+        journal = ImageJobJournal(tmp_path, max_attempts=2)
+        assert journal.enqueue(JOBS[:3]) == 3
+        assert journal.enqueue(JOBS[:3]) == 0
+        first, second, third = (job_id for job_id, _ in JOBS[:3])
+        assert journal.claim(first) and journal.claim(second) and journal.claim(third)
+        assert not journal.claim(first)
+        journal.complete(first)
+        assert journal.fail(second, 'HTTP 500') == FAILED
+
+        replayed = ImageJobJournal(tmp_path, max_attempts=2)
+        assert replayed.jobs[first]['state'] == DONE
+        assert replayed.jobs[second]['state'] == FAILED
+        assert replayed.jobs[third]['state'] == IN_FLIGHT
+        assert replayed.claim(second)
+        assert replayed.fail(second, 'HTTP 500 again') == DEAD
+        assert list(replayed.dead_letters()) == [second]
+        assert not replayed.claim(second)
+
+        assert replayed.retry_dead() == [second]
+        assert replayed.jobs[second]['attempts'] == 0 and replayed.claim(second)
+
+    def test_reclaims_jobs_of_dead_processes(self, tmp_path):
+        journal = ImageJobJournal(tmp_path)
+        journal.enqueue(JOBS[:1])
+        job_id = JOBS[0][0]
+        with open(tmp_path / JOURNAL_NAME, 'a') as f:
+            f.write(json.dumps({'job': job_id, 'state': IN_FLIGHT, 'owner': f'{socket.gethostname()}:999999999',
+                                'attempts': 1, 'at': 0}) + '\n')
+        assert ImageJobJournal(tmp_path, lease_seconds=10 ** 12).claim(job_id)
+
+    def test_new_hash_waits_for_a_live_claim(self, tmp_path):
+        journal = ImageJobJournal(tmp_path)
+        journal.enqueue(JOBS[:1])
+        job_id = JOBS[0][0]
+        assert journal.claim(job_id)
+
+        other = ImageJobJournal(tmp_path, lease_seconds=60)
+        assert other.enqueue([(job_id, 'edited-prompt')]) == 0
+        assert other.jobs[job_id]['state'] == IN_FLIGHT
+
+        stale = ImageJobJournal(tmp_path, lease_seconds=-1)
+        assert stale.enqueue([(job_id, 'edited-prompt')]) == 1
+        assert stale.jobs[job_id]['hash'] == 'edited-prompt'
+
+    def test_ignores_torn_lines(self, tmp_path):
+        journal = ImageJobJournal(tmp_path)
+        journal.enqueue(JOBS[:2])
+        with open(tmp_path / JOURNAL_NAME, 'a') as f:
+            f.write('{"job": "characters/chara')
+        replayed = ImageJobJournal(tmp_path)
+        assert replayed.claim(JOBS[1][0])
+        assert ImageJobJournal(tmp_path).jobs[JOBS[1][0]]['state'] == IN_FLIGHT
+
+    def test_compact_keeps_state(self, tmp_path):
+        journal = ImageJobJournal(tmp_path)
+        journal.enqueue(JOBS)
+        for job_id, _ in JOBS:
+            journal.claim(job_id)
+            journal.complete(job_id)
+        journal.compact()
+        assert len((tmp_path / JOURNAL_NAME).read_text().splitlines()) == len(JOBS) + 1
+        assert ImageJobJournal(tmp_path).counts() == {DONE: len(JOBS)}
+
+    def test_other_process_resyncs_after_compaction(self, tmp_path):
+        reader = ImageJobJournal(tmp_path)
+        writer = ImageJobJournal(tmp_path)
+        writer.enqueue(JOBS[:3])
+        for job_id, _ in JOBS[:3]:
+            writer.claim(job_id)
+            writer.complete(job_id)
+        assert reader.counts() == {DONE: 3}
+        writer.compact()
+        writer.enqueue(JOBS[3:30])
+        assert reader.counts() == {DONE: 3, 'queued': 27}
+        assert reader.claim(JOBS[3][0]) and not writer.claim(JOBS[3][0])
+
+    def test_claims_are_exclusive_across_processes(self, tmp_path):
+        ImageJobJournal(tmp_path).enqueue(JOBS)
+        with ProcessPoolExecutor(max_workers=3) as pool:
+            claimed = [job for result in pool.map(claim_all, [tmp_path] * 3) for job in result]
+        assert sorted(claimed) == sorted(job_id for job_id, _ in JOBS)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Tests for speculative scene image prefetch
+After a turn at a location, its inhabitants and neighbours should already be warm
+"""
+
+import sys
+import os
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+
+import pytest
+from image_prefetch import ScenePrefetcher, PREFETCH_SESSION
+from image_queue import ImageJobQueue
+from scene_images import SceneImageResolver
+from server import DalleImageGenerator
+from world_graph import LiveWorldGraph
+from world_loader import WorldContentLoader
+
+
+@pytest.fixture(scope='module')
+def loader():
+    return WorldContentLoader('shakespeare_scifi')
+
+
+@pytest.fixture
+def resolver(loader):
+    return SceneImageResolver(loader)
+
+
+class RecordingGenerate:
+    def __init__(self):
+        self.prompts = []
+
+    def __call__(self, prompt):
+        self.prompts.append(prompt)
+        return {'url': f'https://images.example/{len(self.prompts)}.png', 'prompt': prompt, 'revised_prompt': prompt}
+
+
+class TestScenePrefetcher:
+    """Test picking, warming and scoring likely next scenes"""
+
+    def test_likely_scenes_include_inhabitants_and_creatures(self, loader, resolver):
+        prefetcher = ScenePrefetcher(resolver, LiveWorldGraph(loader))
+        likely = prefetcher.likely_scenes('locations', 'globe_nexus_station')
+        assert ('characters', 'prospero_technomancer') in likely
+        assert ('creatures', 'memory_ghosts') in likely
+
+    def test_artwork_is_warmed_without_budget(self, loader, resolver):
+        prefetcher = ScenePrefetcher(resolver, LiveWorldGraph(loader), budget=0)
+        prefetcher.observe("The stage lights of the Globe Nexus Station flicker.", "I enter the station")
+        assert ('characters', 'prospero_technomancer') in prefetcher.warmed
+        prefetcher.observe("Prospero raises his staff.", "I greet the old man")
+        stats = prefetcher.stats()
+        assert stats['scenes'] == 2 and stats['hits'] == 1 and stats['spent'] == 0
+
+    def test_creatures_are_generated_within_budget(self, loader, resolver):
+        generate = RecordingGenerate()
+        queue = ImageJobQueue(generate, max_workers=1)
+        prefetcher = ScenePrefetcher(resolver, LiveWorldGraph(loader), queue, budget=1)
+        try:
+            prefetcher.observe("You arrive at the Globe Nexus Station.")
+            creature_jobs = [job for job in queue.jobs.values() if job.session_id == PREFETCH_SESSION]
+            assert len(creature_jobs) == 1
+            queue.wait(creature_jobs[0].id, 5)
+            assert prefetcher.stats()['over_budget'] >= 1
+            assert generate.prompts == [resolver.creature_prompt('memory_ghosts')]
+
+            prefetcher.observe("The memory ghosts drift closer.")
+            assert prefetcher.stats()['hits'] == 1
+        finally:
+            queue.close()
+
+    def test_concurrent_turns_never_spend_past_budget(self, loader, resolver):
+        generate = RecordingGenerate()
+        queue = ImageJobQueue(generate, max_workers=8)
+        prefetcher = ScenePrefetcher(resolver, LiveWorldGraph(loader), queue, budget=1)
+        start = threading.Barrier(4)
+
+        def turn(place):
+            start.wait()
+            prefetcher.prefetch('locations', place)
+
+        places = ['globe_nexus_station', 'arden_digital_forest', 'elsinore_data_fortress', 'globe_nexus_station']
+        threads = [threading.Thread(target=turn, args=(place,)) for place in places]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert prefetcher.stats()['spent'] == 1
+            assert len([job for job in queue.jobs.values() if job.session_id == PREFETCH_SESSION]) == 1
+        finally:
+            queue.close()
+
+    def test_failed_prefetch_is_retried_on_a_later_turn(self, loader, resolver):
+        def fail(prompt):
+            raise RuntimeError('content policy')
+        queue = ImageJobQueue(fail, max_workers=1)
+        prefetcher = ScenePrefetcher(resolver, LiveWorldGraph(loader), queue, budget=2)
+        creature = ('creatures', 'memory_ghosts')
+        try:
+            prefetcher.prefetch('locations', 'globe_nexus_station')
+            queue.wait(prefetcher.jobs[creature], 5)
+            queue.generate = RecordingGenerate()
+            prefetcher.prefetch('locations', 'globe_nexus_station')
+            queue.wait(prefetcher.jobs[creature], 5)
+            assert queue.generate.prompts == [resolver.creature_prompt('memory_ghosts')]
+            assert prefetcher.stats()['spent'] == 2
+        finally:
+            queue.close()
+
+    def test_edited_entities_are_warmed_again(self, loader, resolver):
+        prefetcher = ScenePrefetcher(resolver, LiveWorldGraph(loader), budget=0)
+        prefetcher.warmed[('creatures', 'memory_ghosts')] = 'memory ghosts in The Globe Nexus Station'
+        prefetcher.prefetch('locations', 'globe_nexus_station')
+        prospero = ('characters', 'prospero_technomancer')
+        assert prospero in prefetcher.warmed
+
+        prefetcher.invalidate(*prospero, None)
+        assert prospero not in prefetcher.warmed
+        prefetcher.invalidate('locations', 'globe_nexus_station', None)
+        assert ('creatures', 'memory_ghosts') not in prefetcher.warmed
+
+    def test_observe_later_warms_on_the_prefetch_thread(self, loader, resolver):
+        prefetcher = ScenePrefetcher(resolver, LiveWorldGraph(loader), budget=0)
+        prefetcher.observe_later("The stage lights of the Globe Nexus Station flicker.", "I enter the station")
+        prefetcher.turns.join()
+        assert ('characters', 'prospero_technomancer') in prefetcher.warmed
+        assert prefetcher._thread is not threading.current_thread()
+
+    def test_known_creature_turn_reuses_prefetched_image(self, loader, resolver):
+        generate = RecordingGenerate()
+        queue = ImageJobQueue(generate, max_workers=1)
+        prompt = resolver.creature_prompt('memory_ghosts')
+        queue.wait(queue.submit(PREFETCH_SESSION, prompt).id, 5)
+        generator = DalleImageGenerator(scene_images=resolver, image_queue=queue)
+        generator.client = object()
+        try:
+            image = generator.generate_image("The memory ghosts drift closer.", "I hold my ground", session_id='alice')
+            assert image['url'] == 'https://images.example/1.png'
+            assert len(generate.prompts) == 1
+        finally:
+            queue.close()
+
+    def test_creature_prompt_names_its_home(self, resolver):
+        assert 'memory ghosts in The Globe Nexus Station' in resolver.creature_prompt('memory_ghosts')
+        generator = DalleImageGenerator(mock_mode=True, scene_images=resolver)
+        assert generator.generate_image("Data wolves howl in the distance.")['prompt'] == \
+            resolver.creature_prompt('data_wolves')
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
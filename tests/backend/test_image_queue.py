@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-session image job queue
+A player's newer turn should cancel or discard the images of scenes they left
+"""
+
+import sys
+import os
+import json
+import threading
+import urllib.request
+import urllib.error
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+
+import pytest
+from http.server import HTTPServer
+from image_queue import ImageJobQueue, SCENE, PREFETCH, DONE, SUPERSEDED, FAILED
+from server import DalleImageGenerator, create_handler_with_mock
+
+
+class GatedGenerate:
+    """Stands in for DALL-E: each call blocks until released, and every call is recorded"""
+
+    def __init__(self):
+        self.calls = []
+        self.started = threading.Semaphore(0)
+        self.release = threading.Event()
+
+    def __call__(self, prompt):
+        self.calls.append(prompt)
+        self.started.release()
+        self.release.wait(5)
+        if 'broken' in prompt:
+            raise RuntimeError('content policy')
+        return {'url': f'https://images.example/{len(self.calls)}.png', 'prompt': prompt, 'revised_prompt': prompt}
+
+
+@pytest.fixture
+def gated():
+    generate = GatedGenerate()
+    queue = ImageJobQueue(generate, max_workers=1)
+    yield generate, queue
+    generate.release.set()
+    queue.close()
+
+
+class TestImageJobQueue:
+    """Test superseding, caching and priorities"""
+
+    def test_queued_job_is_cancelled_before_dispatch(self, gated):
+        generate, queue = gated
+        blocker = queue.submit('other', 'castle')
+        assert generate.started.acquire(timeout=5)
+        first = queue.submit('alice', 'forest')
+        second = queue.submit('alice', 'river')
+        generate.release.set()
+        assert queue.wait(second.id, 5).state == DONE
+        assert queue.wait(blocker.id, 5).state == DONE
+        assert first.state == SUPERSEDED
+        assert 'forest' not in generate.calls
+        assert queue.stats()['cancelled'] == 1
+        assert queue.stats()['wasted_calls'] == 0
+
+    def test_running_job_is_discarded_but_cached(self, gated):
+        generate, queue = gated
+        first = queue.submit('alice', 'forest')
+        assert generate.started.acquire(timeout=5)
+        second = queue.submit('alice', 'river')
+        generate.release.set()
+        assert queue.wait(second.id, 5).state == DONE
+        assert queue.wait(first.id, 5).state == SUPERSEDED
+        assert 'image' not in first.to_dict()
+        assert queue.stats()['wasted_calls'] == 1
+
+        again = queue.submit('alice', 'forest')
+        assert again.state == DONE
+        assert generate.calls.count('forest') == 1
+        assert queue.stats()['cache_hits'] == 1
+
+    def test_sessions_do_not_supersede_each_other(self, gated):
+        generate, queue = gated
+        generate.release.set()
+        alice = queue.submit('alice', 'forest')
+        bob = queue.submit('bob', 'river')
+        assert queue.wait(alice.id, 5).state == DONE
+        assert queue.wait(bob.id, 5).state == DONE
+
+    def test_jobs_without_a_session_never_supersede(self, gated):
+        generate, queue = gated
+        blocker = queue.submit(None, 'castle')
+        assert generate.started.acquire(timeout=5)
+        first = queue.submit(None, 'forest')
+        second = queue.submit(None, 'river')
+        generate.release.set()
+        for job in (blocker, first, second):
+            assert queue.wait(job.id, 5).state == DONE
+        assert queue.stats()['cancelled'] == 0
+        assert len({blocker.id, first.id, second.id}) == 3
+
+    def test_scene_jobs_run_before_prefetch(self, gated):
+        generate, queue = gated
+        queue.submit('other', 'castle')
+        assert generate.started.acquire(timeout=5)
+        queue.submit('alice', 'cave', priority=PREFETCH)
+        scene = queue.submit('bob', 'river', priority=SCENE)
+        generate.release.set()
+        queue.wait(scene.id, 5)
+        assert generate.calls.index('river') < generate.calls.index('cave')
+
+    def test_cancel_and_failure(self, gated):
+        generate, queue = gated
+        generate.release.set()
+        broken = queue.submit('alice', 'broken scene')
+        assert queue.wait(broken.id, 5).state == FAILED
+        assert queue.stats()['failed'] == 1
+        queue.cancel('alice')
+        assert broken.state == FAILED
+
+    def test_finished_jobs_leave_no_session_entries(self, gated):
+        generate, queue = gated
+        generate.release.set()
+        jobs = [queue.submit(f'player-{i}', f'scene {i}') for i in range(20)]
+        shared = queue.submit('player-0', 'scene 19')
+        for job in jobs + [shared]:
+            queue.wait(job.id, 5)
+        assert queue._current == {} and queue._sessions == {}
+        assert queue.submit('player-0', 'scene 1').state == DONE
+        assert queue._current == {}
+
+
+class FakeImages:
+    def __init__(self, release):
+        self.release = release
+
+    def generate(self, **kwargs):
+        self.release.wait(5)
+        return type('Response', (), {'data': [type('Image', (), {'url': 'https://images.example/a.png',
+                                                                 'revised_prompt': kwargs['prompt']})()]})()
+
+
+class TestChatImageJobs:
+    """Test the chat path handing out jobs and the poll endpoint"""
+
+    def test_pending_job_then_poll(self):
+        release = threading.Event()
+        generator = DalleImageGenerator()
+        generator.client = type('Client', (), {'images': FakeImages(release)})()
+        queue = ImageJobQueue(generator.request_image, max_workers=1)
+        generator.image_queue = queue
+        httpd = HTTPServer(('localhost', 0), create_handler_with_mock(True, image_queue=queue))
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        try:
+            pending = generator.generate_image("A dragon over the mountain", "I look up", session_id='alice')
+            assert pending['status'] in ('pending', 'running') and pending['url'] is None
+            url = f"http://localhost:{httpd.server_address[1]}"
+            release.set()
+            queue.wait(pending['job'], 5)
+            with urllib.request.urlopen(url + pending['poll'], timeout=5) as response:
+                polled = json.load(response)
+            assert polled['status'] == DONE
+            assert polled['image']['url'] == 'https://images.example/a.png'
+            with pytest.raises(urllib.error.HTTPError):
+                urllib.request.urlopen(f'{url}/api/images/img-{"0" * 32}', timeout=5)
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+            queue.close()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
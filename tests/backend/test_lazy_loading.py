@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for memory-bounded lazy loading of entity markdown
+Big campaigns shouldn't need every bio in RAM at once!
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+
+import pytest
+from world_loader import WorldContentLoader, ByteBudgetLRU
+from context_packer import ContextPacker
+
+
+class TestByteBudgetLRU:
+    """Test the size-bounded cache itself"""
+
+    def test_evicts_least_recently_used(self):
+        cache = ByteBudgetLRU(10)
+        cache.put('a', 'aaaa', 4)
+        cache.put('b', 'bbbb', 4)
+        cache.get('a')
+        cache.put('c', 'cccc', 4)
+        assert cache.get('b') is None
+        assert cache.get('a') == 'aaaa'
+        assert cache.bytes == 8
+        assert cache.evictions == 1
+
+    def test_skips_values_larger_than_budget(self):
+        cache = ByteBudgetLRU(3)
+        cache.put('big', 'xxxx', 4)
+        assert len(cache) == 0
+        assert cache.bytes == 0
+
+    def test_reports_hits_and_misses(self):
+        cache = ByteBudgetLRU(10)
+        cache.put('a', 'a', 1)
+        cache.get('a')
+        cache.get('missing')
+        stats = cache.stats()
+        assert (stats['hits'], stats['misses']) == (1, 1)
+
+
+class TestLazyLoading:
+    """Test that the loader stays within its text budget"""
+
+    def test_text_cache_stays_within_budget(self):
+        loader = WorldContentLoader('shakespeare_scifi', text_budget=4096)
+        loader.load_all()
+        assert 0 < loader.text_cache.bytes <= 4096
+        assert loader.text_cache.evictions > 0
+
+    def test_evicted_text_is_reread(self):
+        small = WorldContentLoader('shakespeare_scifi', text_budget=1)
+        full = WorldContentLoader('shakespeare_scifi')
+        entity = small.load_entity('characters', 'prospero_technomancer')
+        assert len(small.text_cache) == 0
+        assert entity['content']['bio'] == full.load_entity('characters', 'prospero_technomancer')['content']['bio']
+        assert small.text_cache.misses > 0
+
+    def test_content_matches_regardless_of_budget(self):
+        small = WorldContentLoader('shakespeare_scifi', text_budget=2048)
+        full = WorldContentLoader('shakespeare_scifi')
+        assert small.load_all() == full.load_all()
+
+    def test_packer_output_is_unchanged_by_budget(self):
+        small = ContextPacker(WorldContentLoader('shakespeare_scifi', text_budget=1024), chunk_cache_bytes=1024)
+        full = ContextPacker(WorldContentLoader('shakespeare_scifi'))
+        message = 'Prospero shows Puck the Tempest in a Bottle'
+        assert small.build_context(message, budget=900).render() == full.build_context(message, budget=900).render()
+        assert small.stats()['chunk_cache']['bytes'] <= 1024
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests for the chat load generator
+Runs small offline loads against a mock server and checks the report
+"""
+
+import sys
+import os
+import json
+import threading
+import urllib.request
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+
+import pytest
+from http.server import HTTPServer
+from load_test import run_load_test, percentiles, summarize
+from server import create_handler_with_mock
+
+
+@pytest.fixture(scope='module')
+def server():
+    httpd = HTTPServer(('localhost', 0), create_handler_with_mock(True))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://localhost:{httpd.server_address[1]}'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class TestLoadTest:
+    """Test the load generator and its report"""
+
+    def test_percentiles(self):
+        values = [i / 1000 for i in range(1, 101)]
+        result = percentiles(values)
+        assert result['p50'] == 50.0 and result['p95'] == 95.0 and result['p99'] == 99.0 and result['max'] == 100.0
+        assert percentiles([])['p99'] == 0.0
+
+    def test_chat_load(self, server):
+        report = run_load_test(server, players=3, turns=2)
+        assert report['requests'] == 6
+        assert report['error_rate'] == 0.0 and report['fallback_rate'] == 0.0
+        assert report['rps'] > 0
+        assert 0 < report['ttfb_ms']['p50'] <= report['latency_ms']['max']
+        assert list(report['by_endpoint']) == ['chat']
+
+    def test_mixed_load_includes_streaming(self, server):
+        report = run_load_test(server, players=2, turns=2, mode='mixed')
+        assert report['by_endpoint']['chat']['requests'] == 2
+        assert report['by_endpoint']['stream']['requests'] == 2
+        assert report['by_endpoint']['stream']['errors'] == {}
+        assert report['first_event_ms']['max'] > 0
+
+    def test_errors_are_counted(self):
+        report = run_load_test('http://localhost:9', players=1, turns=2, timeout=2)
+        assert report['error_rate'] == 1.0
+        assert report['errors'] == {'connection': 2}
+
+    def test_summarize_counts_fallbacks(self):
+        rows = [{'endpoint': 'chat', 'latency': 0.01, 'ttfb': 0.005, 'fallback': True},
+                {'endpoint': 'chat', 'latency': 0.02, 'ttfb': 0.01, 'fallback': False}]
+        assert summarize(rows, 1.0)['fallback_rate'] == 0.5
+
+
+class TestStreamEndpoint:
+    """Test /api/chat/stream in mock mode"""
+
+    def test_stream_events(self, server):
+        body = json.dumps({'messages': [{'role': 'user', 'content': 'I attack the dragon'}]}).encode('utf-8')
+        request = urllib.request.Request(f'{server}/api/chat/stream', data=body,
+                                         headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=5) as response:
+            assert response.headers['Content-Type'] == 'text/event-stream'
+            events = [line[len(b'data: '):] for line in response.read().split(b'\n\n') if line]
+        assert events[-1] == b'[DONE]'
+        text = ''.join(json.loads(event)['content'] for event in events[:-1])
+        assert len(text.split()) == len(events) - 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for prefork serving
+Every worker should answer from the parent's world without loading its own
+"""
+
+import sys
+import os
+import json
+import urllib.request
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+
+import pytest
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from prefork import PreforkServer, HAS_FORK, private_memory_kb, benchmark_workers
+from server import create_handler_with_mock
+from world_loader import WorldContentLoader
+from world_index import EntityIndex
+from world_loader import DEFAULT_WORLD_PATH
+from world_store import WorldStore
+
+pytestmark = pytest.mark.skipif(not HAS_FORK, reason='prefork needs os.fork()')
+
+
+class TestPreforkServer:
+    """Test forking, serving and shutdown"""
+
+    def test_workers_share_one_index(self):
+        index = EntityIndex.from_loader(WorldContentLoader('shakespeare_scifi'))
+        server = HTTPServer(('localhost', 0), create_handler_with_mock(True, world_index=index))
+        prefork = PreforkServer(server, 2)
+        pids = prefork.start()
+        try:
+            url = f'http://localhost:{server.server_address[1]}'
+            seen = set()
+            for _ in range(6):
+                with urllib.request.urlopen(f'{url}/health', timeout=5) as response:
+                    seen.add(json.load(response)['worker']['pid'])
+            assert seen <= set(pids)
+            with urllib.request.urlopen(f'{url}/api/world/entities?tags=wizard', timeout=5) as response:
+                assert [entity['id'] for entity in json.load(response)['entities']] == ['prospero_technomancer']
+        finally:
+            prefork.stop()
+        assert prefork.pids == []
+
+    def test_workers_read_the_store_through_their_own_connection(self, tmp_path):
+        db_path = tmp_path / 'world.db'
+        with WorldStore(db_path) as writer:
+            writer.import_campaign(DEFAULT_WORLD_PATH / 'campaigns' / 'shakespeare_scifi')
+        store = WorldStore(db_path, read_only=True)
+        parent_conn = store.conn
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = store.read_bytes('shakespeare_scifi', 'characters/prospero_technomancer.json') or b''
+                body += b' fresh' if store.conn is not parent_conn else b' inherited'
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = HTTPServer(('localhost', 0), Handler)
+        prefork = PreforkServer(server, 2, on_fork=store.reopen)
+        prefork.start()
+        try:
+            for _ in range(4):
+                with urllib.request.urlopen(f'http://localhost:{server.server_address[1]}/', timeout=5) as response:
+                    body = response.read()
+                assert body.endswith(b' fresh') and b'prospero_technomancer' in body
+        finally:
+            prefork.stop()
+        assert store.read_bytes('shakespeare_scifi', 'characters/prospero_technomancer.json')
+        store.close()
+
+    def test_worker_memory_stays_flat(self):
+        if private_memory_kb() is None:
+            pytest.skip('needs /proc/self/smaps_rollup')
+        result = benchmark_workers(5000, worker_counts=(1, 3), queries=20)
+        one, three = result['runs']
+        assert three['max_private_kb'] < one['max_private_kb'] * 1.5
+        assert one['max_touched_private_kb'] >= one['max_private_kb']
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for scene image resolution
+Turns about known places, people and things should reuse campaign artwork
+"""
+
+import sys
+import os
+import json
+import threading
+import urllib.request
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+
+import pytest
+from http.server import HTTPServer
+from scene_images import SceneImageResolver
+from server import DalleImageGenerator, create_handler_with_mock
+from world_loader import WorldContentLoader
+
+
+@pytest.fixture(scope='module')
+def resolver():
+    return SceneImageResolver(WorldContentLoader('shakespeare_scifi'))
+
+
+class TestSceneImageResolver:
+    """Test picking campaign artwork for a turn"""
+
+    def test_location_sets_the_scene(self, resolver):
+        image = resolver.resolve("Prospero waits among the trees.", "I walk into the Arden Digital Forest")
+        assert image['source'] == 'world'
+        assert image['entity']['id'] == 'arden_digital_forest'
+        assert image['url'].startswith('/world/shakespeare_scifi/locations/arden_digital_forest_image.png?v=')
+
+    def test_character_portrait_without_location(self, resolver):
+        image = resolver.resolve("Prospero raises his staff.", "I greet him")
+        assert (image['entity']['id'], image['entity']['role']) == ('prospero_technomancer', 'portrait')
+
+    def test_novel_scene_falls_through(self, resolver):
+        assert resolver.resolve("A dragon circles a lonely tower.", "I hide") is None
+        assert resolver.stats()['generated'] >= 1
+
+    def test_generator_skips_dalle_for_known_scenes(self, resolver):
+        generator = DalleImageGenerator(mock_mode=True, scene_images=resolver)
+        assert generator.generate_image("You reach the Arden Digital Forest.")['source'] == 'world'
+        assert 'placeholder' in generator.generate_image("A dragon circles a lonely tower.")['url']
+
+
+class TestChatImages:
+    """Test that /api/chat returns campaign artwork"""
+
+    def test_chat_returns_world_asset(self, resolver):
+        httpd = HTTPServer(('localhost', 0), create_handler_with_mock(True, scene_images=resolver))
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        try:
+            url = f'http://localhost:{httpd.server_address[1]}'
+            body = json.dumps({'messages': [{'role': 'user', 'content': 'I look at the Tempest in a Bottle'}]})
+            request = urllib.request.Request(f'{url}/api/chat', data=body.encode('utf-8'),
+                                             headers={'Content-Type': 'application/json'})
+            with urllib.request.urlopen(request, timeout=5) as response:
+                image = json.load(response)['image']
+            assert image['entity']['id'] == 'tempest_in_bottle'
+            with urllib.request.urlopen(url + image['url'], timeout=5) as response:
+                assert response.headers['Content-Type'] == 'image/png'
+                assert 'immutable' in response.headers['Cache-Control']
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for the token counting service
+Budgets are only as good as the counts behind them!
+"""
+
+import sys
+import os
+import json
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+
+import pytest
+from token_counter import TokenCounter, heuristic_token_count, content_hash
+
+
+class TestHeuristicCount:
+    """Test the fallback estimator"""
+
+    def test_counts_words_and_punctuation(self):
+        assert heuristic_token_count('To be, or not to be.') == 8
+
+    def test_long_words_cost_more(self):
+        assert heuristic_token_count('technomancer') > heuristic_token_count('mage')
+
+    def test_empty_text(self):
+        assert heuristic_token_count('') == 0
+
+
+class TestTokenCounter:
+    """Test memoization and persistence"""
+
+    def test_memoizes_by_content_hash(self):
+        calls = []
+        counter = TokenCounter(lambda text: calls.append(text) or len(text), name='len')
+        assert counter.count('Prospero') == 8
+        assert counter.count('Prospero') == 8
+        assert calls == ['Prospero']
+        assert counter.stats() == {'entries': 1, 'hits': 1, 'misses': 1}
+
+    def test_persists_and_reloads(self, tmp_path):
+        cache_path = tmp_path / 'token_counts.json'
+        counter = TokenCounter(len, name='len', cache_path=cache_path)
+        counter.warm(['Puck', 'Ariel'])
+        counter.save()
+
+        data = json.loads(cache_path.read_text())
+        assert data['tokenizer'] == 'len'
+        assert data['counts'][content_hash('Puck')] == 4
+
+        reloaded = TokenCounter(lambda text: pytest.fail('should be cached'), name='len', cache_path=cache_path)
+        assert reloaded.count('Ariel') == 5
+
+    def test_ignores_counts_from_another_tokenizer(self, tmp_path):
+        cache_path = tmp_path / 'token_counts.json'
+        counter = TokenCounter(len, name='len', cache_path=cache_path)
+        counter.count('Hamlet')
+        counter.save()
+
+        other = TokenCounter(lambda text: 1, name='other', cache_path=cache_path)
+        assert other.count('Hamlet') == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Tests for the visual lexicon
+Elements should come out ranked, stable and in the campaign's own vocabulary
+"""
+
+import sys
+import os
+import json
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+
+import pytest
+from visual_lexicon import VisualLexicon, benchmark_extraction, LEXICON_NAME
+from world_loader import DEFAULT_WORLD_PATH
+from server import DalleImageGenerator
+
+
+class TestVisualLexicon:
+    """Test extraction and ranking"""
+
+    def test_finds_the_classic_elements(self):
+        lexicon = VisualLexicon.default()
+        assert 'glowing' in lexicon.extract("You enter a dark forest with twisted trees and glowing mushrooms")
+        assert 'dragon' in lexicon.extract("The dragon breathes fire as you raise your magical sword")
+        elements = lexicon.extract("Ancient stone pillars reach toward the starry sky")
+        assert 'stone pillars' in elements and 'starry sky' in elements
+
+    def test_ranking_is_deterministic(self):
+        lexicon = VisualLexicon.default()
+        text = "Ancient stone pillars reach toward the starry sky while a wizard studies glowing crystals"
+        assert lexicon.extract(text) == ['wizard', 'crystals', 'stone pillars', 'starry sky', 'glowing']
+        assert lexicon.extract(text, limit=2) == ['wizard', 'crystals']
+
+    def test_repeated_group_outranks_single_mention(self):
+        lexicon = VisualLexicon({'light': (1.0, ('torch',)), 'beast': (1.5, ('beast',))})
+        assert lexicon.extract("A torch, another torch, and a beast") == ['torch', 'beast']
+
+    def test_word_boundaries(self):
+        assert VisualLexicon.default().extract("The image shows damage to the pathway") == []
+
+    def test_campaign_lexicon_extends_defaults(self, tmp_path):
+        (tmp_path / LEXICON_NAME).write_text(json.dumps({'groups': {
+            'forest': {'terms': ['digital forest']},
+            'android': {'weight': 2.0, 'terms': ['android']},
+        }}))
+        lexicon = VisualLexicon.for_campaign(tmp_path)
+        assert lexicon.extract("An android walks through the digital forest") == ['android', 'digital forest']
+
+    def test_bad_campaign_lexicon_falls_back(self, tmp_path):
+        (tmp_path / LEXICON_NAME).write_text('{"groups": {"x": {}}}')
+        assert VisualLexicon.for_campaign(tmp_path).terms == VisualLexicon.default().terms
+
+    def test_shipped_campaign_lexicon(self):
+        lexicon = VisualLexicon.for_campaign(DEFAULT_WORLD_PATH / 'campaigns' / 'shakespeare_scifi')
+        assert lexicon.extract("The AI prince haunts the data fortress")[:2] == ['ai prince', 'data fortress']
+
+    def test_prompt_uses_top_elements(self):
+        generator = DalleImageGenerator(mock_mode=True)
+        prompt = generator.build_dalle_prompt("A dragon guards the ancient ruins under a starry sky by the river")
+        assert prompt.startswith("Fantasy RPG scene: dragon, ancient ruins, river")
+
+    def test_benchmark(self):
+        result = benchmark_extraction(rounds=10)
+        assert result['legacy_us'] > 0 and result['lexicon_us'] > 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
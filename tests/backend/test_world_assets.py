@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Tests for world asset serving
+Images come straight off disk with ETags, ranges and Accept-picked derivatives
+"""
+
+import sys
+import os
+import threading
+import urllib.request
+import urllib.error
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+
+import pytest
+from http.server import HTTPServer
+from world_assets import AssetCatalog, parse_range, accepted, IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL
+from server import create_handler_with_mock
+
+PORTRAIT = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def world(tmp_path):
+    characters = tmp_path / 'campaigns' / 'test' / 'characters'
+    characters.mkdir(parents=True)
+    (characters / 'hero_portrait.png').write_bytes(PORTRAIT)
+    (characters / 'hero_portrait_320w.webp').write_bytes(b'webp-320')
+    (characters / 'hero_portrait_1024w.webp').write_bytes(b'webp-1024')
+    (characters / 'hero_portrait_1024w.avif').write_bytes(b'avif-1024')
+    (characters / 'hero_secrets.md').write_text('The hero is the villain')
+    return tmp_path
+
+
+@pytest.fixture
+def server(world):
+    httpd = HTTPServer(('localhost', 0), create_handler_with_mock(True, asset_catalog=AssetCatalog(world)))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://localhost:{httpd.server_address[1]}'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def fetch(url, method='GET', **headers):
+    request = urllib.request.Request(url, headers=headers, method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+class TestAssetCatalog:
+    """Test resolution, negotiation and range parsing"""
+
+    def test_resolve_refuses_non_images_and_traversal(self, world):
+        catalog = AssetCatalog(world)
+        assert catalog.resolve('test', 'characters/hero_portrait.png')
+        assert catalog.resolve('test', 'characters/hero_secrets.md') is None
+        assert catalog.resolve('test', '../test/characters/hero_portrait.png') is None
+        assert catalog.resolve('..', 'campaigns/test/characters/hero_portrait.png') is None
+        assert catalog.resolve('test', 'characters/missing.png') is None
+
+    def test_negotiate_prefers_avif_then_webp_then_png(self, world):
+        catalog = AssetCatalog(world)
+        path = catalog.resolve('test', 'characters/hero_portrait.png')
+        assert catalog.negotiate(path, 'image/avif,image/webp,*/*').name == 'hero_portrait_1024w.avif'
+        assert catalog.negotiate(path, 'image/webp,*/*').name == 'hero_portrait_1024w.webp'
+        assert catalog.negotiate(path, 'image/webp', width=300).name == 'hero_portrait_320w.webp'
+        assert catalog.negotiate(path, 'image/avif;q=0,image/webp').name == 'hero_portrait_1024w.webp'
+        assert catalog.negotiate(path, '*/*').name == 'hero_portrait.png'
+
+    def test_parse_range(self):
+        assert parse_range(None, 100) is None
+        assert parse_range('bytes=0-9', 100) == (0, 10)
+        assert parse_range('bytes=90-', 100) == (90, 10)
+        assert parse_range('bytes=-5', 100) == (95, 5)
+        assert parse_range('bytes=50-500', 100) == (50, 50)
+        assert parse_range('bytes=0-1,5-6', 100) is None
+        with pytest.raises(ValueError):
+            parse_range('bytes=100-', 100)
+
+    def test_accepted(self):
+        assert accepted('image/avif,image/webp', 'image/webp')
+        assert not accepted('image/webp;q=0', 'image/webp')
+        assert not accepted('*/*', 'image/webp')
+
+    def test_etag_follows_content(self, world):
+        catalog = AssetCatalog(world)
+        path = catalog.resolve('test', 'characters/hero_portrait.png')
+        before = catalog.etag(path, path.stat())
+        path.write_bytes(PORTRAIT + b'!')
+        assert catalog.etag(path, path.stat()) != before
+
+    def test_etag_cache_is_bounded(self, world):
+        catalog = AssetCatalog(world, etag_cache_size=2)
+        for path in sorted((world / 'campaigns' / 'test' / 'characters').glob('hero_portrait*')):
+            catalog.etag(path, path.stat())
+        assert len(catalog._etags) == 2
+
+
+class TestAssetRoute:
+    """Test the /world/ route end to end"""
+
+    def test_serves_whole_image(self, server):
+        status, headers, body = fetch(f'{server}/world/test/characters/hero_portrait.png')
+        assert status == 200
+        assert body == PORTRAIT
+        assert headers['Content-Type'] == 'image/png'
+        assert headers['Accept-Ranges'] == 'bytes'
+        assert headers['Vary'] == 'Accept'
+        assert headers['Cache-Control'] == REVALIDATE_CACHE_CONTROL
+
+    def test_versioned_url_is_immutable(self, server, world):
+        url = AssetCatalog(world).url('test', 'characters/hero_portrait.png')
+        status, headers, _ = fetch(server + url)
+        assert status == 200
+        assert headers['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+
+    def test_versioned_url_stays_immutable_when_negotiated(self, server, world):
+        url = AssetCatalog(world).url('test', 'characters/hero_portrait.png')
+        status, headers, body = fetch(server + url, Accept='image/webp,*/*')
+        assert (status, body) == (200, b'webp-1024')
+        assert headers['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+        _, stale, _ = fetch(f'{server}/world/test/characters/hero_portrait.png?v=0000', Accept='image/webp,*/*')
+        assert stale['Cache-Control'] == REVALIDATE_CACHE_CONTROL
+
+    def test_range_request(self, server):
+        status, headers, body = fetch(f'{server}/world/test/characters/hero_portrait.png', Range='bytes=256-511')
+        assert status == 206
+        assert body == PORTRAIT[256:512]
+        assert headers['Content-Range'] == f'bytes 256-511/{len(PORTRAIT)}'
+
+    def test_unsatisfiable_range(self, server):
+        status, headers, _ = fetch(f'{server}/world/test/characters/hero_portrait.png', Range='bytes=999999-')
+        assert status == 416
+        assert headers['Content-Range'] == f'bytes */{len(PORTRAIT)}'
+
+    def test_if_none_match(self, server):
+        url = f'{server}/world/test/characters/hero_portrait.png'
+        _, headers, _ = fetch(url)
+        status, _, body = fetch(url, **{'If-None-Match': headers['ETag']})
+        assert status == 304
+        assert body == b''
+
+    def test_accept_picks_derivative(self, server):
+        status, headers, body = fetch(f'{server}/world/test/characters/hero_portrait.png?w=200',
+                                      Accept='image/webp,*/*')
+        assert status == 200
+        assert body == b'webp-320'
+        assert headers['Content-Type'] == 'image/webp'
+
+    def test_head(self, server):
+        status, headers, body = fetch(f'{server}/world/test/characters/hero_portrait.png', method='HEAD')
+        assert status == 200
+        assert headers['Content-Length'] == str(len(PORTRAIT))
+        assert body == b''
+
+    def test_secrets_are_not_served(self, server):
+        assert fetch(f'{server}/world/test/characters/hero_secrets.md')[0] == 404
+        assert fetch(f'{server}/world/test/characters/%2e%2e/characters/hero_portrait.png')[0] == 404
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for the hot-reload world cache
+Edit a secret, and the DM should know it on the next turn - no restart!
+"""
+
+import sys
+import os
+import json
+import shutil
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+
+import pytest
+from world_loader import WorldContentLoader, DEFAULT_WORLD_PATH
+from context_packer import ContextPacker
+from world_cache import WorldCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    shutil.copytree(DEFAULT_WORLD_PATH / 'campaigns' / 'shakespeare_scifi',
+                    tmp_path / 'campaigns' / 'shakespeare_scifi',
+                    ignore=shutil.ignore_patterns('*.png'))
+    loader = WorldContentLoader('shakespeare_scifi', world_path=tmp_path)
+    packer = ContextPacker(loader)
+    packer.warm()
+    return WorldCache(loader, packer, use_inotify=False)
+
+
+class TestWorldCache:
+    """Test incremental invalidation"""
+
+    def test_no_changes_no_reloads(self, cache):
+        assert cache.poll_once() == []
+        assert cache.reloads == 0
+
+    def test_edit_rebuilds_only_that_entity(self, cache):
+        seen = []
+        cache.add_listener(lambda entity_type, entity_id, entity: seen.append(entity_id))
+        cache.loader.load_entity('characters', 'puck_probability_sprite')
+        untouched = cache.loader.entity_cache[('characters', 'puck_probability_sprite')]
+
+        secrets = cache.loader.campaign_path / 'characters' / 'prospero_technomancer_secrets.md'
+        secrets.write_text("# Prospero's Secrets\n\nHe secretly adores comedy circuits.")
+
+        assert cache.poll_once() == [('characters', 'prospero_technomancer')]
+        assert seen == ['prospero_technomancer']
+        assert 'adores comedy circuits' in cache.loader.load_entity('characters', 'prospero_technomancer')['content']['secrets']
+        assert cache.loader.entity_cache[('characters', 'puck_probability_sprite')] is untouched
+
+        rendered = cache.packer.build_context('I ask Prospero', budget=4000).render()
+        assert 'adores comedy circuits' in rendered
+
+    def test_new_and_deleted_entities_update_recognizer(self, cache):
+        loader = cache.loader
+        assert loader.analyze_input('I meet Miranda')['characters'] == []
+
+        master = json.loads((loader.campaign_path / 'characters' / 'prospero_technomancer.json').read_text())
+        master.update(id='miranda_navigator', name='Miranda the Navigator')
+        new_master = loader.campaign_path / 'characters' / 'miranda_navigator.json'
+        new_master.write_text(json.dumps(master))
+        cache.poll_once()
+        assert loader.analyze_input('I meet Miranda')['characters'] == ['miranda_navigator']
+
+        new_master.unlink()
+        cache.poll_once()
+        assert loader.analyze_input('I meet Miranda')['characters'] == []
+        assert ('characters', 'miranda_navigator') not in loader.entity_cache
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for the relationship and inhabitant graph index
+Walk into Elsinore and Hamlet should come to mind!
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+
+import pytest
+from world_loader import WorldContentLoader
+from world_graph import WorldGraph, LiveWorldGraph, synthetic_graph
+from context_packer import ContextPacker
+
+
+@pytest.fixture
+def loader():
+    return WorldContentLoader('shakespeare_scifi')
+
+
+class TestWorldGraph:
+    """Test CSR construction and k-hop queries"""
+
+    def test_builds_edges_in_both_directions(self, loader):
+        graph = WorldGraph.from_loader(loader)
+        assert (('characters', 'hamlet_seven_ai'), 'characters') in graph.neighbors('locations', 'elsinore_data_fortress')
+        assert (('locations', 'elsinore_data_fortress'), 'characters') in graph.neighbors('characters', 'hamlet_seven_ai')
+
+    def test_reports_dangling_character_references(self, loader):
+        graph = WorldGraph.from_loader(loader)
+        missing = {target for _, _, target in graph.dangling}
+        assert 'claudius_eight_usurper' in missing
+        assert 'digital_ghosts' not in missing
+
+    def test_k_hop_distances(self):
+        nodes = [('characters', name) for name in 'abcde']
+        graph = WorldGraph(nodes, [(0, 1, 0), (1, 2, 0), (2, 3, 0), (0, 0, 0)])
+        assert graph.neighborhood('characters', 'a', hops=1) == [(('characters', 'b'), 1)]
+        assert graph.neighborhood('characters', 'a', hops=3) == [
+            (('characters', 'b'), 1), (('characters', 'c'), 2), (('characters', 'd'), 3)]
+        assert graph.neighborhood('characters', 'e', hops=2) == []
+        assert graph.neighborhood('characters', 'unknown') == []
+
+    def test_queries_are_cached(self):
+        graph = synthetic_graph(1000, seed=3)
+        first = graph.neighborhood(*graph.nodes[0], hops=2)
+        assert graph.neighborhood(*graph.nodes[0], hops=2) == first
+        assert graph.cache_info().hits == 1
+
+    def test_live_graph_rebuilds_after_invalidate(self, loader):
+        live = LiveWorldGraph(loader)
+        live.neighborhood('locations', 'elsinore_data_fortress')
+        before = live.graph
+        live.invalidate('locations', 'elsinore_data_fortress', None)
+        live.invalidate('characters', 'hamlet_seven_ai', None)
+        # Queries keep being answered while the rebuild runs off the request path
+        assert live.neighborhood('locations', 'elsinore_data_fortress')
+        assert live.wait(5)
+        assert live.graph is not before
+        assert live.rebuilds in (2, 3)
+
+
+class TestGraphExpansion:
+    """Test that the packer pulls in connected entities"""
+
+    def test_location_brings_in_inhabitants(self, loader):
+        packer = ContextPacker(loader, graph=WorldGraph.from_loader(loader))
+        rendered = packer.build_context('I enter Elsinore Data Fortress', budget=4000).render()
+        assert 'id="hamlet_seven_ai"' in rendered
+
+    def test_neighbors_score_below_mentioned_entities(self, loader):
+        packer = ContextPacker(loader, graph=WorldGraph.from_loader(loader))
+        weights = packer.expand({('locations', 'elsinore_data_fortress'): 0})
+        assert weights[('characters', 'hamlet_seven_ai')] < weights[('locations', 'elsinore_data_fortress')]
+
+    def test_no_graph_means_no_expansion(self, loader):
+        packer = ContextPacker(loader)
+        assert list(packer.expand({('locations', 'elsinore_data_fortress'): 0})) == [
+            ('locations', 'elsinore_data_fortress')]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
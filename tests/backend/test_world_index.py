@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for the bitmap entity index behind /api/world/entities
+Ask for every active NPC wizard and get exactly Prospero!
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+
+import pytest
+from world_loader import WorldContentLoader
+from world_index import EntityIndex, iter_bits, synthetic_index, benchmark_queries
+
+
+@pytest.fixture
+def index():
+    return EntityIndex.from_loader(WorldContentLoader('shakespeare_scifi'))
+
+
+class TestEntityIndex:
+    """Test filtering, pagination and updates"""
+
+    def test_tag_intersection(self, index):
+        result = index.query('character', ['npc', 'wizard'], status='active')
+        assert [entity['id'] for entity in result['entities']] == ['prospero_technomancer']
+        assert index.query(tags=['wizard', 'prince'])['total'] == 0
+        assert index.query(tags=['no_such_tag'])['total'] == 0
+
+    def test_type_status_and_priority(self, index):
+        characters = index.query('characters')
+        assert characters['total'] == index.values('type')['characters']
+        assert all(entity['type'] == 'characters' for entity in characters['entities'])
+        high = index.query(priority='HIGH')
+        assert high['total'] > 0
+        assert all(entity['ai_priority'] == 'high' for entity in high['entities'])
+
+    def test_pagination(self, index):
+        everything = index.query(limit=500)
+        pages = [index.query(offset=offset, limit=4) for offset in range(0, everything['total'], 4)]
+        assert [entity for page in pages for entity in page['entities']] == everything['entities']
+        assert index.query(offset=everything['total'])['entities'] == []
+
+    def test_listener_updates_and_removes(self, index):
+        index.listener('items', 'ghost_lantern', {'master': {'name': 'Ghost Lantern', 'tags': ['spirit', 'light']}})
+        assert [entity['id'] for entity in index.query(tags=['spirit', 'light'])['entities']] == ['ghost_lantern']
+        index.listener('items', 'ghost_lantern', {'master': {'name': 'Ghost Lantern', 'tags': ['light']}})
+        assert index.query(tags=['spirit', 'light'])['total'] == 0
+        index.listener('items', 'ghost_lantern', None)
+        assert index.query(tags=['light'])['total'] == 0
+
+    def test_iter_bits_skips(self):
+        bitmap = synthetic_index(2000, seed=4).match(tags=['tag_1'])
+        positions = [bit for bit in range(2000) if bitmap >> bit & 1]
+        assert list(iter_bits(bitmap)) == positions
+        assert list(iter_bits(bitmap, 11)) == positions[11:]
+
+    def test_benchmark_runs(self):
+        result = benchmark_queries(3000, queries=20)
+        assert result['entities'] == 3000
+        assert result['mean_matches'] > 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
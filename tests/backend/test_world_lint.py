@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for the parallel world linter
+Every inhabitant should exist and every file a master JSON promises should be there
+"""
+
+import sys
+import os
+import json
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+
+import pytest
+from world_loader import DEFAULT_WORLD_PATH
+from world_lint import lint_campaign, make_synthetic_campaign
+
+
+def codes(report, entity):
+    return {(problem['code'], problem['message']) for problem in report['issues'] if problem['entity'] == entity}
+
+
+class TestShakespeareCampaign:
+    """Test the known problems in the shipped campaign"""
+
+    def test_reports_missing_inhabitants(self):
+        report = lint_campaign(DEFAULT_WORLD_PATH / 'campaigns' / 'shakespeare_scifi')
+        problems = codes(report, 'locations/elsinore_data_fortress')
+        assert ('dangling-reference', 'inhabitants.characters -> claudius_eight_usurper') in problems
+        assert ('dangling-reference', 'inhabitants.characters -> gertrude_queen_ai') in problems
+        assert ('dangling-reference', 'inhabitants.characters -> hamlet_seven_ai') not in problems
+
+    def test_missing_images_are_warnings(self):
+        report = lint_campaign(DEFAULT_WORLD_PATH / 'campaigns' / 'shakespeare_scifi')
+        maps = [p for p in report['issues'] if p['message'] == 'files.map: elsinore_data_fortress_map.png']
+        assert [p['severity'] for p in maps] == ['warning']
+
+
+class TestSyntheticCampaign:
+    """Test template checks and the process pool on generated campaigns"""
+
+    @pytest.fixture
+    def campaign(self, tmp_path):
+        campaign_path = tmp_path / 'synthetic'
+        make_synthetic_campaign(campaign_path, 60, broken_every=10)
+        return campaign_path
+
+    def test_pool_matches_serial(self, campaign):
+        serial = lint_campaign(campaign, workers=1)
+        pooled = lint_campaign(campaign, workers=2, chunk_size=7)
+        assert pooled['workers'] == 2
+        assert pooled['issues'] == serial['issues']
+        assert serial['errors'] == 2
+
+    def test_template_violations(self, campaign):
+        master_path = campaign / 'items' / 'item_000002.json'
+        master = json.loads(master_path.read_text())
+        del master['name']
+        master['tags'] = 'sword'
+        master['metadata']['ai_priority'] = 'urgent'
+        master_path.write_text(json.dumps(master))
+        (campaign / 'items' / 'item_000005.json').write_text('{not json')
+
+        report = lint_campaign(campaign, workers=1)
+        assert codes(report, 'items/item_000002') >= {
+            ('missing-field', "missing 'name'"),
+            ('wrong-type', "'tags' should be array, got string"),
+            ('bad-value', "'metadata.ai_priority' must be one of critical, high, medium, low (got 'urgent')"),
+        }
+        assert {code for code, _ in codes(report, 'items/item_000005')} == {'bad-json'}
+
+    def test_missing_content_file_is_an_error(self, campaign):
+        (campaign / 'characters' / 'character_000000_bio.md').unlink()
+        report = lint_campaign(campaign, workers=1)
+        problems = [p for p in report['issues'] if p['entity'] == 'characters/character_000000']
+        assert {(p['severity'], p['message']) for p in problems} >= {
+            ('error', 'files.public_bio: character_000000_bio.md')}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
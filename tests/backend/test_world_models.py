@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for the slotted Character, Location and Item models
+They should read and write exactly the JSON the campaigns already use
+"""
+
+import sys
+import os
+import json
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+
+import pytest
+from context_packer import ContextPacker
+from world_loader import WorldContentLoader, ENTITY_TYPES
+from world_models import Character, Item, entity_from_master, measure_memory
+
+
+@pytest.fixture
+def loader():
+    return WorldContentLoader('shakespeare_scifi')
+
+
+class TestEntityModels:
+    """Test round-tripping, interning and lazy text"""
+
+    def test_campaign_round_trips_byte_for_byte(self, loader):
+        for entity_type in ENTITY_TYPES:
+            for entity_id in loader.list_entity_ids(entity_type):
+                raw = str(loader.source.read_bytes(f'{entity_type}/{entity_id}.json'), 'utf-8')
+                assert loader.load_model(entity_type, entity_id).to_json() == raw.rstrip('\n')
+
+    def test_unknown_keys_survive(self):
+        master = {'id': 'lamp', 'type': 'item', 'name': 'Lamp', 'campaign': 'test', 'tags': ['light'],
+                  'files': {}, 'metadata': {'status': 'draft', 'author': 'puck'}, 'aliases': ['the lamp']}
+        model = entity_from_master('items', master)
+        assert isinstance(model, Item)
+        assert model.to_master() == master
+        assert not hasattr(model, '__dict__')
+
+    def test_ids_and_tags_are_interned(self):
+        first = Character(''.join(['ham', 'let']), tags=[''.join(['n', 'pc'])])
+        second = Character(''.join(['haml', 'et']), tags=[''.join(['np', 'c'])])
+        assert first.id is second.id
+        assert first.tags[0] is second.tags[0]
+
+    def test_text_loads_lazily(self, loader):
+        model = loader.load_model('characters', 'prospero_technomancer')
+        loader.text_cache.discard(('characters', 'prospero_technomancer', 'bio'))
+        assert model.bio.startswith('# Prospero')
+        assert model.file('portrait') == 'prospero_technomancer_portrait.png'
+        assert Character('nobody').bio is None
+
+    def test_loader_caches_models_not_dicts(self, loader):
+        entity = loader.load_entity('characters', 'prospero_technomancer')
+        record, _ = loader.entity_cache[('characters', 'prospero_technomancer')]
+        assert isinstance(record, Character)
+        assert loader.load_model('characters', 'prospero_technomancer') is record
+        assert entity['master'] == record.to_master()
+
+    def test_models_are_hashable(self, loader):
+        prospero = loader.load_model('characters', 'prospero_technomancer')
+        copy = entity_from_master('characters', prospero.to_master())
+        assert copy == prospero and {prospero, copy} == {prospero}
+        assert len({Character('lamp'), Item('lamp')}) == 2
+
+    def test_chunking_never_rebuilds_masters(self, loader, monkeypatch):
+        loader.load_entity('characters', 'prospero_technomancer')
+        packer = ContextPacker(loader)
+        monkeypatch.setattr(Character, 'to_master', lambda self: pytest.fail('master rebuilt'))
+        assert packer.entity_chunks('characters', 'prospero_technomancer')
+        assert loader.load_content('characters', 'prospero_technomancer') is \
+            loader.entity_cache[('characters', 'prospero_technomancer')][1]
+
+    def test_irregular_master_is_cached_as_read(self, tmp_path):
+        items = tmp_path / 'campaigns' / 'odd' / 'items'
+        items.mkdir(parents=True)
+        (items / 'lamp.json').write_text(json.dumps({'id': 'lamp', 'type': 'item', 'name': 'Lamp'}))
+        loader = WorldContentLoader('odd', world_path=tmp_path, validate=False)
+        assert loader.load_entity('items', 'lamp')['master'] == {'id': 'lamp', 'type': 'item', 'name': 'Lamp'}
+        assert isinstance(loader.entity_cache[('items', 'lamp')][0], dict)
+
+    def test_models_use_less_memory(self):
+        result = measure_memory(600)
+        assert result['round_trips']
+        assert result['model_bytes_per_entity'] < result['dict_bytes_per_entity']
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
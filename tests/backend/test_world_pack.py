@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Tests for compiled world packs
+One file in, the same campaign out!
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+
+import pytest
+from world_loader import WorldContentLoader, DEFAULT_WORLD_PATH
+from world_pack import build_pack, WorldPack, WorldPackError, load_campaign
+
+CAMPAIGN_PATH = DEFAULT_WORLD_PATH / 'campaigns' / 'shakespeare_scifi'
+
+
+@pytest.fixture
+def pack_path(tmp_path):
+    path = tmp_path / 'shakespeare_scifi.worldpack'
+    build_pack(CAMPAIGN_PATH, path)
+    return path
+
+
+class TestWorldPack:
+    """Test building and reading packs"""
+
+    def test_build_reports_contents(self, tmp_path):
+        result = build_pack(CAMPAIGN_PATH, tmp_path / 'out.worldpack')
+        assert result['entities'] == 15
+        assert result['assets'] > 0  # PNGs stay on disk
+
+    def test_reads_are_byte_identical(self, pack_path):
+        with WorldPack(pack_path) as pack:
+            for relpath in ('WORLD_CONCEPT.md', 'characters/prospero_technomancer_bio.md',
+                            'locations/elsinore_data_fortress_inhabitants.json'):
+                assert bytes(pack.read_bytes(relpath)) == (CAMPAIGN_PATH / relpath).read_bytes()
+            assert pack.read_bytes('characters/nobody.json') is None
+
+    def test_loader_matches_directory_loader(self, pack_path):
+        from_pack = load_campaign('shakespeare_scifi', pack_path)
+        from_dir = WorldContentLoader('shakespeare_scifi')
+        assert from_pack.get_world_overview() == from_dir.get_world_overview()
+        assert from_pack.load_all() == from_dir.load_all()
+
+    def test_rejects_foreign_files(self, tmp_path):
+        bogus = tmp_path / 'bogus.worldpack'
+        bogus.write_bytes(b'not a pack at all, just some bytes that are long enough')
+        with pytest.raises(WorldPackError):
+            WorldPack(bogus)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
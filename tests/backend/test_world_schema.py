@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for compiled entity schema validation
+Bad entities should be caught on create, on load and in bulk
+"""
+
+import sys
+import os
+import copy
+import json
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'scripts', 'world_generation'))
+
+import pytest
+from world_loader import WorldContentLoader, DEFAULT_WORLD_PATH
+from world_schema import (SchemaCompiler, SchemaValidationError, get_validator, validate_entity, validate_many,
+                          benchmark_validation)
+
+
+@pytest.fixture
+def prospero():
+    with open(DEFAULT_WORLD_PATH / 'campaigns' / 'shakespeare_scifi' / 'characters' / 'prospero_technomancer.json') as f:
+        return json.load(f)
+
+
+class TestSchemas:
+    """Test the shipped schemas against the shipped campaigns"""
+
+    def test_campaign_entities_are_valid(self):
+        for campaign in ('shakespeare_scifi', 'default'):
+            entities = WorldContentLoader(campaign, validate=False).load_all()
+            assert entities
+            assert validate_many((entity['type'], entity['master']) for entity in entities) == {}
+
+    def test_reports_each_problem(self, prospero):
+        master = copy.deepcopy(prospero)
+        del master['name']
+        master['id'] = 'Prospero!'
+        master['tags'] = ['wizard', 7]
+        master['metadata']['ai_priority'] = 'urgent'
+        errors = validate_entity('characters', master)
+        assert ('missing-field', "missing 'name'") in errors
+        assert ('wrong-type', "'tags[]' should be string, got integer") in errors
+        assert {code for code, _ in errors} == {'missing-field', 'wrong-type', 'bad-value'}
+        assert len(errors) == 4
+
+    def test_type_must_match_directory(self, prospero):
+        errors = validate_entity('items', prospero)
+        assert ('bad-value', "'type' must be 'item' (got 'character')") in errors
+
+    def test_validators_are_cached(self):
+        assert get_validator('characters').__code__ is get_validator('characters').__code__
+        compiler = SchemaCompiler()
+        assert compiler.compile_file('character.schema.json') is compiler.compile_file('character.schema.json')
+
+    def test_benchmark_runs(self):
+        result = benchmark_validation(300)
+        assert result['entities'] == 300
+        assert result['invalid'] == 0
+
+
+class TestValidationHooks:
+    """Test validation on load and on create"""
+
+    def test_loader_records_schema_errors(self, tmp_path, prospero):
+        characters = tmp_path / 'campaigns' / 'broken' / 'characters'
+        characters.mkdir(parents=True)
+        prospero['metadata']['status'] = 'sleeping'
+        (characters / 'prospero_technomancer.json').write_text(json.dumps(prospero))
+
+        loader = WorldContentLoader('broken', world_path=tmp_path)
+        assert loader.load_entity('characters', 'prospero_technomancer') is not None
+        assert [code for code, _ in loader.schema_errors[('characters', 'prospero_technomancer')]] == ['bad-value']
+
+    def test_creator_rejects_invalid_entities(self, tmp_path):
+        from entity_creator import EntityCreator
+        creator = EntityCreator(tmp_path)
+        with pytest.raises(SchemaValidationError):
+            creator.create_item('bad_item', 'Bad Item', 'test', ai_priority='urgent')
+        assert not (tmp_path / 'campaigns' / 'test' / 'items' / 'bad_item.json').exists()
+
+        creator.create_item('good_item', 'Good Item', 'test')
+        assert (tmp_path / 'campaigns' / 'test' / 'items' / 'good_item.json').exists()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite world store
+Import, query, search, export - and get back exactly what we put in!
+"""
+
+import sys
+import os
+import json
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+
+import pytest
+from world_loader import WorldContentLoader, DEFAULT_WORLD_PATH
+from world_store import WorldStore, StoreSource
+
+CAMPAIGN_PATH = DEFAULT_WORLD_PATH / 'campaigns' / 'shakespeare_scifi'
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = WorldStore(tmp_path / 'world.db')
+    store.import_campaign(CAMPAIGN_PATH, include_assets=False)
+    yield store
+    store.close()
+
+
+class TestWorldStore:
+    """Test the SQLite backend"""
+
+    def test_tag_and_type_queries(self, store):
+        crowns = store.query('shakespeare_scifi', entity_type='items', tags=['crown'])
+        assert [row['entity_id'] for row in crowns] == ['comedy_circuit_crown', 'oberons_crown_command']
+
+        dangerous_high = store.query('shakespeare_scifi', tags=['dangerous'], ai_priority='high')
+        assert {row['entity_id'] for row in dangerous_high} == {
+            'lady_m4c_android', 'weird_sisters_collective', 'arden_digital_forest', 'verona_prime_city'}
+
+    def test_relationships_are_indexed(self, store):
+        related = store.related('shakespeare_scifi', 'locations', 'elsinore_data_fortress')
+        assert 'hamlet_seven_ai' in related['characters']
+        assert 'Royal Court' in related['factions']
+
+    def test_full_text_search(self, store):
+        hits = store.search('shakespeare_scifi', "Yorick's jester")
+        assert hits and hits[0]['entity_id'] == 'yoricks_memory_skull'
+
+    def test_loader_reads_from_store(self, store):
+        from_store = WorldContentLoader('shakespeare_scifi', source=StoreSource(store, 'shakespeare_scifi'))
+        assert from_store.load_all() == WorldContentLoader('shakespeare_scifi').load_all()
+
+    def test_write_file_updates_tags(self, store):
+        master = store.get_entity('shakespeare_scifi', 'characters', 'puck_probability_sprite')
+        master['tags'].append('fairy')
+        store.write_file('shakespeare_scifi', 'characters/puck_probability_sprite.json',
+                         json.dumps(master).encode('utf-8'))
+        fairies = store.query('shakespeare_scifi', tags=['fairy'])
+        assert [row['entity_id'] for row in fairies] == ['puck_probability_sprite']
+
+    def test_export_round_trips(self, store, tmp_path):
+        out = tmp_path / 'export'
+        store.export_campaign('shakespeare_scifi', out)
+        for relpath in ('WORLD_CONCEPT.md', 'items/tempest_in_bottle_stats.json',
+                        'characters/hamlet_seven_ai_secrets.md'):
+            assert (out / relpath).read_bytes() == (CAMPAIGN_PATH / relpath).read_bytes()
+
+    def test_read_only_connection(self, store):
+        reader = WorldStore(store.db_path, read_only=True)
+        assert reader.list_entity_ids('shakespeare_scifi', 'locations')[0] == 'arden_digital_forest'
+        reader.close()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])